@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import (FIRST_COMPLETED,
+                                ProcessPoolExecutor,
+                                ThreadPoolExecutor,
+                                wait)
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import (NULL,
+                       QgsExpression,
+                       QgsProcessing,
+                       QgsProcessingAlgorithm,
+                       QgsProcessingParameterEnum,
+                       QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterField,
+                       QgsProcessingParameterFile,
+                       QgsProcessingParameterFolderDestination,
+                       QgsProcessingParameterMultipleLayers,
+                       QgsProcessingParameterNumber,
+                       QgsProcessingParameterString)
+from .cluster_style import DEFAULT_SCHEMA, ClusterStyle, load_schema
+from .filters import add_filter_parameters, feature_request
+from .lib import UniqueNames, polygon_rings, round_parts
+from .precision import add_precision_parameter, coordinate_precision
+from .writers import run_export_job
+
+# Exporters available in the batch, in the order shown in the dialog
+EXPORT_CLUSTER_DXF = 0
+EXPORT_POLYGON_DXF = 1
+EXPORT_SURPAC_STRING = 2
+
+
+def python_executable():
+    """
+    Returns the Python interpreter used to spawn worker processes. Inside
+    QGIS `sys.executable` is usually the QGIS binary, so the interpreter is
+    looked up in `sys.exec_prefix` instead.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    for folder in [sys.exec_prefix, os.path.join(sys.exec_prefix, 'bin')]:
+        for name in ['python.exe', 'python3', 'python']:
+            path = os.path.join(folder, name)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def plain_attributes(feature):
+    """
+    Returns the attributes of `feature` with NULL as None, so that the
+    records built from them can be pickled for the worker processes.
+    """
+    return [None if value is None or value == NULL else value for value in feature.attributes()]
+
+
+def attribute_text(value):
+    """
+    Returns a plain attribute as written by the single layer exporters.
+    """
+    return 'NULL' if value is None else f'{value}'
+
+
+class BatchExportAlgorithm(QgsProcessingAlgorithm):
+
+    ELEVATION_FIELD = 'ELEVATION_FIELD'
+    EXPORTER = 'EXPORTER'
+    FIELDS = 'FIELDS'
+    INPUT = 'INPUT'
+    LAYERS = 'LAYERS'
+    LAYER_FIELD = 'LAYER_FIELD'
+    OUTPUT = 'OUTPUT'
+    PARTITION_FIELD = 'PARTITION_FIELD'
+    STYLE = 'STYLE'
+    WORKERS = 'WORKERS'
+
+    def initAlgorithm(self, config):
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.EXPORTER,
+                self.tr('Export to'),
+                options=[
+                    self.tr('Cluster DXF'),
+                    self.tr('Polygon DXF'),
+                    self.tr('Surpac string')
+                ],
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                self.LAYERS,
+                self.tr('Layers to export, one file each'),
+                QgsProcessing.TypeVectorPolygon,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.INPUT,
+                self.tr('Layer to export, one file per partition'),
+                [QgsProcessing.TypeVectorPolygon],
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.PARTITION_FIELD,
+                self.tr('Column to partition the layer by (e.g. pit or bench)'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.LAYER_FIELD,
+                self.tr('Column to be used as layer name in DXF (polygon DXF)'),
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.ELEVATION_FIELD,
+                self.tr('Column to be used as elevation (polygon DXF)'),
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.FIELDS,
+                self.tr('Comma separated columns to be copied as string attributes (Surpac string)'),
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFile(
+                self.STYLE,
+                self.tr('Style schema (cluster DXF)'),
+                optional=True,
+                fileFilter=self.tr('Style schema (*.json *.toml)')
+            )
+        )
+        add_filter_parameters(self)
+        add_precision_parameter(self)
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.WORKERS,
+                self.tr('Maximum number of concurrent exports'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=os.cpu_count() or 1,
+                minValue=1
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFolderDestination(
+                self.OUTPUT,
+                self.tr('Output folder')
+            )
+        )
+
+    def record_builder(self, exporter, fields, parameters, context):
+        """
+        Returns a function converting the attributes and geometry of a
+        feature into the record written by `run_export_job`, and the
+        settings of the job.
+        """
+        precision = coordinate_precision(self, parameters, context)
+
+        def rings_of(geometry):
+            rings = polygon_rings(geometry)
+            return rings if precision is None else round_parts(rings, precision)
+
+        if exporter == EXPORT_CLUSTER_DXF:
+            style_file = self.parameterAsFile(parameters, self.STYLE, context)
+            style = ClusterStyle(load_schema(style_file) if style_file else DEFAULT_SCHEMA, fields)
+
+            def build(attributes, geometry):
+                layer, name, attribs = style.entity(attributes)
+                return (layer, name, attribs, rings_of(geometry))
+
+            settings = {
+                'kind': 'dxf',
+                'appid': 'TrimbleName',
+                'setup': style.linetype_setup(),
+                'dxfattribs': {}
+            }
+            return build, settings, '.dxf'
+
+        if exporter == EXPORT_POLYGON_DXF:
+            field = self.parameterAsString(parameters, self.LAYER_FIELD, context)
+            elevation = self.parameterAsString(parameters, self.ELEVATION_FIELD, context)
+            field_index = fields.indexFromName(field)
+            if field_index == -1:
+                raise Exception(f'Layer has no `{field}` field.')
+            elevation_index = fields.indexFromName(elevation) if elevation else None
+            if elevation_index == -1:
+                raise Exception(f'Layer has no `{elevation}` field.')
+
+            def build(attributes, geometry):
+                attribs = {}
+                if elevation_index is not None and attributes[elevation_index] is not None:
+                    attribs['elevation'] = float(attributes[elevation_index])
+                layer = attribute_text(attributes[field_index])
+                return (layer, layer, attribs, rings_of(geometry))
+
+            settings = {
+                'kind': 'dxf',
+                'appid': 'TMCAlgorithms',
+                'setup': False,
+                'dxfattribs': {'linetype': 'CONTINUOUS'}
+            }
+            return build, settings, '.dxf'
+
+        names = [
+            name.strip() for name in
+            self.parameterAsString(parameters, self.FIELDS, context).split(',')
+            if name.strip()
+        ]
+        indices = [fields.indexFromName(name) for name in names]
+        if -1 in indices:
+            raise Exception(f'Layer has no `{names[indices.index(-1)]}` field.')
+
+        def build(attributes, geometry):
+            return (polygon_rings(geometry), [attribute_text(attributes[i]) for i in indices])
+
+        return build, {'kind': 'str', 'precision': precision}, '.str'
+
+    def jobs(self, exporter, parameters, context, feedback):
+        """
+        Reads the inputs in this thread and yields one export job per layer or
+        partition. The partitioned layer is read once, ordered by the
+        partition column, and each partition yielded as soon as it ends, so
+        that only the jobs waiting for a worker are kept in memory. Files are
+        named after the layers and partitions, those with the same name
+        getting a suffix.
+        """
+        folder = self.parameterAsString(parameters, self.OUTPUT, context)
+        layers = self.parameterAsLayerList(parameters, self.LAYERS, context)
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        names = UniqueNames()
+
+        for layer in layers:
+            if feedback.isCanceled():
+                return
+            build, settings, extension = self.record_builder(exporter, layer.fields(), parameters, context)
+            records = [
+                build(plain_attributes(feature), feature.geometry())
+                for feature in layer.getFeatures(feature_request(self, parameters, context, layer))
+                if feature.hasGeometry()
+            ]
+            yield dict(settings, path=os.path.join(folder, names.name(layer.name()) + extension), records=records)
+
+        if source:
+            partition = self.parameterAsFields(parameters, self.PARTITION_FIELD, context)
+            if not partition:
+                raise Exception('No column given to partition the layer by.')
+            partition_index = source.fields().indexFromName(partition[0])
+            if partition_index == -1:
+                raise Exception(f'Layer has no `{partition[0]}` field.')
+            build, settings, extension = self.record_builder(exporter, source.fields(), parameters, context)
+            request = feature_request(self, parameters, context, source)
+            request.addOrderBy(QgsExpression.quotedColumnRef(partition[0]))
+
+            def partition_path(value):
+                return os.path.join(folder, names.name(attribute_text(value)) + extension)
+
+            value = None
+            records = []
+            for feature in source.getFeatures(request):
+                if feedback.isCanceled():
+                    return
+                if not feature.hasGeometry():
+                    continue
+                attributes = plain_attributes(feature)
+                if records and attributes[partition_index] != value:
+                    yield dict(settings, path=partition_path(value), records=records)
+                    records = []
+                value = attributes[partition_index]
+                records.append(build(attributes, feature.geometry()))
+            if records:
+                yield dict(settings, path=partition_path(value), records=records)
+
+    def processAlgorithm(self, parameters, context, feedback):
+        exporter = self.parameterAsEnum(parameters, self.EXPORTER, context)
+        folder = self.parameterAsString(parameters, self.OUTPUT, context)
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        os.makedirs(folder, exist_ok=True)
+
+        python = python_executable()
+        if python and workers > 1:
+            mp_context = multiprocessing.get_context('spawn')
+            mp_context.set_executable(python)
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+        else:
+            if workers > 1:
+                feedback.reportError(self.tr('No Python interpreter found for worker processes. Using threads.'))
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        submitted = 0
+        outputs = []
+        pending = set()
+
+        def collect(return_when):
+            done, not_done = wait(pending, timeout=0.2, return_when=return_when)
+            for future in done:
+                outputs.append(future.result())
+                feedback.pushInfo(f'Exported {outputs[-1]}')
+            pending.intersection_update(not_done)
+            feedback.setProgress(int(100.0 * len(outputs) / max(submitted, 1)))
+
+        try:
+            for job in self.jobs(exporter, parameters, context, feedback):
+                # Bound the jobs kept in memory while the workers are busy.
+                while len(pending) >= 2 * workers and not feedback.isCanceled():
+                    collect(FIRST_COMPLETED)
+                if feedback.isCanceled():
+                    break
+                pending.add(executor.submit(run_export_job, job))
+                submitted += 1
+            while pending and not feedback.isCanceled():
+                collect(FIRST_COMPLETED)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        return {self.OUTPUT: folder}
+
+    def name(self):
+        return 'Batch export polygons'
+
+    def displayName(self):
+        return self.tr(self.name())
+
+    def group(self):
+        return self.tr(self.groupId())
+
+    def groupId(self):
+        return 'Data Management'
+
+    def tr(self, string):
+        return QCoreApplication.translate('Processing', string)
+
+    def createInstance(self):
+        return BatchExportAlgorithm()
+
+    def shortHelpString(self):
+        return self.tr(
+            'Export several polygon layers, or the partitions of one layer by a column (e.g. per pit or bench), into separate cluster DXF, polygon DXF or Surpac string files. The layers are read one at a time and the partitioned layer once, ordered by the partition column. Their files are written concurrently by worker processes, only the files waiting for a worker being kept in memory. Files with the same name get a numbered suffix.'
+        )
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import hashlib
+import json
+import os
+import pickle
+from time import perf_counter
+from qgis.core import (QgsFeatureRequest,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterFile,
+                       QgsProcessingParameterNumber)
+from .manifest import parameters_hash, source_hash
+
+CHECKPOINT_FOLDER = 'CHECKPOINT_FOLDER'
+CHUNK_SIZE = 'CHUNK_SIZE'
+
+# Version of the checkpoint files, changed whenever the records of a chunk
+# change
+CHECKPOINT_VERSION = 2
+
+
+def add_checkpoint_parameters(alg):
+    """
+    Adds the advanced chunk size and checkpoint folder parameters to `alg`.
+    """
+    par_chunk = QgsProcessingParameterNumber(
+        CHUNK_SIZE,
+        alg.tr('Sources routed per chunk'),
+        type=QgsProcessingParameterNumber.Integer,
+        defaultValue=50,
+        minValue=1
+    )
+    par_folder = QgsProcessingParameterFile(
+        CHECKPOINT_FOLDER,
+        alg.tr('Folder keeping the finished chunks to resume an interrupted run'),
+        behavior=QgsProcessingParameterFile.Folder,
+        optional=True
+    )
+    for parameter in [par_chunk, par_folder]:
+        parameter.setFlags(parameter.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        alg.addParameter(parameter)
+
+
+class RoutingCheckpoint(object):
+    """
+    Results of the finished chunks of a run, one pickle file per chunk in
+    `directory` and `checkpoint.json` listing them with the key of the run.
+    Chunks are only listed once their file is complete, so a run stopped at
+    any point resumes after its last finished chunk. The files of another
+    run, i.e. with another key, are dropped.
+    """
+
+    def __init__(self, directory, key):
+        self.directory = directory
+        self.key = key
+        self.path = os.path.join(directory, 'checkpoint.json')
+        self.done = set()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.path) as fstream:
+                checkpoint = json.load(fstream)
+        except (OSError, ValueError):
+            checkpoint = {}
+        if checkpoint.get('key') == key:
+            self.done = {
+                chunk for chunk in checkpoint.get('chunks', [])
+                if os.path.exists(self.chunk_path(chunk))
+            }
+        else:
+            self.clear()
+
+    def chunk_path(self, chunk):
+        return os.path.join(self.directory, f'chunk_{chunk}.pickle')
+
+    def finished(self, chunk):
+        return chunk in self.done
+
+    def load(self, chunk):
+        with open(self.chunk_path(chunk), 'rb') as fstream:
+            return pickle.load(fstream)
+
+    def commit(self, chunk, records):
+        """
+        Saves the `records` of `chunk` and lists it as finished. Files are
+        written aside and then renamed, so that they are either complete or
+        missing.
+        """
+        path = self.chunk_path(chunk)
+        with open(f'{path}.part', 'wb') as fstream:
+            pickle.dump(records, fstream, pickle.HIGHEST_PROTOCOL)
+        os.replace(f'{path}.part', path)
+        self.done.add(chunk)
+        with open(f'{self.path}.part', 'w') as fstream:
+            json.dump({'key': self.key, 'chunks': sorted(self.done)}, fstream)
+        os.replace(f'{self.path}.part', self.path)
+
+    def clear(self):
+        """
+        Removes the files of the run, once it is complete.
+        """
+        for name in os.listdir(self.directory):
+            if name == 'checkpoint.json' or (name.startswith('chunk_') and '.pickle' in name):
+                os.remove(os.path.join(self.directory, name))
+        self.done = set()
+
+
+def routing_checkpoint(alg, parameters, context, layers, ignored):
+    """
+    Returns the checkpoint of the run of `alg`, or None if no checkpoint
+    folder is given. The run is keyed by the content of `layers` and the
+    parameters but `ignored` and the checkpoint folder.
+    """
+    directory = alg.parameterAsFile(parameters, CHECKPOINT_FOLDER, context)
+    if not directory:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{CHECKPOINT_VERSION}|{alg.name()}'.encode())
+    digest.update(parameters_hash(alg, parameters, context, set(ignored) | {CHECKPOINT_FOLDER}).encode())
+    for layer in layers:
+        digest.update(source_hash(layer, QgsFeatureRequest()).encode())
+    return RoutingCheckpoint(directory, digest.hexdigest())
+
+
+def duration_text(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours} h {minutes:02d} min'
+    if minutes:
+        return f'{minutes} min {seconds:02d} s'
+    return f'{seconds} s'
+
+
+class ChunkClock(object):
+    """
+    Throughput of the chunks of a run of `total` items, from which the time
+    left is estimated. Only the chunks computed by this run are timed, not
+    those loaded from a checkpoint.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.timed = 0
+        self.elapsed = 0.0
+        self._start = None
+
+    def start(self):
+        self._start = perf_counter()
+
+    def stop(self, count, timed=True):
+        """
+        Ends a chunk of `count` items, loaded rather than computed if
+        `timed` is not set.
+        """
+        self.done += count
+        if timed and self._start is not None:
+            self.elapsed += perf_counter() - self._start
+            self.timed += count
+        self._start = None
+
+    def rate(self):
+        return self.timed / self.elapsed if self.elapsed > 0 else None
+
+    def report(self):
+        rate = self.rate()
+        text = f'Processed {self.done} out of {self.total} sources'
+        if rate is None:
+            return f'{text}.'
+        return f'{text}, {rate:.1f} sources/s, about {duration_text((self.total - self.done) / rate)} left.'
@@ -20,27 +20,23 @@ from qgis.PyQt.QtCore import QCoreApplication
 from qgis.core import (QgsProcessing,
                        QgsProcessingAlgorithm,
                        QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterFile,
                        QgsProcessingParameterFileDestination)
-from .lib import new_dxf
-
-
-# AutoCAD Color Index (ACI) assigned for each ore class
-ACI = {
-    'A': 1,
-    'B': 2,
-    'C': 5,
-    'D': 32,
-    'E': 8,
-    'F': 7,
-    'L': 3,
-    'W': 6
-}
+from .cluster_style import DEFAULT_SCHEMA, ClusterStyle, load_schema
+from .filters import add_filter_parameters, feature_request
+from .lib import polygon_rings, round_parts
+from .manifest import add_manifest_parameter, export_manifest
+from .partition import OUTPUTS, add_split_parameters, dxf_output
+from .precision import add_precision_parameter, coordinate_precision
+from .profiling import PROFILE_FILE, add_profile_parameters, profiler
+from .simplify import add_simplify_parameters, simplifier
 
 
 class ClusterDxfAlgorithm(QgsProcessingAlgorithm):
 
     FILENAME = 'FILENAME'
     INPUT = 'INPUT'
+    STYLE = 'STYLE'
 
     def initAlgorithm(self, config):
         self.addParameter(
@@ -57,51 +53,86 @@ class ClusterDxfAlgorithm(QgsProcessingAlgorithm):
                 'dxf'
             )
         )
+        self.addParameter(
+            QgsProcessingParameterFile(
+                self.STYLE,
+                self.tr('Style schema'),
+                optional=True,
+                fileFilter=self.tr('Style schema (*.json *.toml)')
+            )
+        )
+        add_filter_parameters(self)
+        add_simplify_parameters(self)
+        add_precision_parameter(self)
+        add_split_parameters(self)
+        add_manifest_parameter(self)
+        add_profile_parameters(self)
 
     def processAlgorithm(self, parameters, context, feedback):
         dxf_file = self.parameterAsFile(parameters, self.FILENAME, context)
         if dxf_file[-4:] != '.dxf':
             dxf_file += '.dxf'
         source = self.parameterAsSource(parameters, self.INPUT, context)
-        if source.fields().indexFromName('name') == -1:
-            raise Exception('Layer has no `name` field.')
-        if source.fields().indexFromName('ore_class') == -1:
-            raise Exception('Layer has no `ore_class` field.')
-        if source.fields().indexFromName('z') == -1:
-            raise Exception('Layer has no `z` field.')
+        precision = coordinate_precision(self, parameters, context)
+        profile = profiler(self, parameters, context, feedback)
+        manifest = export_manifest(self, parameters, context, source, dxf_file)
+        unchanged = manifest.unchanged() if manifest is not None else None
+        if unchanged:
+            feedback.pushInfo(self.tr(f'Input and parameters unchanged since the last export to {dxf_file}, skipped.'))
+            profile.finish()
+            return {self.FILENAME: dxf_file, OUTPUTS: unchanged, PROFILE_FILE: profile.trace_file}
+        style_file = self.parameterAsFile(parameters, self.STYLE, context)
+        style = ClusterStyle(
+            load_schema(style_file) if style_file else DEFAULT_SCHEMA,
+            source.fields()
+        )
 
+        profile.begin('topology')
+        simplify = simplifier(
+            self, parameters, context, source, polygon_rings,
+            feature_request(self, parameters, context, source, [])
+        )
         total = 100.0 / source.featureCount() if source.featureCount() else 0
-        features = source.getFeatures()
-        doc = new_dxf('R2013')
-        doc.appids.new('TrimbleName')
+        features = source.getFeatures(
+            feature_request(self, parameters, context, source, None)
+        )
+        output = dxf_output(
+            self, parameters, context, source.fields(), dxf_file,
+            style.new_document, 'TrimbleName'
+        )
 
+        profile.begin('read')
         for current, feature in enumerate(features):
             if feedback.isCanceled():
                 break
 
-            msp = doc.modelspace()
             if feature.hasGeometry():
-                doc.layers.new(name=f'{feature.attribute("name")}')
-                geom = feature.geometry().asMultiPolygon()
-                for multi_polygon in geom:
-                    for polygon in multi_polygon:
-                        entity = msp.add_lwpolyline(
-                            [(point.x(), point.y()) for point in polygon],
-                            dxfattribs={
-                                'layer': feature.attribute('name'),
-                                'linetype': 'CONTINUOUS',
-                                'color': ACI[feature.attribute('ore_class')],
-                                'elevation': feature.attribute('z') - 3
-                            }
-                        )
-                        entity.set_xdata('TrimbleName', [
-                            (1001, 'TrimbleName'),
-                            (1000, feature.attribute('name')),
-                        ])
+                rings = simplify.simplify(polygon_rings(feature.geometry()))
+                if precision is not None:
+                    rings = round_parts(rings, precision)
+                profile.count(1, rings)
+                profile.begin('encode')
+                attributes = feature.attributes()
+                templates = output.templates(attributes)
+                template = style.template(templates, attributes)
+                for ring in rings:
+                    templates.add_lwpolyline(ring, template)
+                profile.begin('read')
             feedback.setProgress(int(current * total))
 
-        doc.saveas(dxf_file)
-        return {self.FILENAME: dxf_file}
+        if style.unknown_classes:
+            feedback.reportError(self.tr(
+                f'Unknown ore classes {sorted(map(str, style.unknown_classes))} were exported with the default style.'
+            ))
+        simplify.report(feedback)
+        profile.begin('save')
+        paths = output.save()
+        if manifest is not None and not feedback.isCanceled():
+            manifest.save(paths)
+        if paths != [dxf_file]:
+            feedback.pushInfo(self.tr(f'Wrote {len(paths)} DXF files.'))
+        profile.finish()
+        return {self.FILENAME: dxf_file, OUTPUTS: paths, PROFILE_FILE: profile.trace_file}
 
     def name(self):
         return 'Export cluster to DXF'
@@ -123,5 +154,5 @@ class ClusterDxfAlgorithm(QgsProcessingAlgorithm):
 
     def shortHelpString(self):
         return self.tr(
-            'Export the clustred blocks into a DXF file. Block clustering is mainly done by grade control. Each cluster is placed in a separate layer. The color of each cluster is based on its ore_class.'
+            'Export the clustred blocks into a DXF file. Block clustering is mainly done by grade control. Each cluster is placed in a separate layer. The color of each cluster is based on its ore_class.\n\nA JSON or TOML style schema may be given to set the color, linetype, lineweight, layer name template and elevation offset of each ore_class. Keys of the `default` table apply to ore classes not listed in `classes`:\n{"default": {"color": 7, "linetype": "CONTINUOUS", "lineweight": -1, "layer": "{name}", "elevation_offset": -3}, "classes": {"A": {"color": 1}, "W": {"color": 6, "linetype": "DASHED"}}}'
         )
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import json
+import os
+from string import Formatter
+from .lib import new_dxf
+
+# Style schema used when no schema file is given. Each entry in `classes`
+# overrides the keys of `default` for one ore class. `layer` is a
+# `str.format` template over the feature attributes.
+DEFAULT_SCHEMA = {
+    'default': {
+        'color': 7,
+        'elevation_offset': -3,
+        'layer': '{name}',
+        'linetype': 'CONTINUOUS',
+        'lineweight': -1
+    },
+    'classes': {
+        'A': {'color': 1},
+        'B': {'color': 2},
+        'C': {'color': 5},
+        'D': {'color': 32},
+        'E': {'color': 8},
+        'F': {'color': 7},
+        'L': {'color': 3},
+        'W': {'color': 6}
+    }
+}
+STYLE_KEYS = ('color', 'elevation_offset', 'layer', 'linetype', 'lineweight')
+# Linetypes present in a DXF document created without setup
+BASIC_LINETYPES = ('BYBLOCK', 'BYLAYER', 'CONTINUOUS')
+
+
+def load_schema(path):
+    """
+    Reads a style schema from a JSON or TOML file. Keys missing from the file
+    are taken from `DEFAULT_SCHEMA`.
+    """
+    if os.path.splitext(path)[1].lower() == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib # pyright: reportMissingImports=false
+            except ImportError:
+                raise Exception('Module not found. Install tomli: `pip install tomli`.')
+        with open(path, 'rb') as fstream:
+            schema = tomllib.load(fstream)
+    else:
+        with open(path, 'r') as fstream:
+            schema = json.load(fstream)
+
+    default = dict(DEFAULT_SCHEMA['default'])
+    default.update(schema.get('default', {}))
+    classes = schema.get('classes', DEFAULT_SCHEMA['classes'])
+    for style in [default] + list(classes.values()):
+        for key in style:
+            if key not in STYLE_KEYS:
+                raise Exception(f'Unknown key `{key}` in style schema.')
+    return {'default': default, 'classes': classes}
+
+
+class ClusterStyle(object):
+    """
+    Style schema compiled against the fields of a cluster layer. Each ore
+    class is mapped to an index in the `styles` array. Layer names are
+    evaluated once for each distinct combination of the attributes they use.
+    Ore classes missing from the schema use the default style and are
+    collected in `unknown_classes`.
+    """
+
+    def __init__(self, schema, fields):
+        self.name_index = fields.indexFromName('name')
+        self.ore_class_index = fields.indexFromName('ore_class')
+        self.z_index = fields.indexFromName('z')
+        if self.name_index == -1:
+            raise Exception('Layer has no `name` field.')
+        if self.ore_class_index == -1:
+            raise Exception('Layer has no `ore_class` field.')
+        if self.z_index == -1:
+            raise Exception('Layer has no `z` field.')
+        self.default = schema['default']
+        self.class_index = {}
+        self.styles = []
+        self.unknown_classes = set()
+        self._layers = {}
+        for ore_class, style in schema['classes'].items():
+            self.class_index[ore_class] = len(self.styles)
+            self.styles.append(self._compile(dict(self.default, **style), fields))
+        self.default_index = len(self.styles)
+        self.styles.append(self._compile(self.default, fields))
+
+    def _compile(self, style, fields):
+        names = [
+            name for _, name, _, _ in Formatter().parse(style['layer'])
+            if name is not None
+        ]
+        indices = []
+        for name in names:
+            index = fields.indexFromName(name)
+            if index == -1:
+                raise Exception(f'Layer has no `{name}` field.')
+            indices.append(index)
+        return (
+            style['layer'],
+            tuple(names),
+            tuple(indices),
+            {
+                'color': style['color'],
+                'linetype': style['linetype'],
+                'lineweight': style['lineweight']
+            },
+            style['elevation_offset']
+        )
+
+    def new_document(self):
+        """
+        Creates a DXF document with the linetypes used by the schema.
+        """
+        doc = new_dxf('R2013', setup=self.linetype_setup())
+        for linetype in set(style[3]['linetype'] for style in self.styles):
+            if linetype not in doc.linetypes:
+                raise Exception(f'Unknown linetype `{linetype}`.')
+        return doc
+
+    def layer(self, index, attributes):
+        template, names, indices, _, _ = self.styles[index]
+        values = tuple(attributes[i] for i in indices)
+        key = (index, values)
+        layer = self._layers.get(key)
+        if layer is None:
+            layer = template.format(**dict(zip(names, values)))
+            self._layers[key] = layer
+        return layer
+
+    def entity(self, attributes):
+        """
+        Returns the layer, the name written as TrimbleName xdata and the DXF
+        attributes of a feature given its attributes.
+        """
+        ore_class = attributes[self.ore_class_index]
+        index = self.class_index.get(ore_class)
+        if index is None:
+            index = self.default_index
+            self.unknown_classes.add(ore_class)
+        _, _, _, dxfattribs, elevation_offset = self.styles[index]
+        return (
+            self.layer(index, attributes),
+            f'{attributes[self.name_index]}',
+            dict(dxfattribs, elevation=attributes[self.z_index] + elevation_offset)
+        )
+
+    def linetype_setup(self):
+        """
+        Returns the `setup` argument of `ezdxf.new` needed by the schema.
+        """
+        linetypes = set(style[3]['linetype'] for style in self.styles)
+        return ['linetypes'] if linetypes.difference(BASIC_LINETYPES) else False
+
+    def template(self, templates, attributes):
+        """
+        Returns the `DxfTemplates` template of a feature given its attributes.
+        """
+        layer, name, dxfattribs = self.entity(attributes)
+        return templates.get(layer, name, **dxfattribs)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import json
+import struct
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import NULL, QgsProcessingParameterFileDestination
+
+COLUMNAR_FILE = 'COLUMNAR_FILE'
+
+# Arrow types of the QGIS field types, other types being written as strings
+ARROW_TYPES = {
+    QVariant.Bool: 'bool_',
+    QVariant.Double: 'float64',
+    QVariant.Int: 'int32',
+    QVariant.LongLong: 'int64',
+    QVariant.UInt: 'int64',
+    QVariant.ULongLong: 'uint64'
+}
+
+_pyarrow = None
+
+
+def load_pyarrow():
+    """
+    Imports pyarrow on first use and returns the module.
+    """
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow # pyright: reportMissingImports=false
+        except ImportError:
+            raise Exception('Module not found. Install pyarrow: `pip install pyarrow`.')
+        _pyarrow = pyarrow
+    return _pyarrow
+
+
+def add_columnar_parameter(alg):
+    """
+    Adds the optional Arrow IPC or GeoParquet output parameter to `alg`.
+    """
+    alg.addParameter(
+        QgsProcessingParameterFileDestination(
+            COLUMNAR_FILE,
+            alg.tr('Columnar file'),
+            alg.tr('Arrow IPC (*.arrow);;GeoParquet (*.parquet)'),
+            optional=True,
+            createByDefault=False
+        )
+    )
+
+
+def field_columns(fields, names=None, prefix=''):
+    """
+    Returns the (column name, Arrow type) of the fields `names` of `fields`,
+    all of them if `names` is None.
+    """
+    if names is None:
+        names = fields.names()
+    return [
+        (prefix + name, ARROW_TYPES.get(fields.at(fields.indexFromName(name)).type(), 'string'))
+        for name in names
+    ]
+
+
+def _points_wkb(points):
+    return struct.pack(f'<I{2 * len(points)}d', len(points), *(c for point in points for c in point))
+
+
+def linestring_wkb(points):
+    """
+    Returns the WKB of the line string following `points`, a list of (x, y).
+    """
+    return b'\x01' + struct.pack('<I', 2) + _points_wkb(points)
+
+
+def multipolygon_wkb(rings, counts):
+    """
+    Returns the WKB of the multipolygon made of `rings`, lists of (x, y),
+    the polygons having `counts` rings each, exterior ring first.
+    """
+    wkb = [b'\x01', struct.pack('<II', 6, len(counts))]
+    start = 0
+    for count in counts:
+        wkb.append(b'\x01' + struct.pack('<II', 3, count))
+        wkb.extend(_points_wkb(ring) for ring in rings[start:start + count])
+        start += count
+    return b''.join(wkb)
+
+
+def polygon_counts(geometry):
+    """
+    Returns the number of rings of each polygon of a (multi)polygon geometry,
+    in the order of `lib.polygon_rings`.
+    """
+    if geometry.isMultipart():
+        return [len(polygon) for polygon in geometry.asMultiPolygon()]
+    return [len(geometry.asPolygon())]
+
+
+def _plain(value, arrow_type):
+    if value is None or value == NULL:
+        return None
+    if arrow_type == 'string':
+        return f'{value}'
+    return value
+
+
+def _projjson(crs_wkt):
+    """
+    Returns the PROJJSON of `crs_wkt` required by GeoParquet if pyproj is
+    installed, None (unknown CRS) otherwise.
+    """
+    if not crs_wkt:
+        return None
+    try:
+        from pyproj import CRS # pyright: reportMissingImports=false
+    except ImportError:
+        return None
+    return CRS.from_wkt(crs_wkt).to_json_dict()
+
+
+class ColumnarWriter(object):
+    """
+    Writes rows into an Arrow IPC file, or a GeoParquet file if `path` ends
+    with `.parquet`, by record batches of `batch_size` rows. Rows are the
+    values of `columns`, (name, Arrow type) pairs, and the WKB of their
+    geometry of type `geometry_type` (e.g. 'LineString'), stored as GeoArrow
+    WKB in the CRS given as WKT.
+    """
+
+    def __init__(self, path, columns, geometry_type, crs_wkt='', batch_size=65536):
+        pa = load_pyarrow()
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = columns
+        self.values = [[] for _ in columns]
+        self.geometries = []
+        self.count = 0
+        geometry = pa.field('geometry', pa.binary(), metadata={
+            'ARROW:extension:name': 'geoarrow.wkb',
+            'ARROW:extension:metadata': json.dumps({'crs': crs_wkt} if crs_wkt else {})
+        })
+        fields = [pa.field(name, getattr(pa, arrow_type)()) for name, arrow_type in columns] + [geometry]
+        metadata = None
+        self.parquet = path.lower().endswith('.parquet')
+        if self.parquet:
+            metadata = {'geo': json.dumps({
+                'version': '1.0.0',
+                'primary_column': 'geometry',
+                'columns': {'geometry': {
+                    'encoding': 'WKB',
+                    'geometry_types': [geometry_type],
+                    'crs': _projjson(crs_wkt)
+                }}
+            })}
+        self.schema = pa.schema(fields, metadata=metadata)
+        if self.parquet:
+            import pyarrow.parquet as pq # pyright: reportMissingImports=false
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def add(self, values, wkb):
+        for column, value in zip(self.values, values):
+            column.append(value)
+        self.geometries.append(wkb)
+        if len(self.geometries) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.geometries:
+            return
+        pa = load_pyarrow()
+        arrays = [
+            pa.array([_plain(value, arrow_type) for value in values], type=getattr(pa, arrow_type)())
+            for values, (_, arrow_type) in zip(self.values, self.columns)
+        ]
+        arrays.append(pa.array(self.geometries, type=pa.binary()))
+        batch = pa.record_batch(arrays, schema=self.schema)
+        if self.parquet:
+            self.writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self.writer.write_batch(batch)
+        self.count += len(self.geometries)
+        self.values = [[] for _ in self.columns]
+        self.geometries = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        return self.path
+
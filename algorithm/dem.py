@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from collections import OrderedDict
+
+# Size of the tiles read from rasters stored by strips, whose blocks are
+# whole rows
+TILE_SIZE = 256
+
+
+class TiledDem(object):
+    """
+    Samples a band of a GDAL raster through the blocks holding the sampled
+    points only, so that the memory used depends on the area sampled rather
+    than on the size of the raster. The last `cache_size` tiles read are
+    kept, least recently used first out.
+    """
+
+    def __init__(self, path, band=1, cache_size=256):
+        from osgeo import gdal # pyright: reportMissingImports=false
+        self.dataset = gdal.Open(path, gdal.GA_ReadOnly)
+        if self.dataset is None:
+            raise Exception(f'Cannot open `{path}`.')
+        self.band = self.dataset.GetRasterBand(band)
+        self.width = self.dataset.RasterXSize
+        self.height = self.dataset.RasterYSize
+        self.tile_width, self.tile_height = self.band.GetBlockSize()
+        if self.tile_width >= self.width or self.tile_height == 1:
+            self.tile_width = self.tile_height = TILE_SIZE
+        self.inverse = gdal.InvGeoTransform(self.dataset.GetGeoTransform())
+        self.nodata = self.band.GetNoDataValue()
+        self.cache_size = cache_size
+        self.tiles = OrderedDict()
+        self.reads = 0
+        self.hits = 0
+
+    def tile(self, i, j):
+        tile = self.tiles.get((i, j))
+        if tile is not None:
+            self.tiles.move_to_end((i, j))
+            self.hits += 1
+            return tile
+        import numpy as np
+        left, top = i * self.tile_width, j * self.tile_height
+        tile = self.band.ReadAsArray(
+            left, top,
+            min(self.tile_width, self.width - left),
+            min(self.tile_height, self.height - top)
+        ).astype(float)
+        if self.nodata is not None:
+            tile[tile == self.nodata] = np.nan
+        self.tiles[(i, j)] = tile
+        self.reads += 1
+        if len(self.tiles) > self.cache_size:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def sample(self, points):
+        """
+        Returns the values of the pixels holding `points`, an (n, 2) array,
+        NaN outside of the raster or for no data.
+        """
+        import numpy as np
+        a, b, c, d, e, f = self.inverse
+        x, y = points[:, 0], points[:, 1]
+        column = np.floor(a + b * x + c * y).astype(np.int64)
+        row = np.floor(d + e * x + f * y).astype(np.int64)
+        values = np.full(len(points), np.nan)
+        inside = (column >= 0) & (column < self.width) & (row >= 0) & (row < self.height)
+        if not inside.any():
+            return values
+        column, row = column[inside], row[inside]
+        # Points are sorted by tile so that each tile is looked up once.
+        columns = -(-self.width // self.tile_width)
+        key = (row // self.tile_height) * columns + column // self.tile_width
+        order = np.argsort(key, kind='stable')
+        keys, starts = np.unique(key[order], return_index=True)
+        sampled = np.empty(len(column))
+        for key, start, end in zip(keys.tolist(), starts.tolist(), starts[1:].tolist() + [len(order)]):
+            j, i = divmod(key, columns)
+            tile = self.tile(i, j)
+            selected = order[start:end]
+            sampled[selected] = tile[
+                row[selected] - j * self.tile_height,
+                column[selected] - i * self.tile_width
+            ]
+        values[inside] = sampled
+        return values
+
+    def report(self, feedback):
+        feedback.pushInfo(
+            f'Read {self.reads} DEM tiles of {self.tile_width} x {self.tile_height} pixels '
+            f'({self.hits} cache hits).'
+        )
+
+
+def tiled_dem(layer, band=1):
+    """
+    Returns the `TiledDem` of the raster layer `layer`.
+    """
+    if layer.providerType() != 'gdal':
+        raise Exception(f'The DEM `{layer.name()}` is not a GDAL raster.')
+    return TiledDem(layer.source(), band)
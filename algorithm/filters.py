@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from qgis.core import (QgsExpression,
+                       QgsFeatureRequest,
+                       QgsProcessingParameterExpression,
+                       QgsProcessingParameterExtent)
+
+FILTER_EXPRESSION = 'FILTER_EXPRESSION'
+FILTER_EXTENT = 'FILTER_EXTENT'
+
+
+def add_filter_parameters(alg, parent='INPUT'):
+    """
+    Adds the extent and expression selecting the features of the `parent`
+    layer processed by `alg`.
+    """
+    alg.addParameter(
+        QgsProcessingParameterExtent(
+            FILTER_EXTENT,
+            alg.tr('Only use features intersecting this extent'),
+            optional=True
+        )
+    )
+    alg.addParameter(
+        QgsProcessingParameterExpression(
+            FILTER_EXPRESSION,
+            alg.tr('Only use features matching this expression'),
+            parentLayerParameterName=parent,
+            optional=True
+        )
+    )
+
+
+def feature_request(alg, parameters, context, source, attributes=None, expression=True):
+    """
+    Returns the request of the features of `source` selected by the filter
+    parameters of `alg`, so that the data provider filters them with its own
+    indexes. Only the `attributes` named are fetched, or all if None. The
+    filter expression is left out if `expression` is False.
+    """
+    request = QgsFeatureRequest()
+    extent = alg.parameterAsExtent(parameters, FILTER_EXTENT, context, source.sourceCrs())
+    if not extent.isNull():
+        request.setFilterRect(extent)
+    filter_expression = alg.parameterAsExpression(parameters, FILTER_EXPRESSION, context) if expression else ''
+    if filter_expression:
+        expression_context = alg.createExpressionContext(parameters, context)
+        expression_context.setFields(source.fields())
+        request.setFilterExpression(filter_expression)
+        request.setExpressionContext(expression_context)
+    if attributes is not None:
+        names = set(attributes)
+        if filter_expression:
+            names.update(QgsExpression(filter_expression).referencedColumns())
+        request.setSubsetOfAttributes(sorted(names), source.fields())
+    return request
+
+
+def is_filtered(request):
+    """
+    Returns True if `request` does not select every feature.
+    """
+    return request.filterType() != QgsFeatureRequest.FilterNone or not request.filterRect().isNull()
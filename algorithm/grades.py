@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (QgsFeature,
+                       QgsFeatureSink,
+                       QgsField,
+                       QgsGeometry,
+                       QgsLineString,
+                       QgsProcessingParameterFileDestination,
+                       QgsProcessingParameterString)
+
+GRADE_THRESHOLDS = 'GRADE_THRESHOLDS'
+PROFILE_OUTPUT = 'PROFILE_OUTPUT'
+
+
+def add_grade_parameters(alg):
+    """
+    Adds the grade thresholds and the optional profile archive parameters to
+    `alg`.
+    """
+    alg.addParameter(
+        QgsProcessingParameterString(
+            GRADE_THRESHOLDS,
+            alg.tr('Grade thresholds in percent, separated by commas'),
+            defaultValue='8, 10',
+            optional=True
+        )
+    )
+    alg.addParameter(
+        QgsProcessingParameterFileDestination(
+            PROFILE_OUTPUT,
+            alg.tr('Elevation profiles'),
+            alg.tr('NumPy archive (*.npz)'),
+            optional=True,
+            createByDefault=False
+        )
+    )
+
+
+def grade_thresholds(alg, parameters, context):
+    """
+    Returns the grade thresholds given in the parameters of `alg`, in
+    increasing order.
+    """
+    value = alg.parameterAsString(parameters, GRADE_THRESHOLDS, context)
+    try:
+        return sorted({float(item) for item in value.split(',') if item.strip()})
+    except ValueError:
+        raise Exception(f'Invalid grade thresholds `{value}`.')
+
+
+def grade_fields(thresholds):
+    """
+    Returns the fields holding the statistics of `grade_statistics`.
+    """
+    names = ['distance_3d_km', 'rise_m', 'fall_m', 'max_grade_pct'] + [
+        f'above_{threshold:g}_pct_km'.replace('.', '_') for threshold in thresholds
+    ]
+    return [QgsField(name, QVariant.Double, '', 0, 3) for name in names]
+
+
+def grade_statistics(paths, thresholds):
+    """
+    Returns the statistics of the draped `paths`, (n, 3) arrays of their
+    vertices, as an array with one row per path: 3D length in km, total rise
+    and fall, maximum grade in percent, then the 3D length in km steeper than
+    each of `thresholds`. Every path is handled in the same pass over their
+    concatenated segments.
+    """
+    import numpy as np
+    count = len(paths)
+    stats = np.zeros((count, 4 + len(thresholds)))
+    if not count:
+        return stats
+    sizes = np.array([len(path) for path in paths])
+    vertices = np.concatenate(paths)
+    delta = np.diff(vertices, axis=0)
+    # The segments joining the last vertex of a path to the first vertex of
+    # the next one are dropped.
+    keep = np.ones(len(delta), dtype=bool)
+    ends = np.cumsum(sizes)[:-1] - 1
+    keep[ends[(ends >= 0) & (ends < len(delta))]] = False
+    segment_path = np.repeat(np.arange(count), sizes)[:-1][keep]
+    delta = delta[keep]
+
+    run = np.hypot(delta[:, 0], delta[:, 1])
+    rise = delta[:, 2]
+    length = np.hypot(run, rise)
+    grade = np.divide(np.abs(rise), run, out=np.zeros_like(run), where=run > 0) * 100
+    max_grade = np.zeros(count)
+    np.maximum.at(max_grade, segment_path, grade)
+
+    stats[:, 0] = np.bincount(segment_path, length, count) / 1000
+    stats[:, 1] = np.bincount(segment_path, np.maximum(rise, 0), count)
+    stats[:, 2] = np.bincount(segment_path, np.maximum(-rise, 0), count)
+    stats[:, 3] = max_grade
+    for i, threshold in enumerate(thresholds):
+        stats[:, 4 + i] = np.bincount(segment_path, length * (grade > threshold), count) / 1000
+    return stats
+
+
+class ProfileArchive(object):
+    """
+    Collects the elevation profile of each path, its horizontal chainage and
+    elevation at every vertex, and saves them as flat arrays in a NumPy
+    archive. The profile of the i-th path is between `offsets[i]` and
+    `offsets[i + 1]`.
+    """
+
+    def __init__(self):
+        self.chainage = []
+        self.elevation = []
+        self.sizes = [0]
+
+    def add(self, paths):
+        import numpy as np
+        for path in paths:
+            run = np.hypot(*np.diff(path[:, :2], axis=0).T)
+            self.chainage.append(np.concatenate([[0.0], np.cumsum(run)]).astype(np.float32))
+            self.elevation.append(path[:, 2].astype(np.float32))
+            self.sizes.append(len(path))
+
+    def save(self, path):
+        import numpy as np
+        np.savez_compressed(
+            path,
+            offsets=np.cumsum(self.sizes, dtype=np.int64),
+            chainage=np.concatenate(self.chainage) if self.chainage else np.empty(0, np.float32),
+            z=np.concatenate(self.elevation) if self.elevation else np.empty(0, np.float32)
+        )
+
+
+def line_vertices(geometry):
+    """
+    Returns the vertices of a line as an (n, 2) array.
+    """
+    import numpy as np
+    return np.array(
+        [(vertex.x(), vertex.y()) for vertex in geometry.vertices()],
+        dtype=float
+    ).reshape(-1, 2)
+
+
+def drape_paths(features, sink, fields, dem, thresholds, feedback, archive=None, total=0,
+                transform=None, batch_size=1000):
+    """
+    Drapes the lines `features` on `dem`, a `TiledDem`, and adds them to
+    `sink` with their grade statistics, `fields` being the fields of the
+    sink. `transform` converts the lines to the CRS of the DEM if needed.
+    The vertices of `batch_size` features are sampled and their statistics
+    computed at once. Profiles are added to `archive` if given.
+    """
+    import numpy as np
+    batch = []
+
+    def flush():
+        lines = [line_vertices(feature.geometry()) for feature in batch]
+        samples = lines
+        if transform is not None:
+            samples = []
+            for feature in batch:
+                geometry = QgsGeometry(feature.geometry())
+                geometry.transform(transform)
+                samples.append(line_vertices(geometry))
+        sizes = np.cumsum([len(line) for line in lines])[:-1]
+        elevations = np.split(dem.sample(np.concatenate(samples)), sizes)
+        paths = [np.column_stack([line, z]) for line, z in zip(lines, elevations)]
+        stats = grade_statistics(paths, thresholds)
+        # Statistics of paths leaving the DEM are written as NULL, and the
+        # vertices outside of it at zero elevation.
+        rows = np.where(np.isnan(stats), None, stats).tolist()
+        output = []
+        for feature, path, row in zip(batch, paths, rows):
+            draped = QgsFeature(fields)
+            draped.setGeometry(QgsGeometry(QgsLineString(
+                path[:, 0].tolist(), path[:, 1].tolist(), np.nan_to_num(path[:, 2]).tolist()
+            )))
+            draped.setAttributes(feature.attributes() + row)
+            output.append(draped)
+        sink.addFeatures(output, QgsFeatureSink.FastInsert)
+        if archive is not None:
+            archive.add(paths)
+
+    for current, feature in enumerate(features):
+        if feedback.isCanceled():
+            return
+        if not feature.hasGeometry():
+            continue
+        batch.append(feature)
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+            feedback.setProgress(int(current * total))
+    if batch:
+        flush()
@@ -16,28 +16,366 @@ __date__ = '2022-04-07'
 __copyright__ = '(C) 2022 by Basil Eric Rabi'
 __revision__ = '$Format:%H$'
 
+import os
+import pickle
+import platform
+import re
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
 
-try:
-    import ezdxf # pyright: reportMissingImports=false
-except ImportError:
-    import os
-    import platform
-    import sys
-    from pathlib import Path
-    this_dir = os.path.dirname(os.path.realpath(__file__))
-    plugin_dir = Path(this_dir).parent
-    path = os.path.join(plugin_dir, 'lib', 'pyparsing-3.0.7-py3-none-any.whl')
-    sys.path.append(path)
-    path = os.path.join(plugin_dir, 'lib', 'typing_extensions-4.1.1-py3-none-any.whl')
-    sys.path.append(path)
-    if platform.system() == 'Windows':
-        if platform.machine() == 'AMD64':
-            path = os.path.join(plugin_dir, 'lib', 'ezdxf-0.17.2-cp310-cp310-win_amd64.whl')
-            sys.path.append(path)
-            import ezdxf
+_ezdxf = None
+
+
+def _add_path(path):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def load_ezdxf():
+    """
+    Imports ezdxf on first use and returns the module. If ezdxf is not
+    installed, the wheels bundled in `lib` are used instead.
+    """
+    global _ezdxf
+    if _ezdxf is not None:
+        return _ezdxf
+    try:
+        import ezdxf # pyright: reportMissingImports=false
+    except ImportError:
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        plugin_dir = Path(this_dir).parent
+        _add_path(os.path.join(plugin_dir, 'lib', 'pyparsing-3.0.7-py3-none-any.whl'))
+        _add_path(os.path.join(plugin_dir, 'lib', 'typing_extensions-4.1.1-py3-none-any.whl'))
+        if platform.system() == 'Windows':
+            if platform.machine() == 'AMD64':
+                _add_path(os.path.join(plugin_dir, 'lib', 'ezdxf-0.17.2-cp310-cp310-win_amd64.whl'))
+                import ezdxf
+            else:
+                raise Exception('System not yet supported. Contact plugin author.')
         else:
-            raise Exception('System not yet supported. Contact plugin author.')
+            raise Exception('Module not found. Install ezdxf: `pip install ezdxf`.')
+    _ezdxf = ezdxf
+    return _ezdxf
+
+
+def new_dxf(*args, **kwargs):
+    """
+    Same as `ezdxf.new`. ezdxf is only imported once a DXF is created so that
+    loading the plugin does not pay for it.
+    """
+    return load_ezdxf().new(*args, **kwargs)
+
+
+def file_name(value):
+    """
+    Returns `value` as a string usable as a file name.
+    """
+    return re.sub(r'[^\w.-]+', '_', f'{value}').strip('_') or '_'
+
+
+class UniqueNames(object):
+    """
+    File names of values, made by `file_name`. Values mapping to a name
+    already given to another value, ignoring the case as some file systems
+    do, get a `_2`, `_3`, ... suffix in the order they are first seen.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.used = set()
+
+    def name(self, value):
+        name = self.names.get(value)
+        if name is None:
+            name = base = file_name(value)
+            suffix = 1
+            while name.lower() in self.used:
+                suffix += 1
+                name = f'{base}_{suffix}'
+            self.used.add(name.lower())
+            self.names[value] = name
+        return name
+
+
+def polygon_rings(geometry):
+    """
+    Returns the rings of a (multi)polygon geometry as lists of (x, y).
+    """
+    if geometry.isMultipart():
+        multi_polygon = geometry.asMultiPolygon()
     else:
-        raise Exception('Module not found. Install ezdxf: `pip install ezdxf`.')
+        multi_polygon = [geometry.asPolygon()]
+    return [
+        [(point.x(), point.y()) for point in ring]
+        for polygon in multi_polygon for ring in polygon
+    ]
+
+
+def polyline_parts(geometry):
+    """
+    Returns the parts of a (multi)line geometry as lists of (x, y).
+    """
+    if geometry.isMultipart():
+        multi_polyline = geometry.asMultiPolyline()
+    else:
+        multi_polyline = [geometry.asPolyline()]
+    return [[(point.x(), point.y()) for point in polyline] for polyline in multi_polyline]
+
+
+def point_parts(geometry):
+    """
+    Returns the points of a (multi)point geometry as (x, y).
+    """
+    if geometry.isMultipart():
+        multi_point = geometry.asMultiPoint()
+    else:
+        multi_point = [geometry.asPoint()]
+    return [(point.x(), point.y()) for point in multi_point]
+
+
+def round_parts(parts, decimals):
+    """
+    Returns `parts`, lists of (x, y), with the coordinates rounded to
+    `decimals` decimals. Rounded floats are written with their shortest
+    representation, so successive exports of the same data are identical.
+    """
+    return [[(round(x, decimals), round(y, decimals)) for x, y in part] for part in parts]
+
+
+# Attributes of TEXT entities centred on their position, as set by
+# `set_pos(point, align='MIDDLE')`
+LABEL_ALIGNMENT = {'halign': 4, 'valign': 0}
+
+
+class DxfTemplates(object):
+    """
+    Layers, entity attributes and xdata of a DXF document, built once for
+    each distinct layer and attribute combination and then shared by all
+    entities using them. ezdxf copies `dxfattribs` when creating an entity
+    so sharing a template is safe.
+    """
+
+    def __init__(self, doc, appid=None, **dxfattribs):
+        self.appid = appid
+        self.doc = doc
+        self.dxfattribs = dxfattribs
+        self.msp = doc.modelspace()
+        self._layers = set()
+        self._templates = {}
+        self._xdata = {}
+        if appid:
+            doc.appids.new(appid)
+
+    def get(self, layer, text, **dxfattribs):
+        """
+        Returns the `(dxfattribs, xdata)` template of an entity in `layer`
+        with `text` as its xdata string. Attributes set to None are left out.
+        """
+        key = (layer, text) + tuple(dxfattribs.items())
+        template = self._templates.get(key)
+        if template is None:
+            if layer not in self._layers:
+                self.doc.layers.new(name=layer)
+                self._layers.add(layer)
+            attribs = dict(self.dxfattribs, layer=layer)
+            for name, value in dxfattribs.items():
+                if value is not None:
+                    attribs[name] = value
+            xdata = None
+            if self.appid:
+                xdata = self._xdata.get(text)
+                if xdata is None:
+                    xdata = [(1001, self.appid), (1000, text)]
+                    self._xdata[text] = xdata
+            template = (attribs, xdata)
+            self._templates[key] = template
+        return template
+
+    def add_lwpolyline(self, points, template):
+        attribs, xdata = template
+        entity = self.msp.add_lwpolyline(points, dxfattribs=attribs)
+        if xdata:
+            entity.set_xdata(self.appid, xdata)
+        return entity
+
+    def add_text(self, text, point, template):
+        """
+        Adds a TEXT at `point`. The alignment, if any, is expected in the
+        template so that only the position is set for each entity.
+        """
+        attribs, xdata = template
+        entity = self.msp.add_text(text, dxfattribs=dict(attribs, insert=point, align_point=point))
+        if xdata:
+            entity.set_xdata(self.appid, xdata)
+        return entity
+
+    def add_point(self, point, template):
+        attribs, xdata = template
+        entity = self.msp.add_point(point, dxfattribs=attribs)
+        if xdata:
+            entity.set_xdata(self.appid, xdata)
+        return entity
+
+
+class R12Document(object):
+    """
+    Stand-in for an ezdxf document holding only points and labels, for
+    `DxfTemplates`. Entities are kept as tuples and written by the R12
+    stream writer of ezdxf, which skips the entity objects, handles and
+    tables of a full document.
+    """
+
+    def __init__(self):
+        self.entities = []
+        self.appids = self.layers = self
+
+    def new(self, name):
+        pass
+
+    def modelspace(self):
+        return self
+
+    def add_point(self, location, dxfattribs):
+        self.entities.append((None, location, dxfattribs['layer'], dxfattribs.get('elevation')))
+
+    def add_text(self, text, dxfattribs):
+        self.entities.append((text, dxfattribs['insert'], dxfattribs['layer'], dxfattribs.get('elevation')))
+
+    def saveas(self, path):
+        load_ezdxf()
+        from ezdxf.addons import r12writer # pyright: reportMissingImports=false
+        with r12writer(path) as dxf:
+            for text, location, layer, elevation in self.entities:
+                if elevation is not None:
+                    location = (location[0], location[1], float(elevation))
+                if text is None:
+                    dxf.add_point(location, layer=layer)
+                else:
+                    # 2.5 is the default height of ezdxf TEXT entities. The
+                    # stream writer has no MIDDLE alignment, MIDDLE_CENTER is
+                    # the closest.
+                    dxf.add_text(text, location, height=2.5, align='MIDDLE_CENTER', layer=layer)
+
+
+class DxfOutput(object):
+    """
+    Export into a single DXF document. `templates` returns the same
+    `DxfTemplates` for all features.
+    """
+
+    def __init__(self, path, new_document, appid=None, **dxfattribs):
+        self.path = path
+        self._templates = DxfTemplates(new_document(), appid, **dxfattribs)
+
+    def templates(self, attributes):
+        return self._templates
+
+    def save(self):
+        self._templates.doc.saveas(self.path)
+        return [self.path]
+
+
+class SpilledTemplates(object):
+    """
+    Stand-in for `DxfTemplates` which appends the entities of a partition to
+    a spill file instead of a document.
+    """
+
+    def __init__(self, output, path):
+        self.output = output
+        self.path = path
+
+    def get(self, layer, text, **dxfattribs):
+        return (layer, text, dxfattribs)
+
+    def add_lwpolyline(self, points, template):
+        self.output.spill(self.path, ('add_lwpolyline', template, (points,)))
+
+    def add_text(self, text, point, template):
+        self.output.spill(self.path, ('add_text', template, (text, point)))
+
+    def add_point(self, point, template):
+        self.output.spill(self.path, ('add_point', template, (point,)))
+
+
+class PartitionedDxfOutput(object):
+    """
+    Export into one DXF document per value of the attribute at `split_index`,
+    named after `path` and the value. At most `max_open` documents are kept in memory and at
+    most `max_open` spill files are open at once. Entities of the partitions
+    beyond the first `max_open` are spilled to temporary files and merged
+    into their documents, one document at a time, by `save`.
+    """
+
+    def __init__(self, path, new_document, split_index, appid=None, max_open=64, **dxfattribs):
+        self.appid = appid
+        self.base, self.extension = os.path.splitext(path)
+        self.dxfattribs = dxfattribs
+        self.max_open = max_open
+        self.new_document = new_document
+        self.split_index = split_index
+        self._directory = None
+        self._documents = {}
+        self._handles = OrderedDict()
+        self._names = UniqueNames()
+        self._spilled = {}
+
+    def path(self, partition):
+        return f'{self.base}_{self._names.name(partition)}{self.extension}'
+
+    def templates(self, attributes):
+        partition = attributes[self.split_index]
+        templates = self._documents.get(partition) or self._spilled.get(partition)
+        if templates is None:
+            if len(self._documents) < self.max_open:
+                templates = DxfTemplates(self.new_document(), self.appid, **self.dxfattribs)
+                self._documents[partition] = templates
+            else:
+                if self._directory is None:
+                    self._directory = tempfile.mkdtemp(prefix='tmc_dxf_')
+                templates = SpilledTemplates(
+                    self,
+                    os.path.join(self._directory, f'{len(self._spilled)}.pickle')
+                )
+                self._spilled[partition] = templates
+        return templates
+
+    def spill(self, path, record):
+        handle = self._handles.pop(path, None)
+        if handle is None:
+            if len(self._handles) >= self.max_open:
+                _, oldest = self._handles.popitem(last=False)
+                oldest.close()
+            handle = open(path, 'ab')
+        self._handles[path] = handle
+        pickle.dump(record, handle, pickle.HIGHEST_PROTOCOL)
 
-new_dxf = ezdxf.new
+    def save(self):
+        """
+        Writes the documents of all partitions. Returns the written paths.
+        """
+        paths = []
+        for partition, templates in self._documents.items():
+            paths.append(self.path(partition))
+            templates.doc.saveas(paths[-1])
+        self._documents = {}
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+        for partition, spilled in self._spilled.items():
+            templates = DxfTemplates(self.new_document(), self.appid, **self.dxfattribs)
+            with open(spilled.path, 'rb') as fstream:
+                while True:
+                    try:
+                        method, (layer, text, attribs), args = pickle.load(fstream)
+                    except EOFError:
+                        break
+                    getattr(templates, method)(*args, templates.get(layer, text, **attribs))
+            paths.append(self.path(partition))
+            templates.doc.saveas(paths[-1])
+        if self._directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+        return paths
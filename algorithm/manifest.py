@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import hashlib
+import json
+import os
+from qgis.core import (QgsProcessingParameterBoolean,
+                       QgsProcessingParameterDefinition)
+from .filters import feature_request
+from .profiling import PROFILE, PROFILE_FILE
+
+SKIP_UNCHANGED = 'SKIP_UNCHANGED'
+
+# Version of the manifest files, changed whenever the exports change for the
+# same input and parameters
+MANIFEST_VERSION = 1
+
+
+def add_manifest_parameter(alg):
+    """
+    Adds the advanced parameter skipping unchanged exports to `alg`.
+    """
+    par_skip = QgsProcessingParameterBoolean(
+        SKIP_UNCHANGED,
+        alg.tr('Skip the export if the input and parameters are unchanged'),
+        defaultValue=False
+    )
+    par_skip.setFlags(par_skip.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    alg.addParameter(par_skip)
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fstream:
+        for chunk in iter(lambda: fstream.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_hash(source, request):
+    """
+    Returns the hash of the fields, CRS and features of `source` selected by
+    `request`, computed in one pass over the features.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{source.fields().names()}|{source.sourceCrs().authid()}'.encode())
+    for feature in source.getFeatures(request):
+        digest.update(bytes(feature.geometry().asWkb()) if feature.hasGeometry() else b'')
+        digest.update(repr(feature.attributes()).encode())
+    return digest.hexdigest()
+
+
+def parameters_hash(alg, parameters, context, ignored):
+    """
+    Returns the hash of the parameters of `alg` but `ignored`. Input files,
+    such as style schemas, are hashed with their content.
+    """
+    values = {}
+    for definition in alg.parameterDefinitions():
+        name = definition.name()
+        if name in ignored:
+            continue
+        values[name] = definition.valueAsPythonString(parameters.get(name), context)
+        if definition.type() == 'file':
+            path = alg.parameterAsFile(parameters, name, context)
+            if path and os.path.isfile(path):
+                values[name] += f'|{file_checksum(path)}'
+    return hashlib.blake2b(json.dumps(values, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+class ExportManifest(object):
+    """
+    Sidecar file of an export, `<path>.manifest.json`, recording the hashes
+    of its input and parameters and the checksums of the files written. An
+    export is unchanged if the hashes are the same and the files are still
+    those written.
+    """
+
+    def __init__(self, path, key):
+        self.path = f'{path}.manifest.json'
+        self.key = key
+
+    def unchanged(self):
+        """
+        Returns the files of the previous export if it is unchanged, None
+        otherwise.
+        """
+        try:
+            with open(self.path) as fstream:
+                manifest = json.load(fstream)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('key') != self.key:
+            return None
+        outputs = manifest.get('outputs', {})
+        for path, checksum in outputs.items():
+            if not os.path.exists(path) or file_checksum(path) != checksum:
+                return None
+        return list(outputs) or None
+
+    def save(self, paths):
+        manifest = {
+            'key': self.key,
+            'outputs': {path: file_checksum(path) for path in paths if os.path.exists(path)}
+        }
+        with open(self.path, 'w') as fstream:
+            json.dump(manifest, fstream, indent=2)
+
+
+def export_manifest(alg, parameters, context, source, path, input_name='INPUT'):
+    """
+    Returns the manifest of the export of `source` to `path` by `alg`, or
+    None if unchanged exports are not skipped. The input is hashed with the
+    filters of `alg` applied, and the parameters with the input and the
+    profiling ones left out.
+    """
+    if not alg.parameterAsBool(parameters, SKIP_UNCHANGED, context):
+        return None
+    key = {
+        'version': MANIFEST_VERSION,
+        'algorithm': alg.name(),
+        'input': source_hash(source, feature_request(alg, parameters, context, source)),
+        'parameters': parameters_hash(
+            alg, parameters, context, {input_name, PROFILE, PROFILE_FILE, SKIP_UNCHANGED}
+        )
+    }
+    return ExportManifest(path, key)
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from contextlib import ExitStack
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import (QgsFeatureSink,
+                       QgsProcessing,
+                       QgsProcessingAlgorithm,
+                       QgsProcessingParameterEnum,
+                       QgsProcessingParameterFeatureSink,
+                       QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterField,
+                       QgsProcessingParameterFile,
+                       QgsProcessingParameterFileDestination)
+from .cluster_style import DEFAULT_SCHEMA, ClusterStyle, load_schema
+from .columnar import (COLUMNAR_FILE,
+                       ColumnarWriter,
+                       add_columnar_parameter,
+                       field_columns,
+                       multipolygon_wkb,
+                       polygon_counts)
+from .filters import add_filter_parameters, feature_request
+from .lib import DxfTemplates, new_dxf, polygon_rings, round_parts
+from .precision import add_precision_parameter, coordinate_precision
+from .profiling import PROFILE_FILE, add_profile_parameters, profiler
+from .simplify import add_simplify_parameters, simplifier
+from .writers import SurpacStringWriter, open_output, save_dxf
+
+
+class MultiExportAlgorithm(QgsProcessingAlgorithm):
+
+    COMPRESSION = 'COMPRESSION'
+    DXF_FILE = 'DXF_FILE'
+    DXF_LAYERS = 'DXF_LAYERS'
+    ELEVATION_FIELD = 'ELEVATION_FIELD'
+    INPUT = 'INPUT'
+    LAYER_FIELD = 'LAYER_FIELD'
+    OUTPUT = 'OUTPUT'
+    STR_FIELDS = 'STR_FIELDS'
+    STR_FILE = 'STR_FILE'
+    STYLE = 'STYLE'
+
+    def initAlgorithm(self, config):
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.INPUT,
+                self.tr('Input layer'),
+                [QgsProcessing.TypeVectorPolygon]
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.DXF_LAYERS,
+                self.tr('DXF layers and colors'),
+                options=[
+                    self.tr('From layer and elevation columns (polygon)'),
+                    self.tr('From ore class style schema (cluster)')
+                ],
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.LAYER_FIELD,
+                self.tr('Column to be used as layer name in DXF'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.ELEVATION_FIELD,
+                self.tr('Column to be used as elevation'),
+                parentLayerParameterName=self.INPUT,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFile(
+                self.STYLE,
+                self.tr('Cluster style schema'),
+                optional=True,
+                fileFilter=self.tr('Style schema (*.json *.toml)')
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.STR_FIELDS,
+                self.tr('Fields to be copied as string attributes'),
+                parentLayerParameterName=self.INPUT,
+                allowMultiple=True,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.COMPRESSION,
+                self.tr('Compression of DXF and Surpac string files'),
+                options=[
+                    self.tr('None'),
+                    self.tr('GZip (.gz)'),
+                    self.tr('ZIP archive (.zip)')
+                ],
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.DXF_FILE,
+                self.tr('DXF file'),
+                'dxf',
+                optional=True,
+                createByDefault=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.STR_FILE,
+                self.tr('Surpac string file'),
+                'str',
+                optional=True,
+                createByDefault=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT,
+                self.tr('Output layer'),
+                optional=True,
+                createByDefault=False
+            )
+        )
+        add_columnar_parameter(self)
+        add_filter_parameters(self)
+        add_simplify_parameters(self)
+        add_precision_parameter(self)
+        add_profile_parameters(self)
+
+    def processAlgorithm(self, parameters, context, feedback):
+        columnar_file = self.parameterAsFileOutput(parameters, COLUMNAR_FILE, context)
+        compression = self.parameterAsEnum(parameters, self.COMPRESSION, context)
+        dxf_file = self.parameterAsFileOutput(parameters, self.DXF_FILE, context)
+        dxf_layers = self.parameterAsEnum(parameters, self.DXF_LAYERS, context)
+        elevation = self.parameterAsFields(parameters, self.ELEVATION_FIELD, context) or None
+        field = self.parameterAsFields(parameters, self.LAYER_FIELD, context) or None
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        precision = coordinate_precision(self, parameters, context)
+        profile = profiler(self, parameters, context, feedback)
+        str_fields = self.parameterAsFields(parameters, self.STR_FIELDS, context)
+        str_file = self.parameterAsFileOutput(parameters, self.STR_FILE, context)
+        style_file = self.parameterAsFile(parameters, self.STYLE, context)
+        (sink, dest_id) = self.parameterAsSink(
+            parameters,
+            self.OUTPUT,
+            context,
+            source.fields(),
+            source.wkbType(),
+            source.sourceCrs()
+        )
+
+        if dxf_file and dxf_file[-4:] != '.dxf':
+            dxf_file += '.dxf'
+        if str_file and str_file[-4:] != '.str':
+            str_file += '.str'
+        if not (dxf_file or str_file or sink or columnar_file):
+            raise Exception('No output given.')
+
+        fields = source.fields()
+        doc = None
+        style = None
+        if dxf_file:
+            if dxf_layers == 1:
+                style = ClusterStyle(
+                    load_schema(style_file) if style_file else DEFAULT_SCHEMA,
+                    fields
+                )
+                doc = style.new_document()
+                templates = DxfTemplates(doc, 'TrimbleName')
+            else:
+                if not field:
+                    raise Exception('No column given for the DXF layer name.')
+                field_index = fields.indexFromName(field[0])
+                elevation_index = None
+                if elevation:
+                    elevation_index = fields.indexFromName(elevation[0])
+                doc = new_dxf('R2013')
+                templates = DxfTemplates(doc, 'TMCAlgorithms', linetype='CONTINUOUS')
+        str_indices = [fields.indexFromName(name) for name in str_fields]
+        # The sink and the columnar file copy whole features and cluster styles
+        # may use any column.
+        columns = None
+        if not (sink or style or columnar_file):
+            columns = (field or []) + (elevation or []) + str_fields
+
+        profile.begin('topology')
+        simplify = simplifier(
+            self, parameters, context, source, polygon_rings,
+            feature_request(self, parameters, context, source, [])
+        )
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        features = source.getFeatures(
+            feature_request(self, parameters, context, source, columns)
+        )
+        results = {}
+
+        with ExitStack() as stack:
+            writer = None
+            if str_file:
+                fstream, results[self.STR_FILE] = stack.enter_context(
+                    open_output(str_file, compression)
+                )
+                writer = SurpacStringWriter(fstream, precision)
+            columnar = None
+            if columnar_file:
+                columnar = ColumnarWriter(
+                    columnar_file, field_columns(fields), 'MultiPolygon', source.sourceCrs().toWkt()
+                )
+
+            profile.begin('read')
+            for current, feature in enumerate(features):
+                if feedback.isCanceled():
+                    break
+
+                if sink:
+                    profile.begin('sink')
+                    sink.addFeature(feature, QgsFeatureSink.FastInsert)
+                    profile.begin('read')
+                if feature.hasGeometry():
+                    attributes = feature.attributes()
+                    rings = simplify.simplify(polygon_rings(feature.geometry()))
+                    if precision is not None:
+                        rings = round_parts(rings, precision)
+                    profile.count(1, rings)
+                    profile.begin('encode')
+                    if doc:
+                        if style:
+                            template = style.template(templates, attributes)
+                        else:
+                            layer = f'{attributes[field_index]}'
+                            template = templates.get(
+                                layer,
+                                layer,
+                                elevation=None if elevation_index is None else attributes[elevation_index]
+                            )
+                        for ring in rings:
+                            templates.add_lwpolyline(ring, template)
+                    if writer:
+                        writer.write(rings, [attributes[i] for i in str_indices])
+                    if columnar:
+                        columnar.add(attributes, multipolygon_wkb(rings, polygon_counts(feature.geometry())))
+                    profile.begin('read')
+                feedback.setProgress(int(current * total))
+
+            simplify.report(feedback)
+            profile.begin('save')
+            if writer:
+                writer.close()
+            if columnar:
+                results[COLUMNAR_FILE] = columnar.close()
+
+        if style and style.unknown_classes:
+            feedback.reportError(self.tr(
+                f'Unknown ore classes {sorted(map(str, style.unknown_classes))} were exported with the default style.'
+            ))
+        if doc:
+            results[self.DXF_FILE] = save_dxf(doc, dxf_file, compression)
+        if sink:
+            results[self.OUTPUT] = dest_id
+        profile.finish()
+        results[PROFILE_FILE] = profile.trace_file
+        return results
+
+    def name(self):
+        return 'Export polygon to multiple formats'
+
+    def displayName(self):
+        return self.tr(self.name())
+
+    def group(self):
+        return self.tr(self.groupId())
+
+    def groupId(self):
+        return 'Data Management'
+
+    def tr(self, string):
+        return QCoreApplication.translate('Processing', string)
+
+    def createInstance(self):
+        return MultiExportAlgorithm()
+
+    def shortHelpString(self):
+        return self.tr(
+            'Export a (Multi)Polygon layer to DXF, Surpac string, Arrow IPC or GeoParquet and a vector layer (e.g. GeoPackage) while reading the input only once. DXF layers are taken either from the layer and elevation columns, as in "Export polygon to DXF", or from the ore class style schema, as in "Export cluster to DXF". The DXF and Surpac string files may be written directly into GZip or ZIP files.'
+        )
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from qgis.core import (QgsProcessingOutputMultipleLayers,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterField,
+                       QgsProcessingParameterNumber)
+from .lib import DxfOutput, PartitionedDxfOutput
+
+MAX_OPEN_FILES = 'MAX_OPEN_FILES'
+OUTPUTS = 'OUTPUTS'
+SPLIT_FIELD = 'SPLIT_FIELD'
+
+
+def add_split_parameters(algorithm, parent='INPUT'):
+    """
+    Adds the parameters splitting a DXF export into one file per value of a
+    column of the `parent` layer, and the output listing the files written.
+    """
+    par_split_field = QgsProcessingParameterField(
+        SPLIT_FIELD,
+        algorithm.tr('Split output by column (one DXF per value)'),
+        parentLayerParameterName=parent,
+        optional=True
+    )
+    par_max_open_files = QgsProcessingParameterNumber(
+        MAX_OPEN_FILES,
+        algorithm.tr('Maximum number of DXF files kept open when splitting'),
+        type=QgsProcessingParameterNumber.Integer,
+        defaultValue=64,
+        minValue=1
+    )
+    par_split_field.setFlags(par_split_field.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    par_max_open_files.setFlags(par_max_open_files.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    algorithm.addParameter(par_split_field)
+    algorithm.addParameter(par_max_open_files)
+    algorithm.addOutput(QgsProcessingOutputMultipleLayers(OUTPUTS, algorithm.tr('DXF files written')))
+
+
+def dxf_output(algorithm, parameters, context, fields, path, new_document, appid=None, **dxfattribs):
+    """
+    Returns the DXF output of an export, split by the column given in the
+    parameters of `algorithm` if any.
+    """
+    split = algorithm.parameterAsFields(parameters, SPLIT_FIELD, context)
+    if not split:
+        return DxfOutput(path, new_document, appid, **dxfattribs)
+    split_index = fields.indexFromName(split[0])
+    if split_index == -1:
+        raise Exception(f'Layer has no `{split[0]}` field.')
+    max_open = algorithm.parameterAsInt(parameters, MAX_OPEN_FILES, context)
+    return PartitionedDxfOutput(path, new_document, split_index, appid, max_open, **dxfattribs)
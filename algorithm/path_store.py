@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (QgsFeature,
+                       QgsFeatureSink,
+                       QgsField,
+                       QgsFields,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsProcessingUtils,
+                       QgsVectorFileWriter)
+
+
+def path_fields():
+    """
+    Returns the fields of the paths found by the routing engine, the same as
+    the output of `native:shortestpathpointtolayer` with the ids of the
+    source and destination.
+    """
+    fields = QgsFields()
+    fields.append(QgsField('DESTINATION_ID', QVariant.Int))
+    fields.append(QgsField('start', QVariant.String))
+    fields.append(QgsField('end', QVariant.String))
+    fields.append(QgsField('cost', QVariant.Double))
+    fields.append(QgsField('SOURCE_ID', QVariant.Int))
+    return fields
+
+
+class PathStore(object):
+    """
+    Collects routed paths into a temporary GeoPackage instead of keeping one
+    layer per source in memory. Features are appended in batches of
+    `batch_size` and the file is read back by the following steps once the
+    store is closed.
+    """
+
+    def __init__(self, crs, transform_context, batch_size=1000):
+        self.batch_size = batch_size
+        self.buffer = []
+        self.count = 0
+        self.crs = crs
+        self.fields = None
+        self.path = QgsProcessingUtils.generateTempFilename('paths.gpkg')
+        self.transform_context = transform_context
+        self.writer = None
+
+    def open(self, fields, wkb_type):
+        self.fields = fields
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = 'GPKG'
+        options.layerName = 'paths'
+        self.writer = QgsVectorFileWriter.create(
+            self.path,
+            fields,
+            wkb_type,
+            self.crs,
+            self.transform_context,
+            options
+        )
+        if self.writer.hasError() != QgsVectorFileWriter.NoError:
+            raise Exception(f'Cannot create `{self.path}`: {self.writer.errorMessage()}')
+
+    def add(self, points, attributes):
+        """
+        Appends the path following `points`, a list of (x, y). The store must
+        have been opened.
+        """
+        path = QgsFeature(self.fields)
+        path.setGeometry(QgsGeometry.fromPolylineXY([QgsPointXY(x, y) for x, y in points]))
+        path.setAttributes(attributes)
+        self.append(path)
+
+    def append(self, feature):
+        self.buffer.append(feature)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.addFeatures(self.buffer, QgsFeatureSink.FastInsert)
+            self.count += len(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        """
+        Writes the remaining features and returns the path of the GeoPackage,
+        or None if no path was added.
+        """
+        if self.writer is None:
+            return None
+        self.flush()
+        # Deleting the writer closes the GeoPackage.
+        self.writer = None
+        return f'{self.path}|layername=paths'
@@ -16,24 +16,35 @@ __date__ = '2022-04-07'
 __copyright__ = '(C) 2022 by Basil Eric Rabi'
 __revision__ = '$Format:%H$'
 
-from processing import run # pyright: reportMissingImports=false
 from qgis.PyQt.QtCore import QCoreApplication
 from qgis.core import (QgsProcessing,
                        QgsProcessingAlgorithm,
+                       QgsProcessingParameterBoolean,
+                       QgsProcessingParameterEnum,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
-                       QgsProcessingParameterFileDestination,
-                       QgsProcessingUtils)
-from .lib import new_dxf
+                       QgsProcessingParameterFileDestination)
+from .filters import add_filter_parameters, feature_request
+from .lib import LABEL_ALIGNMENT, R12Document, new_dxf, point_parts, round_parts
+from .manifest import add_manifest_parameter, export_manifest
+from .partition import OUTPUTS, SPLIT_FIELD, add_split_parameters, dxf_output
+from .precision import add_precision_parameter, coordinate_precision
+from .profiling import PROFILE_FILE, add_profile_parameters, profiler
 
 
 class PointDxfAlgorithm(QgsProcessingAlgorithm):
 
+    COMPACT = 'COMPACT'
     ELEVATION_FIELD = 'ELEVATION_FIELD'
     FILENAME = 'FILENAME'
     INPUT = 'INPUT'
     LABEL_FIELD = 'LABEL_FIELD'
     LAYER_FIELD = 'LAYER_FIELD'
+    POINT_STYLE = 'POINT_STYLE'
+
+    # Entities written for each point, in the order of the options
+    STYLE_TEXT = 0
+    STYLE_POINT = 1
 
     def initAlgorithm(self, config):
         self.addParameter(
@@ -72,59 +83,110 @@ class PointDxfAlgorithm(QgsProcessingAlgorithm):
                 'dxf'
             )
         )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.POINT_STYLE,
+                self.tr('Point entities'),
+                options=[
+                    self.tr('Text labels'),
+                    self.tr('Points without labels')
+                ],
+                defaultValue=self.STYLE_TEXT
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.COMPACT,
+                self.tr('Write compact DXF R12 files'),
+                defaultValue=False
+            )
+        )
+        add_filter_parameters(self)
+        add_precision_parameter(self)
+        add_split_parameters(self)
+        add_manifest_parameter(self)
+        add_profile_parameters(self)
 
     def processAlgorithm(self, parameters, context, feedback):
         dxf_file = self.parameterAsFile(parameters, self.FILENAME, context)
         if dxf_file[-4:] != '.dxf':
             dxf_file += '.dxf'
         elevation = self.parameterAsFields(parameters, self.ELEVATION_FIELD, context) or None
-        label = self.parameterAsFields(parameters, self.LAYER_FIELD, context)[0]
+        label = self.parameterAsFields(parameters, self.LABEL_FIELD, context)[0]
         field = self.parameterAsFields(parameters, self.LAYER_FIELD, context)[0]
-        layers = set()
-        source = self.parameterAsVectorLayer(parameters, self.INPUT, context)
-
-        elevation_field = None
+        compact = self.parameterAsBool(parameters, self.COMPACT, context)
+        style = self.parameterAsEnum(parameters, self.POINT_STYLE, context)
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        precision = coordinate_precision(self, parameters, context)
+        profile = profiler(self, parameters, context, feedback)
+        manifest = export_manifest(self, parameters, context, source, dxf_file)
+        unchanged = manifest.unchanged() if manifest is not None else None
+        if unchanged:
+            feedback.pushInfo(self.tr(f'Input and parameters unchanged since the last export to {dxf_file}, skipped.'))
+            profile.finish()
+            return {self.FILENAME: dxf_file, OUTPUTS: unchanged, PROFILE_FILE: profile.trace_file}
+
+        field_index = source.fields().indexFromName(field)
+        label_index = source.fields().indexFromName(label)
+        elevation_index = None
         if elevation:
-            elevation_field = elevation[0]
-
-        promoted_multi = run(
-            'native:promotetomulti',
-            {
-                'INPUT': source,
-                'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-            },
-            context=context,
-            is_child_algorithm=True
-        )['OUTPUT']
-        multi = QgsProcessingUtils.mapLayerFromString(promoted_multi, context)
-
-        total = 100.0 / multi.featureCount() if multi.featureCount() else 0
-        features = multi.getFeatures()
-        doc = new_dxf('R2013')
-        doc.appids.new('TMCAlgorithms')
+            elevation_index = source.fields().indexFromName(elevation[0])
+
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        columns = [field, label] + (elevation or []) + self.parameterAsFields(parameters, SPLIT_FIELD, context)
+        features = source.getFeatures(feature_request(self, parameters, context, source, columns))
+        output = dxf_output(
+            self, parameters, context, source.fields(), dxf_file,
+            R12Document if compact else lambda: new_dxf('R2013')
+        )
 
+        profile.begin('read')
         for current, feature in enumerate(features):
             if feedback.isCanceled():
                 break
-            msp = doc.modelspace()
+
             if feature.hasGeometry():
-                layer = f'{feature.attribute(field)}'
-                if not layer in layers:
-                    doc.layers.new(name=layer)
-                    layers.add(layer)
-                geom = feature.geometry().asMultiPoint()
-                for point in geom:
-                    attr = {'layer': layer}
-                    if elevation:
-                        attr['elevation'] = feature.attribute(elevation_field)
-                    msp.add_text(
-                        feature.attribute(label),
-                        dxfattribs = attr
-                    ).set_pos((point.x(), point.y()), align='MIDDLE')
+                points = point_parts(feature.geometry())
+                if precision is not None:
+                    points = round_parts([points], precision)[0]
+                profile.count(1, [points])
+                profile.begin('encode')
+                attributes = feature.attributes()
+                templates = output.templates(attributes)
+                layer = f'{attributes[field_index]}'
+                if style == self.STYLE_TEXT:
+                    template = templates.get(
+                        layer,
+                        layer,
+                        elevation=None if elevation_index is None else attributes[elevation_index],
+                        **LABEL_ALIGNMENT
+                    )
+                    text = f'{attributes[label_index]}'
+                    for point in points:
+                        templates.add_text(text, point, template)
+                else:
+                    # POINT entities have no elevation, it is given as the Z
+                    # of their location instead.
+                    template = templates.get(layer, layer)
+                    if elevation_index is not None:
+                        try:
+                            z = float(attributes[elevation_index])
+                            points = [(x, y, z) for x, y in points]
+                        except (TypeError, ValueError):
+                            pass
+                    for point in points:
+                        templates.add_point(point, template)
+                profile.begin('read')
             feedback.setProgress(int(current * total))
 
-        doc.saveas(dxf_file)
-        return {self.FILENAME: dxf_file}
+        profile.begin('save')
+        paths = output.save()
+        if manifest is not None and not feedback.isCanceled():
+            manifest.save(paths)
+        if paths != [dxf_file]:
+            feedback.pushInfo(self.tr(f'Wrote {len(paths)} DXF files.'))
+        profile.finish()
+        return {self.FILENAME: dxf_file, OUTPUTS: paths, PROFILE_FILE: profile.trace_file}
 
     def name(self):
         return 'Export point to DXF'
@@ -145,4 +207,6 @@ class PointDxfAlgorithm(QgsProcessingAlgorithm):
         return PointDxfAlgorithm()
 
     def shortHelpString(self):
-        return self.tr('Export a (Multi)Point layer to DXF.')
+        return self.tr(
+            'Export a (Multi)Point layer to DXF, as text labels or as points without labels. Compact files are written as DXF R12 by a stream writer, which is faster and gives smaller files for large layers.'
+        )
@@ -16,15 +16,19 @@ __date__ = '2022-04-06'
 __copyright__ = '(C) 2022 by Basil Eric Rabi'
 __revision__ = '$Format:%H$'
 
-from processing import run # pyright: reportMissingImports=false
 from qgis.PyQt.QtCore import QCoreApplication
 from qgis.core import (QgsProcessing,
                        QgsProcessingAlgorithm,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
-                       QgsProcessingParameterFileDestination,
-                       QgsProcessingUtils)
-from .lib import new_dxf
+                       QgsProcessingParameterFileDestination)
+from .filters import add_filter_parameters, feature_request
+from .lib import new_dxf, polygon_rings, round_parts
+from .manifest import add_manifest_parameter, export_manifest
+from .partition import OUTPUTS, SPLIT_FIELD, add_split_parameters, dxf_output
+from .precision import add_precision_parameter, coordinate_precision
+from .profiling import PROFILE_FILE, add_profile_parameters, profiler
+from .simplify import add_simplify_parameters, simplifier
 
 
 class PolygonDxfAlgorithm(QgsProcessingAlgorithm):
@@ -64,6 +68,12 @@ class PolygonDxfAlgorithm(QgsProcessingAlgorithm):
                 'dxf'
             )
         )
+        add_filter_parameters(self)
+        add_simplify_parameters(self)
+        add_precision_parameter(self)
+        add_split_parameters(self)
+        add_manifest_parameter(self)
+        add_profile_parameters(self)
 
     def processAlgorithm(self, parameters, context, feedback):
         dxf_file = self.parameterAsFile(parameters, self.FILENAME, context)
@@ -71,60 +81,67 @@ class PolygonDxfAlgorithm(QgsProcessingAlgorithm):
             dxf_file += '.dxf'
         elevation = self.parameterAsFields(parameters, self.ELEVATION_FIELD, context) or None
         field = self.parameterAsFields(parameters, self.LAYER_FIELD, context)[0]
-        layers = set()
-        source = self.parameterAsVectorLayer(parameters, self.INPUT, context)
-
-        elevation_field = None
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        precision = coordinate_precision(self, parameters, context)
+        profile = profiler(self, parameters, context, feedback)
+        manifest = export_manifest(self, parameters, context, source, dxf_file)
+        unchanged = manifest.unchanged() if manifest is not None else None
+        if unchanged:
+            feedback.pushInfo(self.tr(f'Input and parameters unchanged since the last export to {dxf_file}, skipped.'))
+            profile.finish()
+            return {self.FILENAME: dxf_file, OUTPUTS: unchanged, PROFILE_FILE: profile.trace_file}
+
+        field_index = source.fields().indexFromName(field)
+        elevation_index = None
         if elevation:
-            elevation_field = elevation[0]
-
-        promoted_multi = run(
-            'native:promotetomulti',
-            {
-                'INPUT': source,
-                'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-            },
-            context=context,
-            is_child_algorithm=True
-        )['OUTPUT']
-        multi = QgsProcessingUtils.mapLayerFromString(promoted_multi, context)
-
-        total = 100.0 / multi.featureCount() if multi.featureCount() else 0
-        features = multi.getFeatures()
-        doc = new_dxf('R2013')
-        doc.appids.new('TMCAlgorithms')
+            elevation_index = source.fields().indexFromName(elevation[0])
+
+        profile.begin('topology')
+        simplify = simplifier(
+            self, parameters, context, source, polygon_rings,
+            feature_request(self, parameters, context, source, [])
+        )
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        columns = [field] + (elevation or []) + self.parameterAsFields(parameters, SPLIT_FIELD, context)
+        features = source.getFeatures(feature_request(self, parameters, context, source, columns))
+        output = dxf_output(
+            self, parameters, context, source.fields(), dxf_file,
+            lambda: new_dxf('R2013'), 'TMCAlgorithms', linetype='CONTINUOUS'
+        )
 
+        profile.begin('read')
         for current, feature in enumerate(features):
             if feedback.isCanceled():
                 break
 
-            msp = doc.modelspace()
             if feature.hasGeometry():
-                layer = f'{feature.attribute(field)}'
-                if not layer in layers:
-                    doc.layers.new(name=layer)
-                    layers.add(layer)
-                geom = feature.geometry().asMultiPolygon()
-                for multi_polygon in geom:
-                    for polygon in multi_polygon:
-                        attr = {
-                            'layer': layer,
-                            'linetype': 'CONTINUOUS'
-                        }
-                        if elevation:
-                            attr['elevation'] = feature.attribute(elevation_field)
-                        entity = msp.add_lwpolyline(
-                            [(point.x(), point.y()) for point in polygon],
-                            dxfattribs=attr
-                        )
-                        entity.set_xdata('TMCAlgorithms', [
-                            (1001, 'TMCAlgorithms'),
-                            (1000, layer),
-                        ])
+                rings = simplify.simplify(polygon_rings(feature.geometry()))
+                if precision is not None:
+                    rings = round_parts(rings, precision)
+                profile.count(1, rings)
+                profile.begin('encode')
+                attributes = feature.attributes()
+                templates = output.templates(attributes)
+                layer = f'{attributes[field_index]}'
+                template = templates.get(
+                    layer,
+                    layer,
+                    elevation=None if elevation_index is None else attributes[elevation_index]
+                )
+                for ring in rings:
+                    templates.add_lwpolyline(ring, template)
+                profile.begin('read')
             feedback.setProgress(int(current * total))
 
-        doc.saveas(dxf_file)
-        return {self.FILENAME: dxf_file}
+        simplify.report(feedback)
+        profile.begin('save')
+        paths = output.save()
+        if manifest is not None and not feedback.isCanceled():
+            manifest.save(paths)
+        if paths != [dxf_file]:
+            feedback.pushInfo(self.tr(f'Wrote {len(paths)} DXF files.'))
+        profile.finish()
+        return {self.FILENAME: dxf_file, OUTPUTS: paths, PROFILE_FILE: profile.trace_file}
 
     def name(self):
         return 'Export polygon to DXF'
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from qgis.core import QgsProcessingParameterNumber
+
+PRECISION = 'PRECISION'
+
+
+def add_precision_parameter(alg):
+    """
+    Adds the number of decimals written for coordinates to `alg`.
+    """
+    alg.addParameter(
+        QgsProcessingParameterNumber(
+            PRECISION,
+            alg.tr('Coordinate decimals (e.g. 3 for millimetres, -1 for full precision)'),
+            type=QgsProcessingParameterNumber.Integer,
+            defaultValue=-1,
+            minValue=-1,
+            maxValue=12
+        )
+    )
+
+
+def coordinate_precision(alg, parameters, context):
+    """
+    Returns the number of decimals requested in the parameters of `alg`, or
+    None to keep full precision.
+    """
+    decimals = alg.parameterAsInt(parameters, PRECISION, context)
+    return None if decimals < 0 else decimals
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import cProfile
+import json
+from time import perf_counter, process_time
+from qgis.core import (QgsProcessingParameterBoolean,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterFileDestination)
+
+PROFILE = 'PROFILE'
+PROFILE_FILE = 'PROFILE_FILE'
+
+
+def add_profile_parameters(algorithm):
+    """
+    Adds the advanced profiling parameters to `algorithm`.
+    """
+    par_profile = QgsProcessingParameterBoolean(
+        PROFILE,
+        algorithm.tr('Report time spent in each phase'),
+        defaultValue=False
+    )
+    par_profile_file = QgsProcessingParameterFileDestination(
+        PROFILE_FILE,
+        algorithm.tr('Profile trace'),
+        algorithm.tr('JSON phase trace (*.json);;cProfile statistics (*.prof)'),
+        optional=True,
+        createByDefault=False
+    )
+    par_profile.setFlags(par_profile.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    par_profile_file.setFlags(par_profile_file.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    algorithm.addParameter(par_profile)
+    algorithm.addParameter(par_profile_file)
+
+
+def profiler(algorithm, parameters, context, feedback):
+    """
+    Returns the profiler requested by the parameters of `algorithm`, or a
+    profiler doing nothing if profiling is off.
+    """
+    trace_file = algorithm.parameterAsFileOutput(parameters, PROFILE_FILE, context)
+    if not (algorithm.parameterAsBool(parameters, PROFILE, context) or trace_file):
+        return NULL_PROFILER
+    return Profiler(feedback, trace_file)
+
+
+class NullProfiler(object):
+
+    enabled = False
+    trace_file = ''
+
+    def begin(self, name):
+        pass
+
+    def count(self, features=0, parts=()):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler(object):
+    """
+    Records the wall and CPU time of consecutive phases of an algorithm and
+    the features and vertices handled in each. A phase lasts until the next
+    call to `begin`, so a phase may be entered many times, e.g. once per
+    feature. If `trace_file` ends with `.prof`, the run is also profiled with
+    cProfile.
+    """
+
+    enabled = True
+
+    def __init__(self, feedback, trace_file=''):
+        self.feedback = feedback
+        self.phases = {}
+        self.trace_file = trace_file
+        self._current = None
+        self._cprofile = None
+        self._cpu = process_time()
+        self._wall = perf_counter()
+        if trace_file.endswith('.prof'):
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _close(self):
+        wall = perf_counter()
+        cpu = process_time()
+        if self._current is not None:
+            phase = self._current
+            phase[0] += wall - self._wall
+            phase[1] += cpu - self._cpu
+        self._wall = wall
+        self._cpu = cpu
+
+    def begin(self, name):
+        self._close()
+        phase = self.phases.get(name)
+        if phase is None:
+            # wall time, CPU time, features, vertices
+            phase = [0.0, 0.0, 0, 0]
+            self.phases[name] = phase
+        self._current = phase
+
+    def count(self, features=0, parts=()):
+        """
+        Adds `features` and the vertices of `parts`, sequences of vertices,
+        to the current phase.
+        """
+        self._current[2] += features
+        self._current[3] += sum(map(len, parts))
+
+    def summary(self):
+        return [
+            {
+                'phase': name,
+                'wall_s': wall,
+                'cpu_s': cpu,
+                'features': features,
+                'vertices': vertices,
+                'features_per_s': features / wall if wall else None,
+                'vertices_per_s': vertices / wall if wall else None
+            }
+            for name, (wall, cpu, features, vertices) in self.phases.items()
+        ]
+
+    def finish(self):
+        """
+        Ends the current phase, reports the phases through the feedback and
+        writes the trace file.
+        """
+        self._close()
+        self._current = None
+        if self._cprofile:
+            self._cprofile.disable()
+        summary = self.summary()
+        total = sum(phase['wall_s'] for phase in summary)
+        self.feedback.pushInfo('Profile (wall s / CPU s / features / vertices):')
+        for phase in summary:
+            share = 100 * phase['wall_s'] / total if total else 0
+            line = (f'  {phase["phase"]}: {phase["wall_s"]:.3f} / {phase["cpu_s"]:.3f}'
+                    f' ({share:.1f}%) / {phase["features"]} / {phase["vertices"]}')
+            if phase['features_per_s']:
+                line += f' ({phase["features_per_s"]:.0f} features/s, {phase["vertices_per_s"]:.0f} vertices/s)'
+            self.feedback.pushInfo(line)
+        if self._cprofile:
+            self._cprofile.dump_stats(self.trace_file)
+        elif self.trace_file:
+            with open(self.trace_file, 'w') as fstream:
+                json.dump({'phases': summary, 'total_wall_s': total}, fstream, indent=2)
@@ -0,0 +1,868 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import heapq
+import math
+import os
+from array import array
+from collections import OrderedDict
+from qgis.core import NULL
+from .filters import FILTER_EXTENT, feature_request
+from .lib import polyline_parts
+from .turns import heading, turn_angle
+
+# Road directions and path types, in the order of the native network
+# analysis algorithms
+DIRECTION_FORWARD = 0
+DIRECTION_BACKWARD = 1
+DIRECTION_BOTH = 2
+STRATEGY_SHORTEST = 0
+STRATEGY_FASTEST = 1
+
+# Road graphs kept between runs once `enable_graph_cache` is called, keyed by
+# the road file and everything they are built with
+_graph_cache = None
+_graph_cache_size = 0
+
+
+def line_length(points):
+    return sum(math.hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(points, points[1:]))
+
+
+def cut_line(points, start, end):
+    """
+    Returns the part of the polyline `points` between the distances `start`
+    and `end` from its first vertex, reversed if `end` is before `start`.
+    """
+    if start > end:
+        return cut_line(points, end, start)[::-1]
+    result = []
+    travelled = 0.0
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        length = math.hypot(x2 - x1, y2 - y1)
+        after = travelled + length
+        if length > 0 and after >= start:
+            if not result:
+                t = max(start - travelled, 0) / length
+                result.append((x1 + t * (x2 - x1), y1 + t * (y2 - y1)))
+            if after >= end:
+                t = (end - travelled) / length
+                result.append((x1 + t * (x2 - x1), y1 + t * (y2 - y1)))
+                return result
+            result.append((x2, y2))
+        travelled = after
+    if not result:
+        result.append(points[-1])
+    if len(result) == 1:
+        result.append(result[0])
+    return result
+
+
+class RoadGraph(object):
+    """
+    Directed graph of a road network. Nodes are the ends of the roads and the
+    vertices shared by several roads, as in the native network analysis.
+    Each link is the piece of road between two nodes and keeps its geometry.
+    Arcs are the directions in which a link may be travelled, with their
+    `span`, the distances along the link where they start and end.
+    """
+
+    def __init__(self):
+        self.coords = []
+        self.node_index = {}
+        self.out = []
+        self.link_points = []
+        self.link_length = []
+        self.link_feature = []
+        self.link_nodes = []
+        self.link_arcs = []
+        self.arc_from = []
+        self.arc_to = []
+        self.arc_cost = []
+        self.arc_link = []
+        self.arc_span = []
+        self.node_component = []
+        self.components = 0
+
+    def node(self, point):
+        node = self.node_index.get(point)
+        if node is None:
+            node = self.node_index[point] = len(self.coords)
+            self.coords.append(point)
+            self.out.append([])
+        return node
+
+    def add_arc(self, u, v, cost, link, span):
+        arc = len(self.arc_to)
+        self.arc_from.append(u)
+        self.arc_to.append(v)
+        self.arc_cost.append(cost)
+        self.arc_link.append(link)
+        self.arc_span.append(span)
+        self.out[u].append(arc)
+        self.link_arcs[link].append(arc)
+        return arc
+
+    def add_road(self, points, feature, direction, factor):
+        """
+        Adds the link following `points`. Its cost is its length times
+        `factor`, in the directions allowed by `direction`.
+        """
+        length = line_length(points)
+        u = self.node(points[0])
+        v = self.node(points[-1])
+        if u == v and length == 0:
+            return
+        link = len(self.link_points)
+        self.link_points.append(points)
+        self.link_length.append(length)
+        self.link_feature.append(feature)
+        self.link_nodes.append((u, v))
+        self.link_arcs.append([])
+        if direction in (DIRECTION_FORWARD, DIRECTION_BOTH):
+            self.add_arc(u, v, length * factor, link, (0.0, length))
+        if direction in (DIRECTION_BACKWARD, DIRECTION_BOTH):
+            self.add_arc(v, u, length * factor, link, (length, 0.0))
+
+
+def segment_intersection(a, b, c, d):
+    """
+    Returns the fractions along the segments ab and cd of the point where
+    they cross and the point itself, or None if they do not cross strictly
+    inside both of them.
+    """
+    (x1, y1), (x2, y2), (x3, y3), (x4, y4) = a, b, c, d
+    denominator = (x2 - x1) * (y4 - y3) - (y2 - y1) * (x4 - x3)
+    if denominator == 0:
+        return None
+    t = ((x3 - x1) * (y4 - y3) - (y3 - y1) * (x4 - x3)) / denominator
+    u = ((x3 - x1) * (y2 - y1) - (y3 - y1) * (x2 - x1)) / denominator
+    if 0 < t < 1 and 0 < u < 1:
+        return t, u, (x1 + t * (x2 - x1), y1 + t * (y2 - y1))
+    return None
+
+
+def project(point, a, b):
+    """
+    Returns the fraction along the segment ab of the projection of `point`,
+    the projected point and its distance to `point`.
+    """
+    (px, py), (x1, y1), (x2, y2) = point, a, b
+    length = (x2 - x1) ** 2 + (y2 - y1) ** 2
+    t = ((px - x1) * (x2 - x1) + (py - y1) * (y2 - y1)) / length if length else 0.0
+    t = min(max(t, 0.0), 1.0)
+    x, y = x1 + t * (x2 - x1), y1 + t * (y2 - y1)
+    return t, (x, y), math.hypot(px - x, py - y)
+
+
+def node_roads(roads, tolerance):
+    """
+    Returns `roads` with the vertices closer than `tolerance` merged, the
+    crossings split and the road ends within `tolerance` of another road,
+    or exactly on it, moved onto it, so that all of them become nodes of
+    the graph.
+    """
+    cells = {}
+
+    def snap(point):
+        x, y = point
+        i, j = int(x // tolerance), int(y // tolerance)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for other in cells.get((i + di, j + dj), ()):
+                    if math.hypot(other[0] - x, other[1] - y) <= tolerance:
+                        return other
+        cells.setdefault((i, j), []).append(point)
+        return point
+
+    snapped = []
+    for feature, parts, direction, factor in roads:
+        new_parts = []
+        for part in parts:
+            points = []
+            for point in part:
+                point = snap(point)
+                if not points or points[-1] != point:
+                    points.append(point)
+            if len(points) > 1:
+                new_parts.append(points)
+        snapped.append((feature, new_parts, direction, factor))
+
+    segments = [
+        (road, index, i, part[i], part[i + 1], i == 0, i == len(part) - 2)
+        for road, (_, parts, _, _) in enumerate(snapped)
+        for index, part in enumerate(parts)
+        for i in range(len(part) - 1)
+    ]
+    if not segments:
+        return snapped
+    size = max(
+        tolerance,
+        sum(math.hypot(b[0] - a[0], b[1] - a[1]) for _, _, _, a, b, _, _ in segments) / len(segments)
+    )
+    grid = {}
+    for number, (_, _, _, (x1, y1), (x2, y2), _, _) in enumerate(segments):
+        for i in range(int((min(x1, x2) - tolerance) // size), int((max(x1, x2) + tolerance) // size) + 1):
+            for j in range(int((min(y1, y2) - tolerance) // size), int((max(y1, y2) + tolerance) // size) + 1):
+                grid.setdefault((i, j), []).append(number)
+
+    splits = {}
+    moved = {}
+    checked = set()
+    for members in grid.values():
+        for k, first in enumerate(members):
+            for second in members[k + 1:]:
+                if (first, second) in checked:
+                    continue
+                checked.add((first, second))
+                sa, sb = segments[first], segments[second]
+                if sa[:2] == sb[:2] and abs(sa[2] - sb[2]) < 2:
+                    continue
+                crossing = segment_intersection(sa[3], sa[4], sb[3], sb[4])
+                if crossing:
+                    t, u, point = crossing
+                    splits.setdefault(first, []).append((t, point))
+                    splits.setdefault(second, []).append((u, point))
+                for (segment, number), (other, other_number) in [((sa, first), (sb, second)), ((sb, second), (sa, first))]:
+                    for is_end, end, key in [(segment[5], segment[3], 0), (segment[6], segment[4], -1)]:
+                        if not is_end or (segment[:2] + (key,)) in moved:
+                            continue
+                        t, point, distance = project(end, other[3], other[4])
+                        if 0 < t < 1 and distance <= tolerance:
+                            moved[segment[:2] + (key,)] = point
+                            splits.setdefault(other_number, []).append((t, point))
+
+    noded = []
+    number = 0
+    for road, (feature, parts, direction, factor) in enumerate(snapped):
+        new_parts = []
+        for index, part in enumerate(parts):
+            points = [moved.get((road, index, 0), part[0])]
+            for i in range(len(part) - 1):
+                for _, point in sorted(splits.get(number, ())):
+                    if point != points[-1]:
+                        points.append(point)
+                number += 1
+                end = moved.get((road, index, -1), part[-1]) if i == len(part) - 2 else part[i + 1]
+                if end != points[-1]:
+                    points.append(end)
+            if len(points) > 1:
+                new_parts.append(points)
+        noded.append((feature, new_parts, direction, factor))
+    return noded
+
+
+def contract_graph(graph, keep_features=None, max_bend=None):
+    """
+    Returns `graph` with the chains of links through nodes joining exactly
+    two links merged into single links keeping the whole geometry. Links are
+    only merged if they allow the same directions at the same cost per
+    unit of length, so that the costs and the tied points stay exact. Links
+    of the features in `keep_features` are not merged with links of other
+    features, nor are links of different features meeting at an angle above
+    `max_bend` degrees, so that turn rules apply to their junction.
+    """
+    incident = [[] for _ in graph.coords]
+    for link, (u, v) in enumerate(graph.link_nodes):
+        incident[u].append(link)
+        incident[v].append(link)
+
+    def travel(link, node):
+        """
+        Returns the directions and the cost per unit of length of `link`
+        when travelled away from `node`.
+        """
+        away = graph.link_nodes[link][0] == node
+        arcs = graph.link_arcs[link]
+        directions = frozenset((graph.arc_span[arc][0] < graph.arc_span[arc][1]) == away for arc in arcs)
+        length = graph.link_length[link]
+        rate = graph.arc_cost[arcs[0]] / length if arcs and length else 0.0
+        return directions, rate
+
+    def contractible(node):
+        links = incident[node]
+        if len(links) != 2 or links[0] == links[1]:
+            return False
+        features = {graph.link_feature[link] for link in links}
+        if keep_features and len(features) > 1 and not features.isdisjoint(keep_features):
+            return False
+        if max_bend is not None and len(features) > 1:
+            a, b = links
+            into = graph.link_points[a] if graph.link_nodes[a][1] == node else graph.link_points[a][::-1]
+            away = graph.link_points[b] if graph.link_nodes[b][0] == node else graph.link_points[b][::-1]
+            if turn_angle(heading(into, end=True), heading(away)) > max_bend:
+                return False
+        (directions_in, rate_in), (directions_out, rate_out) = travel(links[0], node), travel(links[1], node)
+        # Travelling into the node along the first link is travelling away
+        # from it along the second one.
+        directions_in = frozenset(not direction for direction in directions_in)
+        return directions_in == directions_out and math.isclose(rate_in, rate_out, rel_tol=1e-9)
+
+    through = [contractible(node) for node in range(len(graph.coords))]
+    done = [False] * len(graph.link_points)
+    contracted = RoadGraph()
+
+    def walk(node, link):
+        start = node
+        feature = graph.link_feature[link]
+        directions, rate = travel(link, node)
+        points = []
+        while True:
+            done[link] = True
+            u, v = graph.link_nodes[link]
+            link_points = graph.link_points[link] if u == node else graph.link_points[link][::-1]
+            points.extend(link_points[1:] if points else link_points)
+            node = v if u == node else u
+            if not through[node] or node == start:
+                break
+            a, b = incident[node]
+            link = b if a == link else a
+            if done[link]:
+                break
+        if directions == {True, False}:
+            direction = DIRECTION_BOTH
+        elif directions == {True}:
+            direction = DIRECTION_FORWARD
+        else:
+            direction = DIRECTION_BACKWARD
+        contracted.add_road(points, feature, direction, rate)
+
+    for node in range(len(graph.coords)):
+        if not through[node]:
+            for link in incident[node]:
+                if not done[link]:
+                    walk(node, link)
+    for link in range(len(graph.link_points)):
+        if not done[link]:
+            walk(graph.link_nodes[link][0], link)
+    return contracted
+
+
+def label_components(graph):
+    """
+    Labels the nodes of `graph` with the connected component they belong
+    to, ignoring the directions. Nodes in different components cannot
+    reach each other.
+    """
+    parent = list(range(len(graph.coords)))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for u, v in graph.link_nodes:
+        root_u, root_v = find(u), find(v)
+        if root_u != root_v:
+            parent[root_u] = root_v
+    labels = {}
+    graph.node_component = [labels.setdefault(find(node), len(labels)) for node in range(len(graph.coords))]
+    graph.components = len(labels)
+
+
+def build_graph(roads, tolerance=0, keep_features=None, max_bend=None):
+    """
+    Returns the graph of `roads`, a sequence of (feature id, parts, direction,
+    cost factor) where parts are the polylines of the road as lists of (x, y).
+    With a `tolerance` the roads are noded first. Chains of links are
+    contracted, except across the ends of `keep_features` and the junctions
+    of features bending by more than `max_bend`, and the nodes labelled with
+    their component.
+    """
+    if tolerance > 0:
+        roads = node_roads(roads, tolerance)
+    nodes = set()
+    seen = set()
+    for _, parts, _, _ in roads:
+        for part in parts:
+            if len(part) > 1:
+                nodes.add(part[0])
+                nodes.add(part[-1])
+                for point in part[1:-1]:
+                    if point in seen:
+                        nodes.add(point)
+                    else:
+                        seen.add(point)
+
+    graph = RoadGraph()
+    for feature, parts, direction, factor in roads:
+        if math.isinf(factor):
+            continue
+        for part in parts:
+            start = 0
+            for i in range(1, len(part)):
+                if part[i] in nodes:
+                    graph.add_road(part[start:i + 1], feature, direction, factor)
+                    start = i
+    graph = contract_graph(graph, keep_features, max_bend)
+    label_components(graph)
+    return graph
+
+
+def enable_graph_cache(size=4):
+    """
+    Keeps the last `size` road graphs built from files, so that the jobs run
+    one after another in the same process, e.g. by the batch runner, share
+    them. Graphs of files modified since they were built are built again.
+    """
+    global _graph_cache, _graph_cache_size
+    _graph_cache = OrderedDict()
+    _graph_cache_size = size
+
+
+def _graph_key(alg, parameters, context, road, settings):
+    """
+    Returns the key of the graph of the road layer given in the parameters of
+    `alg` built with `settings`, or None if it cannot be cached: graphs are
+    only cached for whole files, not for selections or memory layers.
+    """
+    if getattr(parameters.get(alg.ROAD), 'selectedFeaturesOnly', False):
+        return None
+    layer = alg.parameterAsVectorLayer(parameters, alg.ROAD, context)
+    if layer is None:
+        return None
+    path = layer.source().split('|')[0]
+    if not os.path.isfile(path):
+        return None
+    extent = alg.parameterAsExtent(parameters, FILTER_EXTENT, context, road.sourceCrs())
+    return (layer.source(), os.path.getmtime(path), extent.toString()) + settings
+
+
+def road_graph(alg, parameters, context, feedback, keep_features=None, max_bend=None):
+    """
+    Builds the graph of the road network given in the parameters of `alg`.
+    The parameters are named and interpreted as in the native network
+    analysis algorithms. Costs are map units for the shortest path and
+    hours for the fastest, map units being taken as metres. The features in
+    `keep_features` keep their own links and junctions bending by more than
+    `max_bend` are kept, see `contract_graph`.
+    """
+    road = alg.parameterAsSource(parameters, alg.ROAD, context)
+    strategy = alg.parameterAsEnum(parameters, alg.STRATEGY, context)
+    direction_field = alg.parameterAsFields(parameters, alg.DIRECTION_FIELD, context)
+    speed_field = alg.parameterAsFields(parameters, alg.SPEED_FIELD, context)
+    default_direction = alg.parameterAsEnum(parameters, alg.DEFAULT_DIRECTION, context)
+    default_speed = alg.parameterAsDouble(parameters, alg.DEFAULT_SPEED, context)
+    tolerance = alg.parameterAsDouble(parameters, alg.TOLERANCE, context)
+    directions = [
+        (alg.parameterAsString(parameters, alg.VALUE_FORWARD, context), DIRECTION_FORWARD),
+        (alg.parameterAsString(parameters, alg.VALUE_BACKWARD, context), DIRECTION_BACKWARD),
+        (alg.parameterAsString(parameters, alg.VALUE_BOTH, context), DIRECTION_BOTH)
+    ]
+    directions = [(value, direction) for value, direction in directions if value]
+
+    key = None
+    if _graph_cache is not None:
+        key = _graph_key(alg, parameters, context, road, (
+            strategy, tuple(direction_field), tuple(speed_field), default_direction, default_speed,
+            tolerance, tuple(directions), frozenset(keep_features or ()), max_bend
+        ))
+        graph = _graph_cache.get(key) if key is not None else None
+        if graph is not None:
+            _graph_cache.move_to_end(key)
+            feedback.pushInfo('Road network reused from a previous run.')
+            return graph
+
+    fields = road.fields()
+    direction_index = fields.indexFromName(direction_field[0]) if direction_field else None
+    speed_index = fields.indexFromName(speed_field[0]) if speed_field and strategy == STRATEGY_FASTEST else None
+    request = feature_request(
+        alg, parameters, context, road,
+        [fields.at(i).name() for i in [direction_index, speed_index] if i is not None],
+        expression=False
+    )
+
+    roads = []
+    for feature in road.getFeatures(request):
+        if feedback.isCanceled():
+            break
+        if not feature.hasGeometry():
+            continue
+        attributes = feature.attributes()
+        direction = default_direction
+        if direction_index is not None:
+            value = attributes[direction_index]
+            value = '' if value is None or value == NULL else f'{value}'
+            direction = next((d for v, d in directions if v == value), default_direction)
+        factor = 1.0
+        if strategy == STRATEGY_FASTEST:
+            speed = default_speed
+            if speed_index is not None:
+                try:
+                    speed = float(attributes[speed_index]) or default_speed
+                except (TypeError, ValueError):
+                    pass
+            factor = 1 / (speed * 1000) if speed > 0 else math.inf
+        roads.append((feature.id(), polyline_parts(feature.geometry()), direction, factor))
+    graph = build_graph(roads, tolerance, keep_features, max_bend)
+    # Graphs of cancelled runs may miss roads.
+    if key is not None and not feedback.isCanceled():
+        _graph_cache[key] = graph
+        while len(_graph_cache) > _graph_cache_size:
+            _graph_cache.popitem(last=False)
+    feedback.pushInfo(
+        f'Road network of {len(graph.coords)} nodes, {len(graph.link_points)} links '
+        f'and {graph.components} connected components.'
+    )
+    return graph
+
+
+class SegmentIndex(object):
+    """
+    Uniform grid of the segments of the links of a graph, finding the link
+    nearest to a point.
+    """
+
+    def __init__(self, graph):
+        self.grid = {}
+        segments = []
+        for link, points in enumerate(graph.link_points):
+            offset = 0.0
+            for (x1, y1), (x2, y2) in zip(points, points[1:]):
+                length = math.hypot(x2 - x1, y2 - y1)
+                segments.append((link, offset, x1, y1, x2, y2, length))
+                offset += length
+        xs = [x for segment in segments for x in (segment[2], segment[4])] or [0.0]
+        ys = [y for segment in segments for y in (segment[3], segment[5])] or [0.0]
+        size = max(max(xs) - min(xs), max(ys) - min(ys))
+        self.cell = max(
+            sum(segment[6] for segment in segments) / max(len(segments), 1),
+            size / max(math.sqrt(len(segments)), 1),
+            1e-9
+        )
+        for segment in segments:
+            _, _, x1, y1, x2, y2, _ = segment
+            for i in range(int(min(x1, x2) // self.cell), int(max(x1, x2) // self.cell) + 1):
+                for j in range(int(min(y1, y2) // self.cell), int(max(y1, y2) // self.cell) + 1):
+                    self.grid.setdefault((i, j), []).append(segment)
+        self.bounds = (
+            int(min(xs) // self.cell), int(min(ys) // self.cell),
+            int(max(xs) // self.cell), int(max(ys) // self.cell)
+        )
+
+    def ring(self, i, j, radius):
+        if radius == 0:
+            return [(i, j)]
+        cells = []
+        for k in range(-radius, radius + 1):
+            cells.extend([(i + k, j - radius), (i + k, j + radius)])
+        for k in range(-radius + 1, radius):
+            cells.extend([(i - radius, j + k), (i + radius, j + k)])
+        return cells
+
+    def nearest(self, point):
+        """
+        Returns the (distance, link, offset) of the point of the graph nearest
+        to `point`, the offset being the distance along the link.
+        """
+        px, py = point
+        i, j = int(px // self.cell), int(py // self.cell)
+        left, bottom, right, top = self.bounds
+        last = max(abs(i - left), abs(i - right), abs(j - bottom), abs(j - top))
+        best = None
+        for radius in range(last + 1):
+            for cell in self.ring(i, j, radius):
+                for link, offset, x1, y1, x2, y2, length in self.grid.get(cell, ()):
+                    t = 0.0
+                    if length > 0:
+                        t = min(max(((px - x1) * (x2 - x1) + (py - y1) * (y2 - y1)) / (length * length), 0.0), 1.0)
+                    distance = math.hypot(x1 + t * (x2 - x1) - px, y1 + t * (y2 - y1) - py)
+                    if best is None or distance < best[0]:
+                        best = (distance, link, offset + t * length)
+            if best is not None and best[0] <= radius * self.cell:
+                break
+        return best
+
+
+class Network(object):
+    """
+    A road graph with the points tied to it. Points are tied to the nearest
+    link through extra nodes splitting its arcs. The graph itself is left
+    unchanged so that it can be shared, only the lists modified by the ties
+    are copied.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.coords = list(graph.coords)
+        self.out = list(graph.out)
+        self.arc_from = list(graph.arc_from)
+        self.arc_to = list(graph.arc_to)
+        self.arc_cost = list(graph.arc_cost)
+        self.arc_link = list(graph.arc_link)
+        self.arc_span = list(graph.arc_span)
+        self.index = None
+        self.into = None
+        self.node_component = list(graph.node_component)
+        self.ties = {}
+
+    def tie(self, point):
+        """
+        Returns the node where `point` joins the network, or None if the
+        network has no road.
+        """
+        graph = self.graph
+        if not graph.link_points:
+            return None
+        if self.index is None:
+            self.index = SegmentIndex(graph)
+        _, link, offset = self.index.nearest(point)
+        u, v = graph.link_nodes[link]
+        if offset <= 0:
+            return u
+        if offset >= graph.link_length[link]:
+            return v
+        ties = self.ties.setdefault(link, {})
+        if offset not in ties:
+            ties[offset] = len(self.coords)
+            self.coords.append(cut_line(graph.link_points[link], offset, offset)[0])
+            self.out.append([])
+            self.node_component.append(graph.node_component[u])
+        return ties[offset]
+
+    def add_arc(self, u, v, cost, link, span):
+        self.arc_from.append(u)
+        self.arc_to.append(v)
+        self.arc_cost.append(cost)
+        self.arc_link.append(link)
+        self.arc_span.append(span)
+        self.out[u] = self.out[u] + [len(self.arc_to) - 1]
+        self.into = None
+
+    def finish(self):
+        """
+        Splits the arcs of the links holding tied points. Must be called once
+        every point is tied.
+        """
+        graph = self.graph
+        for link, ties in self.ties.items():
+            for arc in graph.link_arcs[link]:
+                start, end = graph.arc_span[arc]
+                stops = sorted(ties.items(), reverse=start > end)
+                stops = [(start, graph.arc_from[arc])] + stops + [(end, graph.arc_to[arc])]
+                rate = graph.arc_cost[arc] / graph.link_length[link]
+                for (a, u), (b, v) in zip(stops, stops[1:]):
+                    self.add_arc(u, v, abs(b - a) * rate, link, (a, b))
+        self.ties = {}
+
+    def incoming(self):
+        """
+        Returns the arcs reaching each node, built on first use.
+        """
+        if self.into is None:
+            self.into = [[] for _ in self.coords]
+            for arc, v in enumerate(self.arc_to):
+                self.into[v].append(arc)
+        return self.into
+
+    def arc_points(self, arc):
+        link = self.arc_link[arc]
+        points = self.graph.link_points[link]
+        length = self.graph.link_length[link]
+        start, end = self.arc_span[arc]
+        if start == 0 and end == length:
+            return points
+        if start == length and end == 0:
+            return points[::-1]
+        return cut_line(points, start, end)
+
+    def path_points(self, arcs):
+        """
+        Returns the polyline following `arcs`.
+        """
+        points = []
+        for arc in arcs:
+            arc_points = self.arc_points(arc)
+            points.extend(arc_points[1:] if points else arc_points)
+        return points
+
+
+def dijkstra(network, source, bound=math.inf, targets=None, count=0, reverse=False):
+    """
+    Searches the cheapest paths from the node `source`, or to it if `reverse`
+    is set. The search stops at `bound`, or once `count` nodes of `targets`
+    are settled (all of them if `count` is 0). Returns the costs of the
+    settled nodes and the arcs through which they are reached, as
+    dictionaries keyed by node.
+    """
+    arc_next = network.arc_from if reverse else network.arc_to
+    arc_cost = network.arc_cost
+    out = network.incoming() if reverse else network.out
+    costs = {source: 0.0}
+    previous = {source: None}
+    settled = {}
+    remaining = set(targets) if targets is not None else None
+    needed = count or (len(remaining) if remaining is not None else 0)
+    heap = [(0.0, source)]
+    while heap:
+        cost, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        if cost > bound:
+            break
+        settled[u] = cost
+        if remaining is not None and u in remaining:
+            needed -= 1
+            if needed <= 0:
+                break
+        for arc in out[u]:
+            v = arc_next[arc]
+            new_cost = cost + arc_cost[arc]
+            if new_cost < costs.get(v, math.inf) and v not in settled:
+                costs[v] = new_cost
+                previous[v] = arc
+                heapq.heappush(heap, (new_cost, v))
+    return settled, previous
+
+
+def path_arcs(network, previous, node, reverse=False):
+    """
+    Returns the arcs from the source of a search to `node`, or from `node`
+    to the source of a reverse search.
+    """
+    arcs = []
+    arc = previous.get(node)
+    while arc is not None:
+        arcs.append(arc)
+        arc = previous[network.arc_to[arc] if reverse else network.arc_from[arc]]
+    return arcs if reverse else arcs[::-1]
+
+
+def is_symmetric(graph):
+    """
+    Returns whether every link of `graph` may be travelled both ways at the
+    same cost, in which case the cost from a node to another is the cost
+    back.
+    """
+    arc_cost = graph.arc_cost
+    return all(len(arcs) == 2 and arc_cost[arcs[0]] == arc_cost[arcs[1]] for arcs in graph.link_arcs)
+
+
+class PathMirror(object):
+    """
+    Paths kept on a symmetric network for the source nodes not searched
+    yet: the cost and the arcs of the path found from another node, given
+    back reversed when the node is searched. Arcs are kept as compact
+    arrays, at most about `limit` of them, each path also counting 16 for
+    its entry. Paths beyond the limit are not kept and are searched again.
+    """
+
+    def __init__(self, limit=4000000):
+        self.limit = limit
+        self.paths = {}
+        self.size = 0
+        self.full = False
+
+    def keep(self, node, other, cost, arcs):
+        """
+        Keeps the path from `other` to `node`, returning False if the limit
+        is reached.
+        """
+        size = len(arcs) + 16
+        if self.size + size > self.limit:
+            self.full = True
+            return False
+        self.paths.setdefault(node, {})[other] = (cost, array('i', arcs))
+        self.size += size
+        return True
+
+    def known(self, node):
+        """
+        Returns the kept paths to `node`, as a dictionary from the node they
+        start from to their cost and arcs.
+        """
+        return self.paths.get(node, {})
+
+    def drop(self, node):
+        for _, arcs in self.paths.pop(node, {}).values():
+            self.size -= len(arcs) + 16
+
+
+class CostMatrix(object):
+    """
+    Sparse matrix of the costs between the nodes of a network, keeping only
+    the pairs found. A symmetric matrix keeps each pair of nodes once, in its
+    upper triangle. It is saved in a NumPy archive as `row`, `col` and `cost`
+    arrays with the node of each source and destination, -1 if not tied, so
+    that the cost from a source to a destination is looked up by their nodes.
+    """
+
+    def __init__(self, symmetric=False):
+        self.symmetric = symmetric
+        self.costs = {}
+
+    def add(self, u, v, cost):
+        if self.symmetric and u > v:
+            u, v = v, u
+        self.costs[(u, v)] = cost
+
+    def save(self, path, source_nodes, destination_nodes):
+        import numpy as np
+        pairs = sorted(self.costs)
+        np.savez_compressed(
+            path,
+            row=np.array([u for u, _ in pairs], dtype=np.int64),
+            col=np.array([v for _, v in pairs], dtype=np.int64),
+            cost=np.array([self.costs[pair] for pair in pairs], dtype=np.float64),
+            symmetric=np.array(self.symmetric),
+            source_node=np.array(source_nodes, dtype=np.int64),
+            destination_node=np.array(destination_nodes, dtype=np.int64)
+        )
+
+
+def pair_groups(pairs):
+    """
+    Groups `pairs`, a list of (key, source node, destination node), so that
+    each group is answered by a single search. Pairs are grouped by source,
+    or by destination with reverse searches when there are fewer distinct
+    destinations. Returns whether the searches are reversed and the groups,
+    as a dictionary from the node searched from to its (key, other end).
+    """
+    sources = {}
+    destinations = {}
+    for key, source, destination in pairs:
+        sources.setdefault(source, []).append((key, destination))
+        destinations.setdefault(destination, []).append((key, source))
+    if len(destinations) < len(sources):
+        return True, destinations
+    return False, sources
+
+
+def route_pairs(network, reverse, groups, turns=None):
+    """
+    Finds the cheapest path of each pair of `groups`, as returned by
+    `pair_groups`, with one search per group, or one `turns.TurnSearch` if
+    `turns` is given. Yields the key, cost and arcs of every pair, the cost
+    and arcs being None if the destination cannot be reached.
+    """
+    component = network.node_component
+    for node, ends in groups.items():
+        targets = {end for _, end in ends if component[end] == component[node]}
+        settled, previous = {}, {}
+        if targets and turns is not None:
+            settled, previous = turns.dijkstra(node, targets=targets, reverse=reverse)
+        elif targets:
+            settled, previous = dijkstra(network, node, targets=targets, reverse=reverse)
+        for key, end in ends:
+            if end not in settled:
+                yield key, None, None
+            elif turns is not None:
+                yield key, settled[end], turns.path_arcs(previous, end, reverse)
+            else:
+                yield key, settled[end], path_arcs(network, previous, end, reverse)
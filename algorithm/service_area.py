@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+from qgis.PyQt.QtCore import QCoreApplication, QVariant
+from qgis.core import (QgsFeature,
+                       QgsFeatureSink,
+                       QgsField,
+                       QgsFields,
+                       QgsGeometry,
+                       QgsPointXY,
+                       QgsProcessing,
+                       QgsProcessingAlgorithm,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterEnum,
+                       QgsProcessingParameterFeatureSink,
+                       QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterField,
+                       QgsProcessingParameterNumber,
+                       QgsProcessingParameterString,
+                       QgsWkbTypes)
+from .filters import add_filter_parameters, feature_request
+from .lib import point_parts
+from .profiling import PROFILE_FILE, add_profile_parameters, profiler
+from .routing import Network, cut_line, dijkstra, road_graph
+
+
+def merge_intervals(intervals):
+    """
+    Returns the `intervals` of a link, as (start, end, cost, source), merged
+    where they overlap or touch. A merged interval keeps the lowest cost and
+    its source.
+    """
+    intervals = sorted(intervals)
+    merged = [list(intervals[0])] if intervals else []
+    for low, high, cost, source_id in intervals[1:]:
+        if low <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], high)
+            if cost < merged[-1][2]:
+                merged[-1][2:] = [cost, source_id]
+        else:
+            merged.append([low, high, cost, source_id])
+    return merged
+
+
+class ServiceArea(object):
+    """
+    Roads of `network` reachable within `travel_cost`, searched from one
+    source at a time. Every node keeps its lowest cost from any source and
+    the source reaching it.
+    """
+
+    def __init__(self, network, travel_cost):
+        import numpy as np
+
+        self.network = network
+        self.travel_cost = travel_cost
+        self.arc_from = np.array(network.arc_from, dtype=np.int64)
+        self.arc_cost = np.array(network.arc_cost, dtype=float)
+        self.arc_span = np.array(network.arc_span, dtype=float).reshape(-1, 2)
+        self.best = np.full(len(network.coords), np.inf)
+        self.owner = np.full(len(network.coords), -1, dtype=np.int64)
+
+    def reach(self, costs):
+        """
+        Returns the arcs entered within the travel cost given the `costs` of
+        the nodes, infinite for the nodes not reached, how far along their
+        link they reach and the reached fraction of the arcs.
+        """
+        import numpy as np
+
+        start = costs[self.arc_from]
+        arcs = np.nonzero(start <= self.travel_cost)[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(
+                self.arc_cost[arcs] > 0,
+                (self.travel_cost - start[arcs]) / self.arc_cost[arcs],
+                1.0
+            )
+        fraction = np.clip(fraction, 0, 1)
+        ends = self.arc_span[arcs, 0] + (self.arc_span[arcs, 1] - self.arc_span[arcs, 0]) * fraction
+        return arcs, ends, fraction
+
+    def add(self, source_id, node):
+        """
+        Searches from `node`, the node of source `source_id`, and returns the
+        costs of the nodes, infinite for those out of reach.
+        """
+        import numpy as np
+
+        settled, _ = dijkstra(self.network, node, self.travel_cost)
+        nodes = np.fromiter(settled.keys(), dtype=np.int64, count=len(settled))
+        costs = np.fromiter(settled.values(), dtype=float, count=len(settled))
+        closer = costs < self.best[nodes]
+        self.best[nodes[closer]] = costs[closer]
+        self.owner[nodes[closer]] = source_id
+        node_costs = np.full(len(self.network.coords), np.inf)
+        node_costs[nodes] = costs
+        return node_costs
+
+    def outline(self, costs):
+        """
+        Returns the points whose hull encloses the roads reached given the
+        `costs` of a search: the nodes reached and the points where the
+        travel cost runs out along the arcs.
+        """
+        import numpy as np
+
+        network = self.network
+        arcs, ends, fraction = self.reach(costs)
+        partial = fraction < 1
+        points = [network.coords[u] for u in np.nonzero(np.isfinite(costs))[0].tolist()]
+        points.extend(
+            cut_line(network.graph.link_points[network.arc_link[arc]], end, end)[0]
+            for arc, end in zip(arcs[partial].tolist(), ends[partial].tolist())
+        )
+        return points
+
+    def pieces(self):
+        """
+        Yields the link, start and end along the link, cost and source of
+        the road pieces reached from all the sources, with `merge_intervals`.
+        """
+        network = self.network
+        arcs, ends, _ = self.reach(self.best)
+        pieces = {}
+        for arc, end in zip(arcs.tolist(), ends.tolist()):
+            start = network.arc_span[arc][0]
+            u = network.arc_from[arc]
+            pieces.setdefault(network.arc_link[arc], []).append(
+                (min(start, end), max(start, end), self.best[u], self.owner[u])
+            )
+        for link, intervals in pieces.items():
+            for low, high, cost, source_id in merge_intervals(intervals):
+                yield link, low, high, cost, source_id
+
+
+class ServiceAreaAlgorithm(QgsProcessingAlgorithm):
+
+    DEFAULT_DIRECTION = 'DEFAULT_DIRECTION'
+    DEFAULT_SPEED = 'DEFAULT_SPEED'
+    DIRECTION_FIELD = 'DIRECTION_FIELD'
+    OUTPUT = 'OUTPUT'
+    OUTPUT_POLYGONS = 'OUTPUT_POLYGONS'
+    ROAD = 'ROAD'
+    SOURCE = 'SOURCE'
+    SPEED_FIELD = 'SPEED_FIELD'
+    STRATEGY = 'STRATEGY'
+    TOLERANCE = 'TOLERANCE'
+    TRAVEL_COST = 'TRAVEL_COST'
+    VALUE_BACKWARD = 'VALUE_BACKWARD'
+    VALUE_BOTH = 'VALUE_BOTH'
+    VALUE_FORWARD = 'VALUE_FORWARD'
+
+    def initAlgorithm(self, config):
+        par_default_direction = QgsProcessingParameterEnum(
+            self.DEFAULT_DIRECTION,
+            self.tr('Default direction'),
+            options=[
+                self.tr('Forward direction'),
+                self.tr('Backward direction'),
+                self.tr('Both directions')
+            ],
+            defaultValue=2
+        )
+        par_default_speed = QgsProcessingParameterNumber(
+            self.DEFAULT_SPEED,
+            self.tr('Default speed (km/h)'),
+            type=QgsProcessingParameterNumber.Double,
+            defaultValue=50,
+            minValue=0
+        )
+        par_direction_field = QgsProcessingParameterField(
+            self.DIRECTION_FIELD,
+            self.tr('Direction field'),
+            parentLayerParameterName=self.ROAD,
+            optional=True
+        )
+        par_speed_field = QgsProcessingParameterField(
+            self.SPEED_FIELD,
+            self.tr('Speed field'),
+            parentLayerParameterName=self.ROAD,
+            optional=True
+        )
+        par_tolerance = QgsProcessingParameterNumber(
+            self.TOLERANCE,
+            self.tr('Topology tolerance'),
+            type=QgsProcessingParameterNumber.Double,
+            defaultValue=0,
+            minValue=0
+        )
+        par_value_backward = QgsProcessingParameterString(
+            self.VALUE_BACKWARD,
+            self.tr('Value for backward direction'),
+            defaultValue='',
+            optional=True
+        )
+        par_value_both = QgsProcessingParameterString(
+            self.VALUE_BOTH,
+            self.tr('Value for both directions'),
+            defaultValue='',
+            optional=True
+        )
+        par_value_forward = QgsProcessingParameterString(
+            self.VALUE_FORWARD,
+            self.tr('Value for forward direction'),
+            defaultValue='',
+            optional=True
+        )
+        par_default_direction.setFlags(par_default_direction.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_default_speed.setFlags(par_default_speed.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_direction_field.setFlags(par_direction_field.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_speed_field.setFlags(par_speed_field.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_tolerance.setFlags(par_tolerance.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_value_backward.setFlags(par_value_backward.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_value_both.setFlags(par_value_both.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_value_forward.setFlags(par_value_forward.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.SOURCE,
+                self.tr('Source Point Layer'),
+                [QgsProcessing.TypeVectorPoint]
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.ROAD,
+                self.tr('Road Network Layer'),
+                [QgsProcessing.TypeVectorLine]
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.STRATEGY,
+                self.tr('Path type to calculate'),
+                options=[
+                    self.tr('Shortest'),
+                    self.tr('Fastest')
+                ],
+                defaultValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.TRAVEL_COST,
+                self.tr('Travel cost (distance for shortest, hours for fastest)'),
+                type=QgsProcessingParameterNumber.Double,
+                defaultValue=1000,
+                minValue=0
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT,
+                self.tr('Service area (lines)'),
+                QgsProcessing.TypeVectorLine
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT_POLYGONS,
+                self.tr('Service area (polygons)'),
+                QgsProcessing.TypeVectorPolygon,
+                optional=True,
+                createByDefault=False
+            )
+        )
+        self.addParameter(par_direction_field)
+        self.addParameter(par_value_forward)
+        self.addParameter(par_value_backward)
+        self.addParameter(par_value_both)
+        self.addParameter(par_default_direction)
+        self.addParameter(par_speed_field)
+        self.addParameter(par_default_speed)
+        self.addParameter(par_tolerance)
+        add_filter_parameters(self, self.SOURCE)
+        add_profile_parameters(self)
+
+    def processAlgorithm(self, parameters, context, feedback):
+        road = self.parameterAsSource(parameters, self.ROAD, context)
+        source = self.parameterAsSource(parameters, self.SOURCE, context)
+        travel_cost = self.parameterAsDouble(parameters, self.TRAVEL_COST, context)
+        profile = profiler(self, parameters, context, feedback)
+
+        if source.sourceCrs().authid() != road.sourceCrs().authid():
+            raise Exception('Source and road network CRS do not match.')
+
+        fields = QgsFields()
+        fields.append(QgsField('SOURCE_ID', QVariant.Int))
+        fields.append(QgsField('cost', QVariant.Double))
+        (sink, dest_id) = self.parameterAsSink(
+            parameters,
+            self.OUTPUT,
+            context,
+            fields,
+            QgsWkbTypes.LineString,
+            road.sourceCrs()
+        )
+        (polygon_sink, polygon_dest_id) = self.parameterAsSink(
+            parameters,
+            self.OUTPUT_POLYGONS,
+            context,
+            fields,
+            QgsWkbTypes.Polygon,
+            road.sourceCrs()
+        )
+
+        profile.begin('Building network')
+        feedback.pushInfo(self.tr('Building network...'))
+        graph = road_graph(self, parameters, context, feedback)
+        network = Network(graph)
+
+        profile.begin('Tying sources')
+        sources = []
+        for i, feature in enumerate(source.getFeatures(feature_request(self, parameters, context, source, []))):
+            if feature.hasGeometry():
+                node = network.tie(point_parts(feature.geometry())[0])
+                if node is not None:
+                    sources.append((i, node))
+        network.finish()
+
+        area = ServiceArea(network, travel_cost)
+
+        profile.begin('Searching')
+        feedback.pushInfo(self.tr('Searching...'))
+        total = 100.0 / len(sources) if sources else 0
+        for current, (source_id, node) in enumerate(sources):
+            if feedback.isCanceled():
+                break
+            costs = area.add(source_id, node)
+            if polygon_sink:
+                hull = QgsGeometry.fromMultiPointXY([QgsPointXY(x, y) for x, y in area.outline(costs)]).convexHull()
+                if hull.type() == QgsWkbTypes.PolygonGeometry:
+                    polygon = QgsFeature(fields)
+                    polygon.setGeometry(hull)
+                    polygon.setAttributes([source_id, travel_cost])
+                    polygon_sink.addFeature(polygon, QgsFeatureSink.FastInsert)
+            profile.count(1)
+            feedback.setProgress(int((current + 1) * total))
+
+        profile.begin('Writing')
+        feedback.pushInfo(self.tr('Writing service area...'))
+        for link, low, high, cost, source_id in area.pieces():
+            if feedback.isCanceled():
+                break
+            feature = QgsFeature(fields)
+            feature.setGeometry(QgsGeometry.fromPolylineXY([
+                QgsPointXY(x, y) for x, y in cut_line(graph.link_points[link], low, high)
+            ]))
+            feature.setAttributes([int(source_id), float(cost)])
+            sink.addFeature(feature, QgsFeatureSink.FastInsert)
+
+        profile.finish()
+        result = {self.OUTPUT: dest_id, PROFILE_FILE: profile.trace_file}
+        if polygon_sink:
+            result[self.OUTPUT_POLYGONS] = polygon_dest_id
+        return result
+
+    def name(self):
+        return 'Service area (from point layer)'
+
+    def displayName(self):
+        return self.tr(self.name())
+
+    def group(self):
+        return self.tr(self.groupId())
+
+    def groupId(self):
+        return 'Data Management'
+
+    def tr(self, string):
+        return QCoreApplication.translate('Processing', string)
+
+    def createInstance(self):
+        return ServiceAreaAlgorithm()
+
+    def shortHelpString(self):
+        return self.tr(
+            'This algorithm computes the roads reachable from each point of the source layer within a travel cost, e.g. every road within 3 km or 0.1 hour of each dump. One bounded search is done per source. Each road piece is written with the minimum cost to reach it and the source reaching it first. Polygons enclosing the roads reached from each source may also be written.'
+        )
@@ -16,9 +16,13 @@ __date__ = '2022-03-11'
 __copyright__ = '(C) 2022 by Basil Eric Rabi'
 __revision__ = '$Format:%H$'
 
+from collections import Counter
 from processing import run # pyright: reportMissingImports=false
 from qgis.PyQt.QtCore import QCoreApplication
-from qgis.core import (QgsProcessing,
+from qgis.core import (QgsCoordinateTransform,
+                       QgsFields,
+                       QgsPointXY,
+                       QgsProcessing,
                        QgsProcessingAlgorithm,
                        QgsProcessingParameterBoolean,
                        QgsProcessingParameterDefinition,
@@ -26,14 +30,49 @@ from qgis.core import (QgsProcessing,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterFeatureSink,
                        QgsProcessingParameterField,
+                       QgsProcessingParameterFileDestination,
                        QgsProcessingParameterNumber,
                        QgsProcessingParameterRasterLayer,
                        QgsProcessingParameterString,
-                       QgsProject)
+                       QgsProcessingUtils,
+                       QgsWkbTypes)
+from .checkpoint import (CHUNK_SIZE,
+                         ChunkClock,
+                         add_checkpoint_parameters,
+                         routing_checkpoint)
+from .columnar import (COLUMNAR_FILE,
+                       ColumnarWriter,
+                       add_columnar_parameter,
+                       field_columns,
+                       linestring_wkb)
+from .dem import tiled_dem
+from .filters import add_filter_parameters, feature_request, is_filtered
+from .grades import (GRADE_THRESHOLDS,
+                     PROFILE_OUTPUT,
+                     ProfileArchive,
+                     add_grade_parameters,
+                     drape_paths,
+                     grade_fields,
+                     grade_thresholds)
+from .lib import point_parts
+from .path_store import PathStore, path_fields
+from .profiling import PROFILE, PROFILE_FILE, add_profile_parameters, profiler
+from .routing import (CostMatrix,
+                      Network,
+                      PathMirror,
+                      dijkstra,
+                      is_symmetric,
+                      line_length,
+                      pair_groups,
+                      path_arcs,
+                      road_graph,
+                      route_pairs)
+from .turns import TurnSearch, add_turn_parameters, turn_rules
 
 
 class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
 
+    COST_MATRIX = 'COST_MATRIX'
     DEFAULT_DIRECTION = 'DEFAULT_DIRECTION'
     DEFAULT_SPEED = 'DEFAULT_SPEED'
     DEM = 'DEM'
@@ -41,12 +80,14 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
     DESTINATION_FIELDS = 'DESTINATION_FIELDS'
     DIRECTION_FIELD = 'DIRECTION_FIELD'
     MANY_TO_MANY = 'MANY_TO_MANY'
+    NEAREST = 'NEAREST'
     OUTPUT = 'OUTPUT'
     ROAD = 'ROAD'
     SOURCE = 'SOURCE'
     SOURCE_FIELDS = 'SOURCE_FIELDS'
     SPEED_FIELD = 'SPEED_FIELD'
     STRATEGY = 'STRATEGY'
+    TOLERANCE = 'TOLERANCE'
     VALUE_BACKWARD = 'VALUE_BACKWARD'
     VALUE_BOTH = 'VALUE_BOTH'
     VALUE_FORWARD = 'VALUE_FORWARD'
@@ -90,6 +131,13 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
             ],
             defaultValue=0
         )
+        par_tolerance = QgsProcessingParameterNumber(
+            self.TOLERANCE,
+            self.tr('Topology tolerance'),
+            type=QgsProcessingParameterNumber.Double,
+            defaultValue=0,
+            minValue=0
+        )
         par_value_backward = QgsProcessingParameterString(
             self.VALUE_BACKWARD,
             self.tr('Value for backward direction'),
@@ -113,6 +161,7 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
         par_direction_field.setFlags(par_direction_field.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
         par_speed_field.setFlags(par_speed_field.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
         par_strategy.setFlags(par_strategy.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        par_tolerance.setFlags(par_tolerance.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
         par_value_backward.setFlags(par_value_backward.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
         par_value_both.setFlags(par_value_both.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
         par_value_forward.setFlags(par_value_forward.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
@@ -156,6 +205,15 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
                 defaultValue=True
             )
         )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.NEAREST,
+                self.tr('Only keep the nearest destinations of each source (0 to keep all, all combinations only)'),
+                type=QgsProcessingParameterNumber.Integer,
+                defaultValue=0,
+                minValue=0
+            )
+        )
         self.addParameter(
             QgsProcessingParameterFeatureSource(
                 self.ROAD,
@@ -184,28 +242,47 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
         self.addParameter(par_default_direction)
         self.addParameter(par_speed_field)
         self.addParameter(par_default_speed)
+        self.addParameter(par_tolerance)
+        add_turn_parameters(self)
+        add_grade_parameters(self)
+        add_columnar_parameter(self)
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.COST_MATRIX,
+                self.tr('Cost matrix'),
+                self.tr('NumPy archive (*.npz)'),
+                optional=True,
+                createByDefault=False
+            )
+        )
+        add_checkpoint_parameters(self)
+        add_filter_parameters(self, self.SOURCE)
+        add_profile_parameters(self)
 
     def processAlgorithm(self, parameters, context, feedback):
-        default_direction = self.parameterAsEnum(parameters, self.DEFAULT_DIRECTION, context)
-        default_speed = self.parameterAsDouble(parameters, self.DEFAULT_SPEED, context)
         dem = self.parameterAsRasterLayer(parameters, self.DEM, context)
         destination = self.parameterAsVectorLayer(parameters, self.DESTINATION, context)
         destination_fields = self.parameterAsFields(parameters, self.DESTINATION_FIELDS, context)
-        direction_field = self.parameterAsFields(parameters, self.DIRECTION_FIELD, context) or None
         many_to_many = self.parameterAsBool(parameters, self.MANY_TO_MANY, context)
+        nearest = self.parameterAsInt(parameters, self.NEAREST, context)
+        columnar_file = self.parameterAsFileOutput(parameters, COLUMNAR_FILE, context)
+        matrix_file = self.parameterAsFileOutput(parameters, self.COST_MATRIX, context)
+        profile_file = self.parameterAsFileOutput(parameters, PROFILE_OUTPUT, context)
         road = self.parameterAsVectorLayer(parameters, self.ROAD, context)
         source = self.parameterAsVectorLayer(parameters, self.SOURCE, context)
         source_fields = self.parameterAsFields(parameters, self.SOURCE_FIELDS, context)
-        speed_field = self.parameterAsFields(parameters, self.SPEED_FIELD, context) or None
-        strategy = self.parameterAsEnum(parameters, self.STRATEGY, context)
-        value_backward = self.parameterAsString(parameters, self.VALUE_BACKWARD, context)
-        value_both = self.parameterAsString(parameters, self.VALUE_BOTH, context)
-        value_forward = self.parameterAsString(parameters, self.VALUE_FORWARD, context)
-
-        if direction_field:
-            direction_field = direction_field[0]
-        if speed_field:
-            speed_field = speed_field[0]
+        thresholds = grade_thresholds(self, parameters, context)
+        profile = profiler(self, parameters, context, feedback)
+
+        # Only the filtered features are copied into memory layers, which
+        # then replace the inputs of the child algorithms. The road network
+        # is filtered as it is read into the routing graph.
+        destination_request = feature_request(self, parameters, context, destination, expression=False)
+        if is_filtered(destination_request):
+            destination = destination.materialize(destination_request)
+        source_request = feature_request(self, parameters, context, source)
+        if is_filtered(source_request):
+            source = source.materialize(source_request)
 
         field_flag = 0
         if (len(destination_fields) > 0):
@@ -213,6 +290,10 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
         if (len(source_fields) > 0):
             field_flag += 1
 
+        if nearest and not many_to_many:
+            feedback.reportError(self.tr(
+                'The number of nearest destinations only applies to all combinations, it is ignored.'
+            ))
         if destination.featureCount() > source.featureCount() and not many_to_many:
             raise Exception('Destination has more data than the source.')
         if destination.featureCount() < source.featureCount() and not many_to_many:
@@ -228,10 +309,45 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
         source_features = source.getFeatures()
         container = {}
         result = {}
-        layers = []
+        store = PathStore(road.sourceCrs(), context.transformContext())
         i = 0
         total = 100.0 / source.featureCount()
 
+        # The columnar file is written straight from the routing results,
+        # with the copied columns of the sources and destinations.
+        columnar = None
+        destination_indices = [destination.fields().indexFromName(name) for name in destination_fields]
+        destination_values = {}
+        source_indices = [source.fields().indexFromName(name) for name in source_fields]
+        source_values = {}
+        if columnar_file:
+            columnar = ColumnarWriter(
+                columnar_file,
+                [
+                    ('SOURCE_ID', 'int64'),
+                    ('DESTINATION_ID', 'int64'),
+                    ('start', 'string'),
+                    ('end', 'string'),
+                    ('cost', 'float64'),
+                    ('distance_2d_km', 'float64')
+                ]
+                + field_columns(source.fields(), source_fields, 'source_')
+                + field_columns(destination.fields(), destination_fields, 'destination_'),
+                'LineString',
+                road.sourceCrs().toWkt()
+            )
+
+        def add_path(points, source_id, destination_id, start, end, cost):
+            start, end = QgsPointXY(*start).toString(), QgsPointXY(*end).toString()
+            store.add(points, [destination_id, start, end, cost, source_id])
+            if columnar is not None:
+                columnar.add(
+                    [source_id, destination_id, start, end, cost, line_length(points) / 1000]
+                    + source_values[source_id] + destination_values[destination_id],
+                    linestring_wkb(points)
+                )
+
+        profile.begin('Preparing destinations')
         container['destination'] = run(
             'native:addautoincrementalfield',
             {
@@ -243,147 +359,221 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
             is_child_algorithm=True
         )['OUTPUT']
 
+        profile.begin('Analyzing network')
         feedback.pushInfo(self.tr('Analyzing network...'))
 
-        if many_to_many:
-            container['destination_geom'] = run(
-                'native:retainfields',
-                {
-                    'INPUT': container['destination'],
-                    'FIELDS': ['DESTINATION_ID'],
-                    'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-                },
-                context=context,
-                is_child_algorithm=True
-            )['OUTPUT']
+        # Roads with restricted turns keep their own links, and so do roads
+        # meeting at an angle costed or forbidden, so that the rules apply to
+        # their junctions.
+        rules = turn_rules(self, parameters, context)
+        network = Network(road_graph(
+            self, parameters, context, feedback, rules and rules.features(), rules and rules.max_bend()
+        ))
 
-            for source_feature in source_features:
+        if many_to_many:
+            targets = {}
+            for destination_id, destination_feature in enumerate(destination_features):
+                if columnar is not None:
+                    attributes = destination_feature.attributes()
+                    destination_values[destination_id] = [attributes[index] for index in destination_indices]
+                if destination_feature.hasGeometry():
+                    point = point_parts(destination_feature.geometry())[0]
+                    node = network.tie(point)
+                    if node is not None:
+                        targets.setdefault(node, []).append((destination_id, point))
+            starts = []
+            for source_id, source_feature in enumerate(source_features):
+                if columnar is not None:
+                    attributes = source_feature.attributes()
+                    source_values[source_id] = [attributes[index] for index in source_indices]
                 if source_feature.hasGeometry():
-                    if feedback.isCanceled():
-                        result['OUTPUT'] = None
-                        return result
-                    try:
-                        paths = run(
-                            'native:shortestpathpointtolayer',
-                            {
-                                'DEFAULT_DIRECTION': default_direction,
-                                'DEFAULT_SPEED': default_speed,
-                                'DIRECTION_FIELD': direction_field,
-                                'END_POINTS': container['destination_geom'],
-                                'INPUT': parameters[self.ROAD],
-                                'SPEED_FIELD': speed_field,
-                                'START_POINT': source_feature.geometry(),
-                                'STRATEGY': strategy,
-                                'TOLERANCE': 0,
-                                'VALUE_BACKWARD': value_backward,
-                                'VALUE_BOTH': value_both,
-                                'VALUE_FORWARD': value_forward,
-                                'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-                            },
-                            context=context,
-                            is_child_algorithm=True
-                        )['OUTPUT']
-
-                        path_output = run(
-                            'native:fieldcalculator',
-                            {
-                                'FIELD_LENGTH': 0,
-                                'FIELD_NAME': 'SOURCE_ID',
-                                'FIELD_PRECISION': 0,
-                                'FIELD_TYPE': 1,
-                                'FORMULA': f'{i}',
-                                'INPUT': paths,
-                                'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-                            },
-                            context=context,
-                            is_child_algorithm=True
-                        )['OUTPUT']
-                        layers.append(path_output)
-                    except:
-                        pass
-                i += 1
+                    point = point_parts(source_feature.geometry())[0]
+                    node = network.tie(point)
+                    if node is not None:
+                        starts.append((source_id, node, point))
+            network.finish()
+            turns = TurnSearch(network, rules) if rules else None
+            store.open(path_fields(), QgsWkbTypes.LineString)
+            component_targets = {}
+            for node, ends in targets.items():
+                component_targets.setdefault(network.node_component[node], {})[node] = ends
+
+            # On a network whose roads all go both ways, without turn rules,
+            # the cost from a node to another is the cost back. Each pair of
+            # source nodes is then searched once, the arcs of the paths found
+            # to sources not searched yet being kept, up to the limit of the
+            # mirror, and given back reversed to them.
+            symmetric = turns is None and not nearest and is_symmetric(network.graph)
+            if symmetric:
+                feedback.pushInfo(self.tr('Symmetric network, each pair of sources is searched once.'))
+            matrix = CostMatrix(symmetric) if matrix_file else None
+            start_counts = Counter(node for _, node, _ in starts)
+            searched = set()
+            mirror = PathMirror()
+
+            def done(node):
+                searched.add(node)
+                start_counts[node] -= 1
+                if not start_counts[node]:
+                    mirror.drop(node)
+
+            # Sources are routed by chunks, whose paths are saved to the
+            # checkpoint folder if given, so that an interrupted run resumes
+            # after the last finished chunk.
+            chunk_size = self.parameterAsInt(parameters, CHUNK_SIZE, context)
+            checkpoint = routing_checkpoint(
+                self, parameters, context, [source, destination, road],
+                {self.SOURCE, self.DESTINATION, self.ROAD, self.OUTPUT, self.DEM, self.COST_MATRIX,
+                 COLUMNAR_FILE, GRADE_THRESHOLDS, PROFILE_OUTPUT, PROFILE, PROFILE_FILE}
+            )
+            clock = ChunkClock(len(starts))
+            for chunk, start in enumerate(range(0, len(starts), chunk_size)):
+                chunk_starts = starts[start:start + chunk_size]
+                if checkpoint is not None and checkpoint.finished(chunk):
+                    records = checkpoint.load(chunk)
+                    # The arcs of loaded paths are not saved, so their pairs
+                    # are searched again by the following sources.
+                    for _, node, _ in chunk_starts:
+                        done(node)
+                    if matrix is not None:
+                        for node, target, *_, cost in records:
+                            matrix.add(node, target, cost)
+                    clock.stop(len(chunk_starts), timed=False)
+                else:
+                    records = []
+                    clock.start()
+                    for source_id, node, point in chunk_starts:
+                        if feedback.isCanceled():
+                            result['OUTPUT'] = None
+                            return result
+                        # Destinations in other components of the network
+                        # cannot be reached, so sources without any are not
+                        # searched at all.
+                        targets = component_targets.get(network.node_component[node]) or {}
+                        known = {
+                            target: found for target, found in mirror.known(node).items()
+                            if target in targets
+                        }
+                        searched_targets = {target: ends for target, ends in targets.items() if target not in known}
+                        settled, previous = {}, {}
+                        # With `nearest` set the search stops once that many
+                        # destinations are settled.
+                        if searched_targets and turns is not None:
+                            settled, previous = turns.dijkstra(node, targets=searched_targets, count=nearest)
+                        elif searched_targets:
+                            settled, previous = dijkstra(network, node, targets=searched_targets, count=nearest)
+                        reached = sorted(
+                            [
+                                (settled[target], destination_id, target, end)
+                                for target in settled if target in searched_targets
+                                for destination_id, end in targets[target]
+                            ] + [
+                                (cost, destination_id, target, end)
+                                for target, (cost, _) in known.items()
+                                for destination_id, end in targets[target]
+                            ]
+                        )
+                        done(node)
+                        paths = {}
+                        for cost, destination_id, target, end in reached[:nearest or None]:
+                            if target not in paths:
+                                if target in known:
+                                    points = network.path_points(known[target][1])[::-1]
+                                else:
+                                    if turns is not None:
+                                        arcs = turns.path_arcs(previous, target)
+                                    else:
+                                        arcs = path_arcs(network, previous, target)
+                                    points = network.path_points(arcs)
+                                    if (symmetric and target in start_counts and target not in searched
+                                            and not mirror.full and not mirror.keep(target, node, cost, arcs)):
+                                        feedback.pushInfo(self.tr(
+                                            'Too many paths kept for the following sources, '
+                                            'the remaining pairs are searched both ways.'
+                                        ))
+                                if matrix is not None:
+                                    matrix.add(node, target, cost)
+                                paths[target] = points or [network.coords[target]] * 2
+                            records.append((
+                                node, target, paths[target], source_id, destination_id, point, end, cost
+                            ))
+                        i += 1
+                        profile.count(1)
+                        feedback.setProgress(int(i * total))
+                    if checkpoint is not None:
+                        checkpoint.commit(chunk, records)
+                    clock.stop(len(chunk_starts))
+                for record in records:
+                    add_path(*record[2:])
+                i = clock.done
                 feedback.setProgress(int(i * total))
-                feedback.pushInfo(f'Processed {i} out of {source.featureCount()} sources.')
+                feedback.pushInfo(clock.report())
+            if checkpoint is not None:
+                checkpoint.clear()
+            if matrix is not None:
+                source_nodes = [-1] * source.featureCount()
+                for source_id, node, _ in starts:
+                    source_nodes[source_id] = node
+                destination_nodes = [-1] * destination.featureCount()
+                for node_targets in component_targets.values():
+                    for node, ends in node_targets.items():
+                        for destination_id, _ in ends:
+                            destination_nodes[destination_id] = node
+                matrix.save(matrix_file, source_nodes, destination_nodes)
+                result[self.COST_MATRIX] = matrix_file
+                feedback.pushInfo(f'Cost matrix of {len(matrix.costs)} node pairs.')
 
         else:
-            for destination_feature, source_feature in zip(destination_features, source_features):
+            pairs = []
+            ends = {}
+            for pair_id, (destination_feature, source_feature) in enumerate(zip(destination_features, source_features)):
+                if columnar is not None:
+                    attributes = destination_feature.attributes()
+                    destination_values[pair_id] = [attributes[index] for index in destination_indices]
+                    attributes = source_feature.attributes()
+                    source_values[pair_id] = [attributes[index] for index in source_indices]
+                if destination_feature.hasGeometry() and source_feature.hasGeometry():
+                    point = point_parts(source_feature.geometry())[0]
+                    end = point_parts(destination_feature.geometry())[0]
+                    node = network.tie(point)
+                    target = network.tie(end)
+                    if node is not None and target is not None:
+                        pairs.append((pair_id, node, target))
+                        ends[pair_id] = (point, end)
+            network.finish()
+            turns = TurnSearch(network, rules) if rules else None
+            store.open(path_fields(), QgsWkbTypes.LineString)
+            # Pairs sharing a source, or a destination, are answered by the
+            # same search.
+            reverse, groups = pair_groups(pairs)
+            feedback.pushInfo(f'Routing {len(pairs)} pairs with {len(groups)} searches.')
+
+            for pair_id, cost, arcs in route_pairs(network, reverse, groups, turns):
                 if feedback.isCanceled():
                     result['OUTPUT'] = None
                     return result
-                try:
-                    paths = run(
-                        'native:shortestpathpointtopoint',
-                        {
-                            'DEFAULT_DIRECTION': default_direction,
-                            'DEFAULT_SPEED': default_speed,
-                            'DIRECTION_FIELD': direction_field,
-                            'END_POINT': destination_feature.geometry(),
-                            'INPUT': parameters[self.ROAD],
-                            'SPEED_FIELD': speed_field,
-                            'START_POINT': source_feature.geometry(),
-                            'STRATEGY': strategy,
-                            'TOLERANCE': 0,
-                            'VALUE_BACKWARD': value_backward,
-                            'VALUE_BOTH': value_both,
-                            'VALUE_FORWARD': value_forward,
-                            'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-                        },
-                        context=context,
-                        is_child_algorithm=True
-                    )['OUTPUT']
-                    path_with_source = run(
-                        'native:fieldcalculator',
-                        {
-                            'FIELD_LENGTH': 0,
-                            'FIELD_NAME': 'SOURCE_ID',
-                            'FIELD_PRECISION': 0,
-                            'FIELD_TYPE': 1,
-                            'FORMULA': f'{i}',
-                            'INPUT': paths,
-                            'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-                        },
-                        context=context,
-                        is_child_algorithm=True
-                    )['OUTPUT']
-                    path_with_destination = run(
-                        'native:fieldcalculator',
-                        {
-                            'FIELD_LENGTH': 0,
-                            'FIELD_NAME': 'DESTINATION_ID',
-                            'FIELD_PRECISION': 0,
-                            'FIELD_TYPE': 1,
-                            'FORMULA': f'{i}',
-                            'INPUT': path_with_source,
-                            'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-                        },
-                        context=context,
-                        is_child_algorithm=True
-                    )['OUTPUT']
-                    layers.append(path_with_destination)
-                except:
-                    pass
+                if arcs is not None:
+                    point, end = ends[pair_id]
+                    add_path(network.path_points(arcs) or [point, end], pair_id, pair_id, point, end, cost)
                 i += 1
+                profile.count(1)
                 feedback.setProgress(int(i * total))
-                feedback.pushInfo(f'Processed {i} out of {source.featureCount()} sources.')
+            feedback.pushInfo(f'Processed {i} out of {source.featureCount()} sources.')
 
-        feedback.pushInfo(self.tr('Merging paths...'))
-        container['mergevectorlayers'] = run(
-            'native:mergevectorlayers',
-            {
-                'LAYERS': layers,
-                'CRS': QgsProject.instance().crs(),
-                'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-            },
-            context=context,
-            feedback=feedback,
-            is_child_algorithm=True
-        )['OUTPUT']
+        profile.begin('Writing paths')
+        feedback.pushInfo(self.tr('Writing paths...'))
+        if columnar is not None:
+            result[COLUMNAR_FILE] = columnar.close()
+        container['paths'] = store.close()
+        if not store.count:
+            raise Exception('No path found between the sources and the destinations.')
+        feedback.pushInfo(f'Found {store.count} paths.')
 
         if field_flag == 0:
             container['multiline'] = run(
                 'native:deletecolumn',
                 {
-                    'INPUT': container['mergevectorlayers'],
+                    'INPUT': container['paths'],
                     'COLUMN': ['layer', 'path', 'DESTINATION_ID', 'SOURCE_ID'],
                     'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
                 },
@@ -393,6 +583,7 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
             )['OUTPUT']
 
         else:
+            profile.begin('Joining fields')
             feedback.pushInfo(self.tr('Joining fields...'))
 
             if field_flag in [1, 3]:
@@ -411,7 +602,7 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
                 container['path_source'] = run(
                     'native:joinattributestable',
                     {
-                        'INPUT': container['mergevectorlayers'],
+                        'INPUT': container['paths'],
                         'FIELD': 'SOURCE_ID',
                         'INPUT_2': container['source'],
                         'FIELD_2': 'SOURCE_ID',
@@ -443,7 +634,7 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
                     container['path_destination'] = run(
                         'native:joinattributestable',
                         {
-                            'INPUT': container['mergevectorlayers'],
+                            'INPUT': container['paths'],
                             'FIELD': 'DESTINATION_ID',
                             'INPUT_2': container['destination'],
                             'FIELD_2': 'DESTINATION_ID',
@@ -497,6 +688,7 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
                     is_child_algorithm=True
                 )['OUTPUT']
 
+        profile.begin('Converting to single part geometry')
         feedback.pushInfo(self.tr('Converting to single part geometry...'))
         container['singleline'] = run(
             'native:multiparttosingleparts',
@@ -510,6 +702,7 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
         )['OUTPUT']
 
         if not dem:
+            profile.begin('Computing 2D distance')
             feedback.pushInfo(self.tr('Computing 2D distance...'))
             result['OUTPUT'] = run(
                 'native:fieldcalculator',
@@ -527,8 +720,11 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
                 is_child_algorithm=True
             )['OUTPUT']
 
+            profile.finish()
+            result[PROFILE_FILE] = profile.trace_file
             return result
 
+        profile.begin('Computing 2D distance')
         feedback.pushInfo(self.tr('Computing 2D distance...'))
         container['2d'] = run(
             'native:fieldcalculator',
@@ -546,39 +742,33 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
             is_child_algorithm=True
         )['OUTPUT']
 
-        feedback.pushInfo(self.tr('Draping...'))
-        container['3d'] = run(
-            'native:setzfromraster',
-            {
-                'BAND': 1,
-                'INPUT': container['2d'],
-                'NODATA': 0,
-                'RASTER': parameters[self.DEM],
-                'SCALE': 1,
-                'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-            },
-            context=context,
-            feedback=feedback,
-            is_child_algorithm=True
-        )['OUTPUT']
-
-        feedback.pushInfo(self.tr('Computing 3D distance...'))
-        result['OUTPUT'] = run(
-            'native:fieldcalculator',
-            {
-                'FIELD_LENGTH': 0,
-                'FIELD_NAME': 'distance_3d_km',
-                'FIELD_PRECISION': 3,
-                'FIELD_TYPE': 0,
-                'FORMULA': 'length3D($geometry) / 1000',
-                'INPUT': container['3d'],
-                'OUTPUT': parameters['OUTPUT']
-            },
-            context=context,
-            feedback=feedback,
-            is_child_algorithm=True
-        )['OUTPUT']
+        profile.begin('Draping')
+        feedback.pushInfo(self.tr('Draping and computing grades...'))
+        paths = QgsProcessingUtils.mapLayerFromString(container['2d'], context)
+        fields = QgsFields(paths.fields())
+        for field in grade_fields(thresholds):
+            fields.append(field)
+        sink, result['OUTPUT'] = self.parameterAsSink(
+            parameters, self.OUTPUT, context, fields, QgsWkbTypes.addZ(paths.wkbType()), paths.sourceCrs()
+        )
+        # Only the DEM tiles under the paths are read, and kept for the
+        # following paths.
+        elevation = tiled_dem(dem)
+        transform = None
+        if dem.crs() != paths.sourceCrs():
+            transform = QgsCoordinateTransform(paths.sourceCrs(), dem.crs(), context.transformContext())
+        archive = ProfileArchive() if profile_file else None
+        drape_paths(
+            paths.getFeatures(), sink, fields, elevation, thresholds, feedback, archive,
+            100.0 / paths.featureCount() if paths.featureCount() else 0, transform
+        )
+        elevation.report(feedback)
+        if archive is not None:
+            archive.save(profile_file)
+            result[PROFILE_OUTPUT] = profile_file
 
+        profile.finish()
+        result[PROFILE_FILE] = profile.trace_file
         return result
 
     def name(self):
@@ -601,5 +791,5 @@ class ShortestPathPointLayerAlgorithm(QgsProcessingAlgorithm):
 
     def shortHelpString(self):
         return self.tr(
-            'This algorithm computes the shortest routes between given start and end points layers. If a raster DEM layer is given, also drapes the resulting paths into the DEM.'
+            'This algorithm computes the shortest routes between given start and end points layers. If a raster DEM layer is given, also drapes the resulting paths into the DEM and computes their total rise and fall, maximum grade and length steeper than each grade threshold, optionally saving their elevation profiles. When all combinations are computed, only the nearest destinations of each source may be kept, in which case each search stops as soon as they are found. Turns at road junctions may be given a cost in proportion to their angle, forbidden above a maximum angle, or forbidden between given roads. The turn cost is added to the path cost, so it is in map units for the shortest path and in hours for the fastest. The paths may also be written to an Arrow IPC or GeoParquet file, with their 2D length and the copied columns, straight from the routing results. Sources are routed by chunks, reporting the time left from the measured throughput; if a checkpoint folder is given, finished chunks are saved there and an interrupted or cancelled run resumes after the last of them. When every road goes both ways at the same cost and turns are free, each pair of sources is searched only once. The costs found may also be saved as a sparse matrix between the network nodes of the sources and destinations, keeping each pair once on such networks.'
         )
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import heapq
+from collections import Counter
+from qgis.core import (QgsFeatureRequest,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterEnum,
+                       QgsProcessingParameterNumber)
+
+SIMPLIFY_METHOD = 'SIMPLIFY_METHOD'
+SIMPLIFY_TOLERANCE = 'SIMPLIFY_TOLERANCE'
+
+# Simplification methods, in the order shown in the algorithm dialogs
+METHOD_DOUGLAS_PEUCKER = 0
+METHOD_VISVALINGAM = 1
+
+
+def douglas_peucker(points, tolerance):
+    """
+    Returns the mask of the vertices of the (n, 2) array `points` kept by
+    Douglas-Peucker. The first and last vertices are always kept.
+    """
+    import numpy as np
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start = points[first]
+        inner = points[first + 1:last] - start
+        dx, dy = points[last] - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distances = np.abs(dx * inner[:, 1] - dy * inner[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            index += first + 1
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return keep
+
+
+def visvalingam(points, tolerance):
+    """
+    Returns the mask of the vertices of the (n, 2) array `points` kept by
+    Visvalingam-Whyatt. Vertices whose effective area is below the square of
+    `tolerance` are removed. The first and last vertices are always kept.
+    """
+    import numpy as np
+    count = len(points)
+    keep = np.ones(count, dtype=bool)
+    if count < 3:
+        return keep
+    a, b, c = points[:-2], points[1:-1], points[2:]
+    areas = [0.0] + (np.abs(
+        (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    ) / 2).tolist() + [0.0]
+    coords = points.tolist()
+    previous = list(range(-1, count - 1))
+    following = list(range(1, count + 1))
+    heap = [(area, i) for i, area in enumerate(areas[1:-1], 1)]
+    heapq.heapify(heap)
+    threshold = tolerance * tolerance
+
+    while heap:
+        area, i = heapq.heappop(heap)
+        if not keep[i] or area != areas[i]:
+            continue
+        if area >= threshold:
+            break
+        keep[i] = False
+        before, after = previous[i], following[i]
+        following[before] = after
+        previous[after] = before
+        for j in (before, after):
+            if 0 < j < count - 1:
+                (x1, y1), (x2, y2), (x3, y3) = coords[previous[j]], coords[j], coords[following[j]]
+                # The effective area never decreases so that removing a vertex
+                # cannot bring back one that was kept.
+                areas[j] = max(abs((x2 - x1) * (y3 - y1) - (x3 - x1) * (y2 - y1)) / 2, area)
+                heapq.heappush(heap, (areas[j], j))
+    return keep
+
+
+METHODS = [douglas_peucker, visvalingam]
+
+
+class NullSimplifier(object):
+    """
+    Leaves the geometries unchanged when no tolerance is given.
+    """
+
+    def simplify(self, parts):
+        return parts
+
+    def report(self, feedback):
+        pass
+
+
+NULL_SIMPLIFIER = NullSimplifier()
+
+
+class Simplifier(object):
+    """
+    Simplifies rings and polylines while preserving the boundaries shared by
+    adjacent features. Vertices where more than two edges of the layer meet
+    are kept as nodes and each chain between nodes is simplified in the same
+    direction whichever feature it belongs to, so neighbours get the same
+    simplified boundary.
+    """
+
+    def __init__(self, tolerance, method=METHOD_DOUGLAS_PEUCKER):
+        # NumPy is only imported once a tolerance is given so that loading the
+        # plugin does not pay for it.
+        import numpy
+        self.array = numpy.array
+        self.method = METHODS[method]
+        self.tolerance = tolerance
+        self.nodes = set()
+        self.vertices_before = 0
+        self.vertices_after = 0
+
+    def prepare(self, parts_list):
+        """
+        Finds the nodes of the layer given the parts of all its features.
+        """
+        edges = set()
+        for parts in parts_list:
+            for part in parts:
+                edges.update(
+                    (a, b) if a < b else (b, a)
+                    for a, b in zip(part, part[1:]) if a != b
+                )
+        degrees = Counter(vertex for edge in edges for vertex in edge)
+        self.nodes = {vertex for vertex, degree in degrees.items() if degree > 2}
+
+    def simplify_chain(self, chain):
+        if len(chain) < 3:
+            return chain
+        reverse = chain[-1] < chain[0] or (chain[-1] == chain[0] and chain[-2] < chain[1])
+        if reverse:
+            chain = chain[::-1]
+        keep = self.method(self.array(chain, dtype=float), self.tolerance)
+        chain = [point for point, kept in zip(chain, keep.tolist()) if kept]
+        return chain[::-1] if reverse else chain
+
+    def simplify_part(self, part):
+        nodes = self.nodes
+        closed = len(part) > 3 and part[0] == part[-1]
+        if closed:
+            points = part[:-1]
+            anchors = [i for i, point in enumerate(points) if point in nodes]
+            start = anchors[0] if anchors else points.index(min(points))
+            points = points[start:] + points[:start + 1]
+        else:
+            points = part
+        anchors = [0] + [i for i, point in enumerate(points[1:-1], 1) if point in nodes] + [len(points) - 1]
+
+        simplified = [points[0]]
+        for first, last in zip(anchors, anchors[1:]):
+            simplified.extend(self.simplify_chain(points[first:last + 1])[1:])
+        if closed and len(simplified) < 4:
+            return part
+        return simplified
+
+    def simplify(self, parts):
+        """
+        Returns the simplified parts of one feature.
+        """
+        simplified = [self.simplify_part(part) for part in parts]
+        self.vertices_before += sum(len(part) for part in parts)
+        self.vertices_after += sum(len(part) for part in simplified)
+        return simplified
+
+    def report(self, feedback):
+        removed = 100.0 * (1 - self.vertices_after / self.vertices_before) if self.vertices_before else 0
+        feedback.pushInfo(
+            f'Simplified {self.vertices_before} vertices to {self.vertices_after} ({removed:.1f}% removed).'
+        )
+
+
+def add_simplify_parameters(alg):
+    """
+    Adds the simplification tolerance and method parameters to `alg`.
+    """
+    alg.addParameter(
+        QgsProcessingParameterNumber(
+            SIMPLIFY_TOLERANCE,
+            alg.tr('Simplification tolerance in map units (0 to keep every vertex)'),
+            type=QgsProcessingParameterNumber.Double,
+            defaultValue=0,
+            minValue=0
+        )
+    )
+    par_method = QgsProcessingParameterEnum(
+        SIMPLIFY_METHOD,
+        alg.tr('Simplification method'),
+        options=[
+            alg.tr('Douglas-Peucker (distance)'),
+            alg.tr('Visvalingam-Whyatt (area)')
+        ],
+        defaultValue=METHOD_DOUGLAS_PEUCKER
+    )
+    par_method.setFlags(par_method.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    alg.addParameter(par_method)
+
+
+def simplifier(alg, parameters, context, source, parts, request=None):
+    """
+    Returns the simplifier requested in the parameters of `alg`, prepared
+    with the geometries of the features of `source` selected by `request`.
+    `parts` converts a geometry into the list of its rings or polylines.
+    """
+    tolerance = alg.parameterAsDouble(parameters, SIMPLIFY_TOLERANCE, context)
+    if tolerance <= 0:
+        return NULL_SIMPLIFIER
+    result = Simplifier(tolerance, alg.parameterAsEnum(parameters, SIMPLIFY_METHOD, context))
+    if request is None:
+        request = QgsFeatureRequest().setNoAttributes()
+    result.prepare(
+        parts(feature.geometry())
+        for feature in source.getFeatures(request) if feature.hasGeometry()
+    )
+    return result
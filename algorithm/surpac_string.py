@@ -16,13 +16,19 @@ __date__ = '2023-01-12'
 __copyright__ = '(C) 2023 by Basil Eric Rabi'
 __revision__ = '$Format:%H$'
 
-from datetime import date
 from qgis.PyQt.QtCore import QCoreApplication
 from qgis.core import (QgsProcessing,
                        QgsProcessingAlgorithm,
                        QgsProcessingParameterFeatureSource,
                        QgsProcessingParameterField,
                        QgsProcessingParameterFileDestination)
+from .filters import add_filter_parameters, feature_request
+from .lib import polygon_rings
+from .manifest import add_manifest_parameter, export_manifest
+from .precision import add_precision_parameter, coordinate_precision
+from .profiling import PROFILE_FILE, add_profile_parameters, profiler
+from .simplify import add_simplify_parameters, simplifier
+from .writers import SurpacStringWriter
 
 
 class ExportPolygonToSurpacStringAlgorithm(QgsProcessingAlgorithm):
@@ -55,53 +61,64 @@ class ExportPolygonToSurpacStringAlgorithm(QgsProcessingAlgorithm):
                 optional=False
             )
         )
+        add_filter_parameters(self)
+        add_simplify_parameters(self)
+        add_precision_parameter(self)
+        add_manifest_parameter(self)
+        add_profile_parameters(self)
 
     def processAlgorithm(self, parameters, context, feedback):
         str_file = self.parameterAsFile(parameters, self.FILENAME, context)
         if str_file[-4:] != '.str':
             str_file += '.str'
         source = self.parameterAsSource(parameters, self.INPUT, context)
+        precision = coordinate_precision(self, parameters, context)
+        profile = profiler(self, parameters, context, feedback)
+        manifest = export_manifest(self, parameters, context, source, str_file)
+        if manifest is not None and manifest.unchanged():
+            feedback.pushInfo(self.tr(f'Input and parameters unchanged since the last export to {str_file}, skipped.'))
+            profile.finish()
+            return {self.FILENAME: str_file, PROFILE_FILE: profile.trace_file}
         fields = self.parameterAsFields(parameters, self.LAYER_FIELD, context)
+        field_indices = [source.fields().indexFromName(field) for field in fields]
 
+        profile.begin('topology')
+        simplify = simplifier(
+            self, parameters, context, source, polygon_rings,
+            feature_request(self, parameters, context, source, [])
+        )
         total = 100.0 / source.featureCount() if source.featureCount() else 0
-        features = source.getFeatures()
+        features = source.getFeatures(
+            feature_request(self, parameters, context, source, fields)
+        )
 
         if total > 0:
             with open(str_file, 'w') as fstream:
-                fstream.write(f'polygon,{date.today().strftime("%d-%b-%y")},,ssi_styles:arcinfo.ssi\n')
-                fstream.write('0, 0.000, 0.000, 0.000, 0.000, 0.000, 0.000\n')
-                str_id = 1
+                writer = SurpacStringWriter(fstream, precision)
 
+                profile.begin('read')
                 for current, feature in enumerate(features):
                     if feedback.isCanceled():
                         break
 
                     if feature.hasGeometry():
-                        if feature.geometry().isMultipart():
-                            geom = feature.geometry().asMultiPolygon()
-                        else:
-                            geom = [feature.geometry().asPolygon()]
-                        for multi_polygon in geom:
-                            for polygon in multi_polygon:
-                                has_attributes = False
-                                for point in polygon:
-                                    if not has_attributes:
-                                        fstream.write(f'{str_id}, {point.y()}, {point.x()}, 0, ')
-                                        for field in fields:
-                                            fstream.write(f'{feature.attribute(field)}, ')
-                                        fstream.write('\n')
-                                        has_attributes = True
-                                    else:
-                                        fstream.write(f'{str_id}, {point.y()}, {point.x()}, 0,\n')
-                                fstream.write('0, 0, 0, 0,\n')
-                        str_id += 1
-                        fstream.flush()
+                        rings = simplify.simplify(polygon_rings(feature.geometry()))
+                        profile.count(1, rings)
+                        profile.begin('encode')
+                        attributes = feature.attributes()
+                        writer.write(rings, [attributes[i] for i in field_indices])
+                        profile.begin('read')
 
                     feedback.setProgress(int(current * total))
 
-                fstream.write('0, 0.000, 0.000, 0.000, END')
+                simplify.report(feedback)
+                profile.begin('save')
+                writer.close()
+            if manifest is not None and not feedback.isCanceled():
+                manifest.save([str_file])
 
-        return {self.FILENAME: str_file}
+        profile.finish()
+        return {self.FILENAME: str_file, PROFILE_FILE: profile.trace_file}
 
     def name(self):
         return 'Export polygon to Surpac string'
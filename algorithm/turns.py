@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import heapq
+import math
+from qgis.core import (QgsFeatureRequest,
+                       QgsProcessing,
+                       QgsProcessingParameterDefinition,
+                       QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterField,
+                       QgsProcessingParameterNumber)
+
+MAX_TURN_ANGLE = 'MAX_TURN_ANGLE'
+RESTRICTED_TURNS = 'RESTRICTED_TURNS'
+TURN_FROM_FIELD = 'TURN_FROM_FIELD'
+TURN_PENALTY = 'TURN_PENALTY'
+TURN_TO_FIELD = 'TURN_TO_FIELD'
+
+
+def add_turn_parameters(alg):
+    """
+    Adds the turn penalty, the maximum turning angle and the restricted turns
+    table parameters to `alg`.
+    """
+    par_penalty = QgsProcessingParameterNumber(
+        TURN_PENALTY,
+        alg.tr('Cost of a U-turn (map units for shortest, hours for fastest), turns costing in proportion to their angle'),
+        type=QgsProcessingParameterNumber.Double,
+        defaultValue=0,
+        minValue=0
+    )
+    par_angle = QgsProcessingParameterNumber(
+        MAX_TURN_ANGLE,
+        alg.tr('Maximum turning angle in degrees'),
+        type=QgsProcessingParameterNumber.Double,
+        defaultValue=180,
+        minValue=0,
+        maxValue=180
+    )
+    par_restricted = QgsProcessingParameterFeatureSource(
+        RESTRICTED_TURNS,
+        alg.tr('Restricted turns table'),
+        [QgsProcessing.TypeVector],
+        optional=True
+    )
+    par_from = QgsProcessingParameterField(
+        TURN_FROM_FIELD,
+        alg.tr('Column of the feature id of the road turned from'),
+        defaultValue='from_id',
+        parentLayerParameterName=RESTRICTED_TURNS,
+        optional=True
+    )
+    par_to = QgsProcessingParameterField(
+        TURN_TO_FIELD,
+        alg.tr('Column of the feature id of the road turned to'),
+        defaultValue='to_id',
+        parentLayerParameterName=RESTRICTED_TURNS,
+        optional=True
+    )
+    for parameter in [par_penalty, par_angle, par_restricted, par_from, par_to]:
+        parameter.setFlags(parameter.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        alg.addParameter(parameter)
+
+
+class TurnRules(object):
+    """
+    Turns allowed between roads. A turn costs `penalty` times its angle over
+    180 degrees, turns sharper than `max_angle` are forbidden, and so are the
+    turns from a road to another in `restricted`, pairs of feature ids.
+    """
+
+    def __init__(self, penalty=0.0, max_angle=180.0, restricted=()):
+        self.penalty = penalty
+        self.max_angle = max_angle
+        self.restricted = set(restricted)
+
+    def features(self):
+        """
+        Returns the features involved in restricted turns.
+        """
+        return {feature for turn in self.restricted for feature in turn}
+
+    def max_bend(self):
+        """
+        Returns the angle above which the junction of two roads is a turn
+        costed or forbidden by the rules, None if angles are free.
+        """
+        if self.penalty > 0:
+            return 0.0
+        if self.max_angle < 180:
+            return self.max_angle
+        return None
+
+
+def turn_rules(alg, parameters, context):
+    """
+    Returns the `TurnRules` given in the parameters of `alg`, or None if
+    turns are free.
+    """
+    penalty = alg.parameterAsDouble(parameters, TURN_PENALTY, context)
+    max_angle = alg.parameterAsDouble(parameters, MAX_TURN_ANGLE, context)
+    table = alg.parameterAsSource(parameters, RESTRICTED_TURNS, context)
+    restricted = []
+    if table is not None:
+        columns = [
+            (alg.parameterAsFields(parameters, name, context) or [default])[0]
+            for name, default in [(TURN_FROM_FIELD, 'from_id'), (TURN_TO_FIELD, 'to_id')]
+        ]
+        indices = [table.fields().indexFromName(column) for column in columns]
+        if -1 in indices:
+            raise Exception(f'The restricted turns table needs the columns {columns}.')
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes(indices)
+        for feature in table.getFeatures(request):
+            try:
+                restricted.append(tuple(int(feature.attributes()[i]) for i in indices))
+            except (TypeError, ValueError):
+                pass
+    if penalty <= 0 and max_angle >= 180 and not restricted:
+        return None
+    return TurnRules(penalty, max_angle, restricted)
+
+
+def heading(points, end=False):
+    """
+    Returns the direction in which the polyline `points` starts, or ends if
+    `end` is set, as a unit vector. None if the polyline has no length.
+    """
+    points = points[::-1] if end else points
+    x1, y1 = points[0]
+    for x2, y2 in points[1:]:
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length > 0:
+            return ((x1 - x2) / length, (y1 - y2) / length) if end else ((x2 - x1) / length, (y2 - y1) / length)
+    return None
+
+
+def turn_angle(end, start):
+    """
+    Returns the angle in degrees between the directions `end` and `start`,
+    0 going straight on and 180 for a U-turn.
+    """
+    if end is None or start is None:
+        return 0.0
+    return math.degrees(math.acos(max(-1.0, min(1.0, end[0] * start[0] + end[1] * start[1]))))
+
+
+class TurnSearch(object):
+    """
+    Edge-based search on a tied network: the states are the arcs rather than
+    the nodes, so that the cost of going from one arc to the next may depend
+    on the turn. The turns allowed after each arc and their cost are built
+    once, when the search is created, and shared by every search.
+    """
+
+    def __init__(self, network, rules):
+        self.network = network
+        features = network.graph.link_feature
+        features = [features[link] for link in network.arc_link]
+        headings = [
+            (heading(points), heading(points, end=True))
+            for points in map(network.arc_points, range(len(network.arc_to)))
+        ]
+        self.successors = [[] for _ in network.arc_to]
+        self.predecessors = [[] for _ in network.arc_to]
+        for a, v in enumerate(network.arc_to):
+            for b in network.out[v]:
+                if (features[a], features[b]) in rules.restricted:
+                    continue
+                angle = turn_angle(headings[a][1], headings[b][0])
+                if angle > rules.max_angle:
+                    continue
+                cost = rules.penalty * angle / 180
+                self.successors[a].append((b, cost))
+                self.predecessors[b].append((a, cost))
+
+    def dijkstra(self, source, bound=math.inf, targets=None, count=0, reverse=False):
+        """
+        Same as `routing.dijkstra` with turn costs. The previous arcs are
+        kept per arc, see `path_arcs`.
+        """
+        network = self.network
+        arc_cost = network.arc_cost
+        arc_node = network.arc_from if reverse else network.arc_to
+        following = self.predecessors if reverse else self.successors
+        first = network.incoming()[source] if reverse else network.out[source]
+        costs = {}
+        previous = {}
+        heap = []
+        for arc in first:
+            if arc_cost[arc] < costs.get(arc, math.inf):
+                costs[arc] = arc_cost[arc]
+                previous[arc] = None
+                heap.append((arc_cost[arc], arc))
+        heapq.heapify(heap)
+        settled = {source: 0.0}
+        last = {source: None}
+        done = set()
+        remaining = set(targets) if targets is not None else None
+        needed = count or (len(remaining) if remaining is not None else 0)
+        if remaining is not None and source in remaining:
+            needed -= 1
+        while heap and (remaining is None or needed > 0):
+            cost, a = heapq.heappop(heap)
+            if a in done:
+                continue
+            if cost > bound:
+                break
+            done.add(a)
+            node = arc_node[a]
+            if node not in settled:
+                # The first arc settled at a node reaches it at the least
+                # cost, whatever turn follows.
+                settled[node] = cost
+                last[node] = a
+                if remaining is not None and node in remaining:
+                    needed -= 1
+            for b, turn in following[a]:
+                new_cost = cost + turn + arc_cost[b]
+                if new_cost < costs.get(b, math.inf) and b not in done:
+                    costs[b] = new_cost
+                    previous[b] = a
+                    heapq.heappush(heap, (new_cost, b))
+        return settled, (last, previous)
+
+    def path_arcs(self, previous, node, reverse=False):
+        """
+        Same as `routing.path_arcs` for the results of `dijkstra`.
+        """
+        last, previous = previous
+        arcs = []
+        arc = last.get(node)
+        while arc is not None:
+            arcs.append(arc)
+            arc = previous[arc]
+        return arcs if reverse else arcs[::-1]
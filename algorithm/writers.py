@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import gzip
+import io
+import os
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+from .lib import DxfTemplates, new_dxf
+
+# Compression of text outputs, in the order shown in the algorithm dialogs
+COMPRESSION_NONE = 0
+COMPRESSION_GZIP = 1
+COMPRESSION_ZIP = 2
+COMPRESSION_EXTENSIONS = ['', '.gz', '.zip']
+
+
+def output_path(path, compression):
+    """
+    Returns the path of the file actually written for `path`.
+    """
+    return path + COMPRESSION_EXTENSIONS[compression]
+
+
+@contextmanager
+def open_output(path, compression=COMPRESSION_NONE, encoding='utf-8', errors='strict'):
+    """
+    Opens a text stream writing into `path`, either directly, gzipped or as
+    the single member of a ZIP archive. Returns the stream and the path of
+    the written file.
+    """
+    archive = None
+    target = output_path(path, compression)
+    if compression == COMPRESSION_GZIP:
+        stream = gzip.open(target, 'wt', encoding=encoding, errors=errors)
+    elif compression == COMPRESSION_ZIP:
+        archive = zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED)
+        stream = io.TextIOWrapper(
+            archive.open(os.path.basename(path), 'w'),
+            encoding=encoding,
+            errors=errors
+        )
+    else:
+        stream = open(target, 'w', encoding=encoding, errors=errors)
+    try:
+        yield stream, target
+    finally:
+        stream.close()
+        if archive:
+            archive.close()
+
+
+def save_dxf(doc, path, compression=COMPRESSION_NONE):
+    """
+    Writes a DXF document like `doc.saveas` but optionally compressed.
+    Returns the path of the written file.
+    """
+    if compression == COMPRESSION_NONE:
+        doc.saveas(path)
+        return path
+    with open_output(path, compression, doc.output_encoding, 'dxfreplace') as (stream, target):
+        doc.write(stream)
+    return target
+
+
+class SurpacStringWriter(object):
+    """
+    Writes polygon rings into a Surpac string file. Each call to `write` is
+    a separate string id. Coordinates are written with `precision` decimals,
+    or in full if None.
+    """
+
+    def __init__(self, stream, precision=None):
+        self.str_id = 1
+        self.stream = stream
+        number = '{}' if precision is None else f'{{:.{precision}f}}'
+        self.first_line = f'{{}}, {number}, {number}, 0, {{}}\n'.format
+        self.line = f'{{}}, {number}, {number}, 0,\n'.format
+        stream.write(f'polygon,{date.today().strftime("%d-%b-%y")},,ssi_styles:arcinfo.ssi\n')
+        stream.write('0, 0.000, 0.000, 0.000, 0.000, 0.000, 0.000\n')
+
+    def write(self, rings, values):
+        """
+        Writes the rings of one feature. `rings` are sequences of (x, y) and
+        `values` the attributes written on the first point of each ring.
+        """
+        stream = self.stream
+        str_id = self.str_id
+        line = self.line
+        attributes = ''.join(f'{value}, ' for value in values)
+        for ring in rings:
+            if ring:
+                x, y = ring[0]
+                stream.write(self.first_line(str_id, y, x, attributes))
+                stream.writelines(line(str_id, y, x) for x, y in ring[1:])
+            stream.write('0, 0, 0, 0,\n')
+        self.str_id += 1
+
+    def close(self):
+        self.stream.write('0, 0.000, 0.000, 0.000, END')
+
+
+def write_dxf_records(path, records, appid=None, setup=False, **dxfattribs):
+    """
+    Writes `records` of (layer, xdata text, dxfattribs, polylines) into a
+    new DXF file.
+    `appid` and `dxfattribs` are passed to `DxfTemplates`.
+    """
+    doc = new_dxf('R2013', setup=setup)
+    templates = DxfTemplates(doc, appid, **dxfattribs)
+    for layer, text, attribs, polylines in records:
+        template = templates.get(layer, text, **attribs)
+        for polyline in polylines:
+            templates.add_lwpolyline(polyline, template)
+    doc.saveas(path)
+    return path
+
+
+def write_surpac_records(path, records, precision=None):
+    """
+    Writes `records` of (rings, values) into a new Surpac string file.
+    """
+    with open(path, 'w') as fstream:
+        writer = SurpacStringWriter(fstream, precision)
+        for rings, values in records:
+            writer.write(rings, values)
+        writer.close()
+    return path
+
+
+def run_export_job(job):
+    """
+    Writes one export job prepared by the batch export. Jobs only hold plain
+    Python data so that they can be sent to worker processes.
+    """
+    if job['kind'] == 'dxf':
+        return write_dxf_records(
+            job['path'],
+            job['records'],
+            job['appid'],
+            job['setup'],
+            **job['dxfattribs']
+        )
+    return write_surpac_records(job['path'], job['records'], job.get('precision'))
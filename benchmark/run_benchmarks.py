@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Headless benchmark of the algorithms of `TmcAlgorithmsProvider`.
+
+Synthetic mine-scale datasets (clusters, polygons, lines, points, a road grid
+and a DEM) are generated once per size tier. Each algorithm then runs in a
+fresh process per tier so that the peak resident memory is its own. Wall
+time, peak RSS and output size are written into a JSON report.
+
+The plugin must be importable, i.e. `resources.py` must be compiled
+(`pyrcc5 -o resources.py resources.qrc`) or `--plugin-dir` must point to a
+deployed copy. Run with the QGIS Python interpreter:
+
+    python benchmark/run_benchmarks.py --tiers small medium --report bench.json
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+CRS = 'EPSG:32651'
+ORIGIN = (590000.0, 1030000.0)
+ORE_CLASSES = ['A', 'B', 'C', 'D', 'E', 'F', 'L', 'W']
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Dataset size of each tier. `*_vertices` are per ring or line, `road_grid`
+# is the number of roads in each direction and `dem_size` the raster width
+# and height in pixels.
+TIERS = {
+    'small': {
+        'clusters': 100, 'ring_vertices': 40,
+        'lines': 100, 'line_vertices': 40,
+        'points': 1000,
+        'road_grid': 10, 'sources': 10, 'destinations': 10,
+        'dem_size': 500
+    },
+    'medium': {
+        'clusters': 1000, 'ring_vertices': 100,
+        'lines': 1000, 'line_vertices': 100,
+        'points': 50000,
+        'road_grid': 30, 'sources': 50, 'destinations': 20,
+        'dem_size': 2000
+    },
+    'large': {
+        'clusters': 10000, 'ring_vertices': 100,
+        'lines': 10000, 'line_vertices': 100,
+        'points': 500000,
+        'road_grid': 60, 'sources': 200, 'destinations': 50,
+        'dem_size': 5000
+    },
+    'huge': {
+        'clusters': 20000, 'ring_vertices': 200,
+        'lines': 20000, 'line_vertices': 200,
+        'points': 1000000,
+        'road_grid': 100, 'sources': 2000, 'destinations': 100,
+        'dem_size': 10000
+    }
+}
+
+
+def start_qgis():
+    from qgis.core import QgsApplication
+    QgsApplication.setPrefixPath(os.environ.get('QGIS_PREFIX_PATH', sys.prefix), True)
+    app = QgsApplication([], False)
+    app.initQgis()
+    sys.path.append(os.path.join(QgsApplication.prefixPath(), 'python', 'plugins'))
+    from processing.core.Processing import Processing # pyright: reportMissingImports=false
+    Processing.initialize()
+    return app
+
+
+def load_provider(plugin_dir):
+    from qgis.core import QgsApplication
+    sys.path.insert(0, os.path.dirname(plugin_dir))
+    package = os.path.basename(plugin_dir)
+    try:
+        module = importlib.import_module(f'{package}.tmc_algorithms_provider')
+    except ImportError as error:
+        raise Exception(f'Cannot import the plugin ({error}). Compile resources.py first.')
+    provider = module.TmcAlgorithmsProvider()
+    QgsApplication.processingRegistry().addProvider(provider)
+    return provider
+
+
+def write_layer(path, geometry_type, fields, rows):
+    """
+    Writes `rows` of (wkt, attributes) into a GeoPackage.
+    """
+    from qgis.core import (QgsCoordinateReferenceSystem,
+                           QgsCoordinateTransformContext,
+                           QgsFeature,
+                           QgsField,
+                           QgsFields,
+                           QgsGeometry,
+                           QgsVectorFileWriter,
+                           QgsWkbTypes)
+    from qgis.PyQt.QtCore import QVariant
+
+    qgs_fields = QgsFields()
+    for name, kind in fields:
+        qgs_fields.append(QgsField(name, {'int': QVariant.Int, 'double': QVariant.Double, 'string': QVariant.String}[kind]))
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = 'GPKG'
+    writer = QgsVectorFileWriter.create(
+        path,
+        qgs_fields,
+        getattr(QgsWkbTypes, geometry_type),
+        QgsCoordinateReferenceSystem(CRS),
+        QgsCoordinateTransformContext(),
+        options
+    )
+    batch = []
+    for wkt, attributes in rows:
+        feature = QgsFeature(qgs_fields)
+        feature.setGeometry(QgsGeometry.fromWkt(wkt))
+        feature.setAttributes(attributes)
+        batch.append(feature)
+        if len(batch) == 10000:
+            writer.addFeatures(batch)
+            batch = []
+    writer.addFeatures(batch)
+    del writer
+
+
+def jagged_ring(cx, cy, radius, vertices, rng):
+    points = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        r = radius * (0.8 + 0.2 * rng.random())
+        points.append(f'{cx + r * math.cos(angle):.3f} {cy + r * math.sin(angle):.3f}')
+    points.append(points[0])
+    return ', '.join(points)
+
+
+def generate(tier, directory):
+    """
+    Generates the datasets of `tier` into `directory` unless they exist.
+    Returns the paths of the datasets.
+    """
+    size = TIERS[tier]
+    rng = random.Random(tier)
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        name: os.path.join(directory, f'{name}.gpkg')
+        for name in ['clusters', 'lines', 'points', 'road', 'sources', 'destinations']
+    }
+    paths['dem'] = os.path.join(directory, 'dem.tif')
+    extent = 20.0 * math.ceil(math.sqrt(size['clusters'])) * 10
+    x0, y0 = ORIGIN
+
+    if not os.path.exists(paths['clusters']):
+        columns = math.ceil(math.sqrt(size['clusters']))
+        rows = []
+        for i in range(size['clusters']):
+            cx = x0 + (i % columns) * 200 + 100
+            cy = y0 + (i // columns) * 200 + 100
+            rows.append((
+                f'POLYGON(({jagged_ring(cx, cy, 90, size["ring_vertices"], rng)}))',
+                [f'cluster_{i}', rng.choice(ORE_CLASSES), 100 + 3 * (i % 20)]
+            ))
+        write_layer(paths['clusters'], 'Polygon', [('name', 'string'), ('ore_class', 'string'), ('z', 'double')], rows)
+
+    if not os.path.exists(paths['lines']):
+        rows = []
+        for i in range(size['lines']):
+            x, y = x0 + rng.random() * extent, y0 + rng.random() * extent
+            vertices = []
+            for _ in range(size['line_vertices']):
+                x += rng.uniform(-10, 10)
+                y += rng.uniform(-10, 10)
+                vertices.append(f'{x:.3f} {y:.3f}')
+            rows.append((f'LINESTRING({", ".join(vertices)})', [f'contour_{i % 50}', 100.0 + i % 50]))
+        write_layer(paths['lines'], 'LineString', [('name', 'string'), ('z', 'double')], rows)
+
+    if not os.path.exists(paths['points']):
+        rows = (
+            (
+                f'POINT({x0 + rng.random() * extent:.3f} {y0 + rng.random() * extent:.3f})',
+                [f'DH{i:07d}', 100.0 + rng.random() * 50]
+            )
+            for i in range(size['points'])
+        )
+        write_layer(paths['points'], 'Point', [('name', 'string'), ('z', 'double')], rows)
+
+    grid = size['road_grid']
+    spacing = extent / grid
+    if not os.path.exists(paths['road']):
+        rows = []
+        for i in range(grid + 1):
+            for j in range(grid):
+                rows.append((
+                    f'LINESTRING({x0 + i * spacing} {y0 + j * spacing}, {x0 + i * spacing} {y0 + (j + 1) * spacing})',
+                    [rng.choice([20, 30, 40])]
+                ))
+                rows.append((
+                    f'LINESTRING({x0 + j * spacing} {y0 + i * spacing}, {x0 + (j + 1) * spacing} {y0 + i * spacing})',
+                    [rng.choice([20, 30, 40])]
+                ))
+        write_layer(paths['road'], 'LineString', [('speed', 'int')], rows)
+
+    for name in ['sources', 'destinations']:
+        if not os.path.exists(paths[name]):
+            rows = (
+                (
+                    f'POINT({x0 + rng.randrange(grid + 1) * spacing + rng.uniform(-5, 5)} '
+                    f'{y0 + rng.random() * extent})',
+                    [f'{name[0].upper()}{i}']
+                )
+                for i in range(size[name])
+            )
+            write_layer(paths[name], 'Point', [('name', 'string')], rows)
+
+    if not os.path.exists(paths['dem']):
+        import numpy
+        from osgeo import gdal, osr
+        pixels = size['dem_size']
+        dataset = gdal.GetDriverByName('GTiff').Create(
+            paths['dem'], pixels, pixels, 1, gdal.GDT_Float32,
+            ['TILED=YES', 'COMPRESS=DEFLATE']
+        )
+        dataset.SetGeoTransform([x0, extent / pixels, 0, y0 + extent, 0, -extent / pixels])
+        srs = osr.SpatialReference()
+        srs.SetFromUserInput(CRS)
+        dataset.SetProjection(srs.ExportToWkt())
+        band = dataset.GetRasterBand(1)
+        step = 1024
+        for yoff in range(0, pixels, step):
+            rows = min(step, pixels - yoff)
+            y, x = numpy.mgrid[yoff:yoff + rows, 0:pixels]
+            z = 100 + 40 * numpy.sin(x / pixels * 6) * numpy.cos(y / pixels * 4)
+            band.WriteArray(z.astype(numpy.float32), 0, yoff)
+        dataset = None
+
+    return paths
+
+
+def case_parameters(name, data, output):
+    """
+    Parameters of each benchmarked algorithm, keyed by algorithm name.
+    """
+    cases = {
+        'Batch export polygons': {
+            'EXPORTER': 0,
+            'INPUT': data['clusters'],
+            'PARTITION_FIELD': 'ore_class',
+            'OUTPUT': output
+        },
+        'Export cluster to DXF': {
+            'INPUT': data['clusters'],
+            'FILENAME': f'{output}.dxf'
+        },
+        'Export line to DXF': {
+            'INPUT': data['lines'],
+            'LAYER_FIELD': 'name',
+            'ELEVATION_FIELD': 'z',
+            'FILENAME': f'{output}.dxf'
+        },
+        'Export point to DXF': {
+            'INPUT': data['points'],
+            'LAYER_FIELD': 'name',
+            'LABEL_FIELD': 'name',
+            'ELEVATION_FIELD': 'z',
+            'FILENAME': f'{output}.dxf'
+        },
+        'Export polygon to DXF': {
+            'INPUT': data['clusters'],
+            'LAYER_FIELD': 'name',
+            'ELEVATION_FIELD': 'z',
+            'FILENAME': f'{output}.dxf'
+        },
+        'Export polygon to Surpac string': {
+            'INPUT': data['clusters'],
+            'LAYER_FIELD': ['name'],
+            'FILENAME': f'{output}.str'
+        },
+        'Export polygon to multiple formats': {
+            'INPUT': data['clusters'],
+            'LAYER_FIELD': 'name',
+            'ELEVATION_FIELD': 'z',
+            'STR_FIELDS': ['name'],
+            'DXF_FILE': f'{output}.dxf',
+            'STR_FILE': f'{output}.str'
+        },
+        'Service area (from point layer)': {
+            'SOURCE': data['sources'],
+            'ROAD': data['road'],
+            'STRATEGY': 1,
+            'SPEED_FIELD': 'speed',
+            'TRAVEL_COST': 0.1,
+            'OUTPUT': f'{output}.gpkg',
+            'OUTPUT_POLYGONS': f'{output}_polygons.gpkg'
+        },
+        'Shortest path (point layer to point layer)': {
+            'SOURCE': data['sources'],
+            'SOURCE_FIELDS': ['name'],
+            'DESTINATION': data['destinations'],
+            'DESTINATION_FIELDS': ['name'],
+            'MANY_TO_MANY': True,
+            'ROAD': data['road'],
+            'DEM': data['dem'],
+            'STRATEGY': 1,
+            'SPEED_FIELD': 'speed',
+            'OUTPUT': f'{output}.gpkg'
+        }
+    }
+    return cases.get(name)
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+
+def output_size(result):
+    size = 0
+    for value in result.values():
+        if isinstance(value, str) and os.path.isfile(value):
+            size += os.path.getsize(value)
+    return size
+
+
+def run_case(args):
+    """
+    Runs one algorithm on one tier and prints its measurements as JSON.
+    """
+    app = start_qgis()
+    provider = load_provider(args.plugin_dir)
+    import processing # pyright: reportMissingImports=false
+    algorithm = [alg for alg in provider.algorithms() if alg.name() == args.case][0]
+    data = generate(args.tier, os.path.join(args.workdir, args.tier))
+    output = os.path.join(args.workdir, 'output', f'{args.tier}_{algorithm.name().replace(" ", "_")}')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    rss_before = peak_rss()
+    start = time.perf_counter()
+    result = processing.run(algorithm.id(), case_parameters(algorithm.name(), data, output))
+    wall_time = time.perf_counter() - start
+    print(json.dumps({
+        'algorithm': algorithm.id(),
+        'tier': args.tier,
+        'wall_time_s': wall_time,
+        'peak_rss_bytes': peak_rss(),
+        'baseline_rss_bytes': rss_before,
+        'output_bytes': output_size(result)
+    }))
+    app.exitQgis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the TMC algorithms.')
+    parser.add_argument('--tiers', nargs='+', default=['small', 'medium'], choices=list(TIERS))
+    parser.add_argument('--algorithms', nargs='+', help='algorithm names to run, all by default')
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'tmc_algorithms_benchmark'))
+    parser.add_argument('--plugin-dir', default=PLUGIN_DIR)
+    parser.add_argument('--report', default='bench_output.json')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--tier', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args)
+        return
+
+    app = start_qgis()
+    provider = load_provider(args.plugin_dir)
+    names = []
+    for algorithm in provider.algorithms():
+        if case_parameters(algorithm.name(), {}, '') is None:
+            print(f'No benchmark case for `{algorithm.name()}`.', file=sys.stderr)
+        elif not args.algorithms or algorithm.name() in args.algorithms:
+            names.append(algorithm.name())
+    for tier in args.tiers:
+        print(f'Generating {tier} datasets...', file=sys.stderr)
+        generate(tier, os.path.join(args.workdir, tier))
+    app.exitQgis()
+
+    results = []
+    for tier in args.tiers:
+        for name in names:
+            process = subprocess.run(
+                [
+                    sys.executable, os.path.realpath(__file__),
+                    '--case', name,
+                    '--tier', tier,
+                    '--workdir', args.workdir,
+                    '--plugin-dir', args.plugin_dir
+                ],
+                capture_output=True,
+                text=True
+            )
+            if process.returncode:
+                result = {'algorithm': name, 'tier': tier, 'error': process.stderr.strip()[-2000:]}
+            else:
+                result = json.loads(process.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr)
+
+    with open(args.report, 'w') as fstream:
+        json.dump({
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'tiers': {tier: TIERS[tier] for tier in args.tiers},
+            'results': results
+        }, fstream, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Measures the import time of the plugin algorithms with `python -X importtime`.
+
+Two scenarios are measured in fresh interpreters:
+
+    lazy    importing the algorithm modules, as done by the provider when
+            QGIS loads the plugin
+    eager   same as lazy but ezdxf is imported right away, which is what
+            the plugin did before ezdxf was loaded on demand
+
+Usage (with the QGIS Python interpreter):
+
+    python benchmark/startup_time.py [--repeat N] [--json FILE]
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+MODULES = [
+    'batch_export',
+    'cluster_dxf',
+    'line_dxf',
+    'multi_export',
+    'point_dxf',
+    'polygon_dxf',
+    'service_area',
+    'shortest_path',
+    'surpac_string'
+]
+IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def child_code(eager):
+    package = os.path.basename(PLUGIN_DIR)
+    lines = [
+        'import importlib, sys',
+        f'sys.path.insert(0, {os.path.dirname(PLUGIN_DIR)!r})'
+    ]
+    for module in MODULES:
+        lines.append(f'importlib.import_module({package!r} + ".algorithm.{module}")')
+    if eager:
+        lines.append(f'importlib.import_module({package!r} + ".algorithm.lib").load_ezdxf()')
+    return '\n'.join(lines)
+
+
+def measure(eager):
+    """
+    Returns the total cumulative import time in microseconds and the share
+    spent importing ezdxf.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', child_code(eager)],
+        capture_output=True,
+        text=True
+    )
+    if process.returncode:
+        raise Exception(process.stderr.strip().splitlines()[-1])
+    total = 0
+    ezdxf = 0
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if not match or match.group(3):
+            continue
+        cumulative = int(match.group(2))
+        total += cumulative
+        if match.group(4) == 'ezdxf':
+            ezdxf += cumulative
+    return total, ezdxf
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plugin import time benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write the results into this file')
+    args = parser.parse_args()
+
+    results = {}
+    for scenario in ['lazy', 'eager']:
+        runs = [measure(scenario == 'eager') for _ in range(args.repeat)]
+        results[scenario] = {
+            'total_ms': statistics.median(run[0] for run in runs) / 1000,
+            'ezdxf_ms': statistics.median(run[1] for run in runs) / 1000
+        }
+        print(f'{scenario:>6}: {results[scenario]["total_ms"]:9.1f} ms '
+              f'(ezdxf {results[scenario]["ezdxf_ms"]:.1f} ms)')
+    print(f' saved: {results["eager"]["total_ms"] - results["lazy"]["total_ms"]:9.1f} ms')
+
+    if args.json:
+        with open(args.json, 'w') as fstream:
+            json.dump(results, fstream, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import unittest
+
+try:
+    import ezdxf
+except ImportError:
+    ezdxf = None
+
+from algorithm.cluster_style import DEFAULT_SCHEMA, ClusterStyle
+from algorithm.lib import DxfTemplates
+
+
+class Fields(object):
+    """
+    Field names of a layer, standing for `QgsFields`.
+    """
+
+    def __init__(self, *names):
+        self.names = names
+
+    def indexFromName(self, name):
+        return self.names.index(name) if name in self.names else -1
+
+
+def schema(layer):
+    return {'default': dict(DEFAULT_SCHEMA['default'], layer=layer), 'classes': DEFAULT_SCHEMA['classes']}
+
+
+class ClusterStyleTest(unittest.TestCase):
+
+    FIELDS = Fields('name', 'ore_class', 'z')
+
+    def test_entity(self):
+        style = ClusterStyle(DEFAULT_SCHEMA, self.FIELDS)
+        layer, name, attribs = style.entity(['C12', 'A', 100.0])
+        self.assertEqual((layer, name), ('C12', 'C12'))
+        self.assertEqual(attribs['color'], 1)
+        self.assertEqual(attribs['elevation'], 97.0)
+
+    def test_layer_template(self):
+        style = ClusterStyle(schema('{name}_{ore_class}'), self.FIELDS)
+        layer, name, _ = style.entity(['C12', 'X', 100.0])
+        self.assertEqual((layer, name), ('C12_X', 'C12'))
+        self.assertEqual(style.unknown_classes, {'X'})
+
+    def test_missing_name(self):
+        with self.assertRaises(Exception):
+            ClusterStyle(DEFAULT_SCHEMA, Fields('ore_class', 'z'))
+
+    @unittest.skipIf(ezdxf is None, 'ezdxf is not installed')
+    def test_xdata_is_name(self):
+        style = ClusterStyle(schema('{name}_{ore_class}'), self.FIELDS)
+        templates = DxfTemplates(style.new_document(), 'TrimbleName')
+        entity = templates.add_lwpolyline([(0, 0), (1, 0), (1, 1)], style.template(templates, ['C12', 'A', 100.0]))
+        self.assertEqual(entity.dxf.layer, 'C12_A')
+        self.assertEqual(list(entity.get_xdata('TrimbleName')), [(1000, 'C12')])
+
+
+if __name__ == '__main__':
+    unittest.main()
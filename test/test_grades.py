@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from algorithm.grades import grade_statistics
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class GradeStatisticsTest(unittest.TestCase):
+
+    def test_known_profile(self):
+        # 100 m climbing 10 m, 100 m flat, then 50 m falling 5 m
+        path = np.array([(0, 0, 0), (100, 0, 10), (200, 0, 10), (250, 0, 5)], dtype=float)
+        stats = grade_statistics([path], [5, 10])
+        length = (np.hypot(100, 10) + 100 + np.hypot(50, 5)) / 1000
+        self.assertAlmostEqual(stats[0, 0], length)
+        self.assertAlmostEqual(stats[0, 1], 10)
+        self.assertAlmostEqual(stats[0, 2], 5)
+        self.assertAlmostEqual(stats[0, 3], 10)
+        self.assertAlmostEqual(stats[0, 4], (np.hypot(100, 10) + np.hypot(50, 5)) / 1000)
+        self.assertAlmostEqual(stats[0, 5], 0)
+
+    def test_paths_are_separate(self):
+        first = np.array([(0, 0, 0), (10, 0, 1)], dtype=float)
+        second = np.array([(1000, 0, 500), (1010, 0, 500)], dtype=float)
+        stats = grade_statistics([first, second], [])
+        self.assertAlmostEqual(stats[0, 1], 1)
+        self.assertAlmostEqual(stats[1, 0], 0.01)
+        self.assertAlmostEqual(stats[1, 1], 0)
+        self.assertAlmostEqual(stats[1, 3], 0)
+
+    def test_no_path(self):
+        self.assertEqual(grade_statistics([], [8]).shape, (0, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
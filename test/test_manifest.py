@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import os
+import tempfile
+import unittest
+from qgis.core import (QgsApplication,
+                       QgsFeature,
+                       QgsGeometry,
+                       QgsProcessingContext,
+                       QgsProcessingFeedback,
+                       QgsVectorLayer)
+from algorithm.manifest import SKIP_UNCHANGED, ExportManifest
+from algorithm.surpac_string import ExportPolygonToSurpacStringAlgorithm
+
+
+class Feedback(QgsProcessingFeedback):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def pushInfo(self, info):
+        self.messages.append(info)
+
+
+class ExportManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'blocks.dxf')
+        with open(self.path, 'w') as fstream:
+            fstream.write('blocks')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_unchanged(self):
+        ExportManifest(self.path, {'input': 'a'}).save([self.path])
+        self.assertEqual(ExportManifest(self.path, {'input': 'a'}).unchanged(), [self.path])
+
+    def test_other_key(self):
+        ExportManifest(self.path, {'input': 'a'}).save([self.path])
+        self.assertIsNone(ExportManifest(self.path, {'input': 'b'}).unchanged())
+
+    def test_output_changed(self):
+        ExportManifest(self.path, {'input': 'a'}).save([self.path])
+        with open(self.path, 'a') as fstream:
+            fstream.write(' edited')
+        self.assertIsNone(ExportManifest(self.path, {'input': 'a'}).unchanged())
+
+    def test_output_removed(self):
+        ExportManifest(self.path, {'input': 'a'}).save([self.path])
+        os.remove(self.path)
+        self.assertIsNone(ExportManifest(self.path, {'input': 'a'}).unchanged())
+
+    def test_no_manifest(self):
+        self.assertIsNone(ExportManifest(self.path, {'input': 'a'}).unchanged())
+
+
+class SurpacSkipTest(unittest.TestCase):
+    """
+    Runs the Surpac export twice with the same input and parameters, which
+    needs QGIS with its memory provider.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.application = None
+        if not QgsApplication.instance():
+            cls.application = QgsApplication([], False)
+            cls.application.initQgis()
+        cls.layer = QgsVectorLayer('Polygon?crs=EPSG:32651&field=name:string(20)', 'blocks', 'memory')
+        if not cls.layer.isValid():
+            raise unittest.SkipTest('QGIS memory layers are not available')
+        for name, wkt in [('A', 'POLYGON((0 0, 10 0, 10 10, 0 0))'), ('B', 'POLYGON((20 0, 30 0, 30 10, 20 0))')]:
+            feature = QgsFeature(cls.layer.fields())
+            feature.setAttributes([name])
+            feature.setGeometry(QgsGeometry.fromWkt(wkt))
+            cls.layer.dataProvider().addFeature(feature)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export(self, path):
+        alg = ExportPolygonToSurpacStringAlgorithm().create()
+        feedback = Feedback()
+        parameters = {
+            'INPUT': self.layer,
+            'FILENAME': path,
+            'LAYER_FIELD': ['name'],
+            SKIP_UNCHANGED: True
+        }
+        results, ok = alg.run(parameters, QgsProcessingContext(), feedback)
+        self.assertTrue(ok)
+        return feedback.messages
+
+    def test_second_run_skipped(self):
+        path = os.path.join(self.directory.name, 'blocks.str')
+        messages = self.export(path)
+        self.assertFalse(any('skipped' in message for message in messages))
+        with open(path) as fstream:
+            content = fstream.read()
+        self.assertTrue(content.endswith('END'))
+        modified = os.stat(path).st_mtime_ns
+        messages = self.export(path)
+        self.assertTrue(any('skipped' in message for message in messages))
+        self.assertEqual(os.stat(path).st_mtime_ns, modified)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import math
+import random
+import unittest
+from algorithm.routing import (DIRECTION_BACKWARD,
+                               DIRECTION_BOTH,
+                               DIRECTION_FORWARD,
+                               CostMatrix,
+                               Network,
+                               PathMirror,
+                               RoadGraph,
+                               build_graph,
+                               contract_graph,
+                               cut_line,
+                               dijkstra,
+                               is_symmetric,
+                               label_components,
+                               line_length,
+                               pair_groups,
+                               path_arcs,
+                               route_pairs)
+
+
+def brute_costs(network, source):
+    """
+    Returns the costs from `source` to every node of `network` by
+    Bellman-Ford.
+    """
+    costs = [math.inf] * len(network.coords)
+    costs[source] = 0.0
+    for _ in range(len(network.coords)):
+        changed = False
+        for u, v, cost in zip(network.arc_from, network.arc_to, network.arc_cost):
+            if costs[u] + cost < costs[v] - 1e-12:
+                costs[v] = costs[u] + cost
+                changed = True
+        if not changed:
+            break
+    return costs
+
+
+def random_roads(rng, size=5):
+    """
+    Returns the roads of a grid of `size` by `size` with random gaps,
+    directions and speeds, as taken by `build_graph`.
+    """
+    roads = []
+    directions = [DIRECTION_FORWARD, DIRECTION_BACKWARD, DIRECTION_BOTH, DIRECTION_BOTH]
+    for i in range(size):
+        for j in range(size):
+            for end in [(i + 1, j), (i, j + 1)]:
+                if max(end) < size and rng.random() < 0.8:
+                    middle = ((i + end[0]) / 2 + rng.uniform(-0.2, 0.2), (j + end[1]) / 2)
+                    roads.append((len(roads), [[(i, j), middle, end]], rng.choice(directions), rng.choice([1.0, 2.0])))
+    return roads
+
+
+def random_network(rng, points=6):
+    network = Network(build_graph(random_roads(rng)))
+    nodes = [network.tie((rng.uniform(0, 4), rng.uniform(0, 4))) for _ in range(points)]
+    network.finish()
+    return network, nodes
+
+
+def path_cost(network, arcs):
+    return sum(network.arc_cost[arc] for arc in arcs)
+
+
+class CutLineTest(unittest.TestCase):
+
+    def test_cut_line(self):
+        points = [(0, 0), (10, 0), (10, 10)]
+        self.assertEqual(cut_line(points, 5, 15), [(5, 0), (10, 0), (10, 5)])
+        self.assertEqual(cut_line(points, 15, 5), [(10, 5), (10, 0), (5, 0)])
+        self.assertEqual(cut_line(points, 0, 20), points)
+        self.assertEqual(cut_line(points, 12, 12), [(10, 2), (10, 2)])
+
+    def test_line_length(self):
+        self.assertEqual(line_length([(0, 0), (3, 4), (3, 10)]), 11)
+
+
+class DijkstraTest(unittest.TestCase):
+
+    def test_against_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(30):
+            network, nodes = random_network(rng)
+            for source in nodes:
+                expected = brute_costs(network, source)
+                settled, previous = dijkstra(network, source)
+                for node, cost in enumerate(expected):
+                    if math.isinf(cost):
+                        self.assertNotIn(node, settled)
+                        continue
+                    self.assertAlmostEqual(settled[node], cost)
+                    arcs = path_arcs(network, previous, node)
+                    self.assertAlmostEqual(path_cost(network, arcs), cost)
+                    if arcs:
+                        self.assertEqual(network.arc_from[arcs[0]], source)
+                        self.assertEqual(network.arc_to[arcs[-1]], node)
+
+    def test_reverse_against_brute_force(self):
+        rng = random.Random(2)
+        for _ in range(30):
+            network, nodes = random_network(rng)
+            target = nodes[0]
+            settled, previous = dijkstra(network, target, reverse=True)
+            for source in nodes:
+                cost = brute_costs(network, source)[target]
+                if math.isinf(cost):
+                    self.assertNotIn(source, settled)
+                    continue
+                self.assertAlmostEqual(settled[source], cost)
+                arcs = path_arcs(network, previous, source, reverse=True)
+                self.assertAlmostEqual(path_cost(network, arcs), cost)
+                if arcs:
+                    self.assertEqual(network.arc_from[arcs[0]], source)
+                    self.assertEqual(network.arc_to[arcs[-1]], target)
+
+    def test_targets_and_count(self):
+        rng = random.Random(3)
+        network, nodes = random_network(rng)
+        costs = brute_costs(network, nodes[0])
+        reachable = sorted((costs[node], node) for node in set(nodes[1:]) if not math.isinf(costs[node]))
+        settled, _ = dijkstra(network, nodes[0], targets=set(nodes[1:]), count=1)
+        if reachable:
+            self.assertAlmostEqual(settled[reachable[0][1]], reachable[0][0])
+
+
+class RoutePairsTest(unittest.TestCase):
+
+    def test_against_brute_force(self):
+        rng = random.Random(4)
+        for _ in range(30):
+            network, nodes = random_network(rng, 8)
+            pairs = [(key, rng.choice(nodes), rng.choice(nodes[:2])) for key in range(10)]
+            reverse, groups = pair_groups(pairs)
+            results = {key: (cost, arcs) for key, cost, arcs in route_pairs(network, reverse, groups)}
+            self.assertEqual(set(results), {key for key, _, _ in pairs})
+            for key, source, target in pairs:
+                expected = brute_costs(network, source)[target]
+                cost, arcs = results[key]
+                if math.isinf(expected):
+                    self.assertIsNone(cost)
+                    continue
+                self.assertAlmostEqual(cost, expected)
+                self.assertAlmostEqual(path_cost(network, arcs), expected)
+
+    def test_pair_groups(self):
+        reverse, groups = pair_groups([(0, 1, 5), (1, 2, 5), (2, 3, 5)])
+        self.assertTrue(reverse)
+        self.assertEqual(groups, {5: [(0, 1), (1, 2), (2, 3)]})
+
+
+class ContractGraphTest(unittest.TestCase):
+
+    def test_costs_preserved(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            graph = RoadGraph()
+            for feature, parts, direction, factor in random_roads(rng):
+                for part in parts:
+                    for a, b in zip(part, part[1:]):
+                        graph.add_road([a, b], feature, direction, factor)
+            label_components(graph)
+            contracted = contract_graph(graph)
+            label_components(contracted)
+            self.assertLessEqual(len(contracted.coords), len(graph.coords))
+            network = Network(graph)
+            network_contracted = Network(contracted)
+            for point in contracted.coords[:6]:
+                costs = brute_costs(network, graph.node_index[point])
+                costs_contracted = brute_costs(network_contracted, contracted.node_index[point])
+                for node, other in enumerate(contracted.coords):
+                    self.assertAlmostEqual(costs_contracted[node], costs[graph.node_index[other]])
+
+    def test_max_bend_keeps_hairpin(self):
+        roads = [(1, [[(0, 0), (10, 0)]], DIRECTION_BOTH, 1.0), (2, [[(10, 0), (0, 1)]], DIRECTION_BOTH, 1.0)]
+        self.assertEqual(len(build_graph(roads).link_points), 1)
+        self.assertEqual(len(build_graph(roads, max_bend=90.0).link_points), 2)
+        self.assertEqual(len(build_graph(roads[:1] + [(1, roads[1][1], DIRECTION_BOTH, 1.0)], max_bend=90.0).link_points), 1)
+
+
+class NodeRoadsTest(unittest.TestCase):
+
+    def test_crossing(self):
+        roads = [(1, [[(0, 0), (10, 0)]], DIRECTION_BOTH, 1.0), (2, [[(5, -5), (5, 5)]], DIRECTION_BOTH, 1.0)]
+        self.assertEqual(build_graph(roads).components, 2)
+        graph = build_graph(roads, 0.5)
+        self.assertEqual(graph.components, 1)
+        self.assertIn((5, 0), graph.node_index)
+
+    def test_near_t(self):
+        roads = [(1, [[(0, 0), (10, 0)]], DIRECTION_BOTH, 1.0), (2, [[(5, 0.1), (5, 5)]], DIRECTION_BOTH, 1.0)]
+        graph = build_graph(roads, 0.5)
+        self.assertEqual(graph.components, 1)
+        self.assertIn((5, 0), graph.node_index)
+        self.assertEqual(build_graph(roads, 0.05).components, 2)
+
+    def test_exact_t(self):
+        roads = [(1, [[(0, 0), (10, 0)]], DIRECTION_BOTH, 1.0), (2, [[(5, 0), (5, 5)]], DIRECTION_BOTH, 1.0)]
+        graph = build_graph(roads, 0.5)
+        self.assertEqual(graph.components, 1)
+        self.assertIn((5, 0), graph.node_index)
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_is_symmetric(self):
+        both = [(0, [[(0, 0), (1, 0)]], DIRECTION_BOTH, 1.0), (1, [[(1, 0), (1, 1)]], DIRECTION_BOTH, 2.0)]
+        self.assertTrue(is_symmetric(build_graph(both)))
+        one_way = both + [(2, [[(1, 1), (0, 1)]], DIRECTION_FORWARD, 1.0)]
+        self.assertFalse(is_symmetric(build_graph(one_way)))
+
+    def test_cost_matrix(self):
+        matrix = CostMatrix(symmetric=True)
+        matrix.add(5, 2, 1.5)
+        matrix.add(2, 5, 1.5)
+        self.assertEqual(matrix.costs, {(2, 5): 1.5})
+        matrix = CostMatrix()
+        matrix.add(5, 2, 1.5)
+        self.assertEqual(matrix.costs, {(5, 2): 1.5})
+
+    def test_path_mirror_limit(self):
+        mirror = PathMirror(limit=40)
+        self.assertTrue(mirror.keep(1, 2, 3.0, [4, 5, 6]))
+        self.assertFalse(mirror.keep(1, 3, 1.0, list(range(30))))
+        self.assertTrue(mirror.full)
+        self.assertEqual(list(mirror.known(1)[2][1]), [4, 5, 6])
+        mirror.drop(1)
+        self.assertEqual(mirror.size, 0)
+        self.assertEqual(mirror.known(1), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
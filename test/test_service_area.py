@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from algorithm.routing import DIRECTION_BOTH, DIRECTION_FORWARD, Network, build_graph
+from algorithm.service_area import ServiceArea, merge_intervals
+
+
+def service_area(roads, points, travel_cost):
+    network = Network(build_graph(roads))
+    nodes = [network.tie(point) for point in points]
+    network.finish()
+    return ServiceArea(network, travel_cost), nodes
+
+
+def rounded(points):
+    return {(round(x, 9), round(y, 9)) for x, y in points}
+
+
+class MergeIntervalsTest(unittest.TestCase):
+
+    def test_merge(self):
+        intervals = [(5, 8, 0.0, 1), (2, 5, 1.0, 2), (9, 10, 0.5, 3)]
+        self.assertEqual(merge_intervals(intervals), [[2, 8, 0.0, 1], [9, 10, 0.5, 3]])
+
+    def test_overlap_keeps_lowest_cost(self):
+        intervals = [(0, 6, 2.0, 1), (4, 10, 1.0, 2), (5, 7, 3.0, 3)]
+        self.assertEqual(merge_intervals(intervals), [[0, 10, 1.0, 2]])
+
+    def test_empty(self):
+        self.assertEqual(merge_intervals([]), [])
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class ServiceAreaTest(unittest.TestCase):
+
+    ROAD = [(1, [[(0, 0), (20, 0)]], DIRECTION_BOTH, 1.0)]
+    CROSS = [(1, [[(0, 0), (5, 0), (10, 0)]], DIRECTION_BOTH, 1.0), (2, [[(5, -5), (5, 0), (5, 5)]], DIRECTION_BOTH, 1.0)]
+
+    def test_reach_within_bound(self):
+        area, (node,) = service_area(self.ROAD, [(5, 0)], 3)
+        costs = area.add(7, node)
+        self.assertEqual(np.isfinite(costs).sum(), 1)
+        self.assertEqual([(0, 2, 8, 0.0, 7)], [
+            (link, round(low, 9), round(high, 9), cost, source_id) for link, low, high, cost, source_id in area.pieces()
+        ])
+
+    def test_reach_through_node(self):
+        area, (node,) = service_area(self.ROAD, [(5, 0)], 6)
+        costs = area.add(7, node)
+        self.assertEqual(sorted(costs[np.isfinite(costs)].tolist()), [0, 5])
+        ((link, low, high, cost, source_id),) = area.pieces()
+        self.assertEqual((low, high, cost, source_id), (0, 11, 0, 7))
+
+    def test_one_way(self):
+        roads = [(1, [[(0, 0), (20, 0)]], DIRECTION_FORWARD, 1.0)]
+        area, (node,) = service_area(roads, [(5, 0)], 3)
+        area.add(7, node)
+        ((link, low, high, cost, source_id),) = area.pieces()
+        self.assertEqual((low, high), (5, 8))
+
+    def test_sources_apart(self):
+        area, nodes = service_area(self.ROAD, [(5, 0), (15, 0)], 2)
+        for source_id, node in enumerate(nodes):
+            area.add(source_id, node)
+        pieces = sorted((low, high, source_id) for _, low, high, _, source_id in area.pieces())
+        self.assertEqual(pieces, [(3, 7, 0), (13, 17, 1)])
+
+    def test_sources_overlapping(self):
+        area, nodes = service_area(self.ROAD, [(5, 0), (15, 0)], 6)
+        for source_id, node in enumerate(nodes):
+            area.add(source_id, node)
+        ((link, low, high, cost, source_id),) = area.pieces()
+        self.assertEqual((low, high, cost), (0, 20, 0))
+
+    def test_lowest_cost_owner(self):
+        area, nodes = service_area(self.ROAD, [(5, 0), (8, 0)], 20)
+        for source_id, node in enumerate(nodes):
+            area.add(source_id, node)
+        # The end at 20 is closer to the second source
+        end = area.network.graph.node_index[(20, 0)]
+        self.assertEqual(area.best[end], 12)
+        self.assertEqual(area.owner[end], 1)
+
+    def test_outline(self):
+        area, (node,) = service_area(self.CROSS, [(5, 0)], 2)
+        costs = area.add(0, node)
+        self.assertEqual(rounded(area.outline(costs)), {(5, 0), (3, 0), (7, 0), (5, -2), (5, 2)})
+
+    def test_outline_of_whole_roads(self):
+        area, (node,) = service_area(self.CROSS, [(5, 0)], 100)
+        costs = area.add(0, node)
+        self.assertEqual(rounded(area.outline(costs)), {(5, 0), (0, 0), (10, 0), (5, -5), (5, 5)})
+
+
+if __name__ == '__main__':
+    unittest.main()
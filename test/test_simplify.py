@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from algorithm.simplify import METHOD_VISVALINGAM, Simplifier, douglas_peucker, visvalingam
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class SimplifyTest(unittest.TestCase):
+
+    def test_douglas_peucker(self):
+        points = np.array([(0, 0), (1, 0.1), (2, 0), (3, 5), (4, 0)], dtype=float)
+        self.assertEqual(douglas_peucker(points, 0.5).tolist(), [True, False, True, True, True])
+
+    def test_visvalingam(self):
+        points = np.array([(0, 0), (1, 0.1), (2, 0), (3, 5), (4, 0)], dtype=float)
+        self.assertEqual(visvalingam(points, 1).tolist(), [True, False, True, True, True])
+
+    def test_shared_boundary(self):
+        # Two squares sharing a wavy edge are simplified the same way.
+        edge = [(10, 0), (10.05, 2), (10, 4), (9.95, 6), (10, 10)]
+        left = [(0, 0)] + edge + [(0, 10), (0, 0)]
+        right = [(20, 0), (20, 10)] + edge[::-1] + [(20, 0)]
+        for method in [0, METHOD_VISVALINGAM]:
+            simplifier = Simplifier(0.5, method)
+            simplifier.prepare([[left], [right]])
+            (new_left,), (new_right,) = simplifier.simplify([left]), simplifier.simplify([right])
+            shared_left = [point for point in new_left if point[0] != 0]
+            shared_right = [point for point in new_right if point[0] != 20]
+            self.assertEqual(set(shared_left), set(shared_right))
+            self.assertLess(len(new_left), len(left))
+
+
+if __name__ == '__main__':
+    unittest.main()
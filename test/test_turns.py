@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import unittest
+from algorithm.routing import DIRECTION_BOTH, Network, build_graph, dijkstra
+from algorithm.turns import TurnRules, TurnSearch, heading, turn_angle
+
+# Two roads meeting in a hairpin at (10, 0), and a third one going on
+# straight from there
+HAIRPIN = [
+    (1, [[(0, 0), (10, 0)]], DIRECTION_BOTH, 1.0),
+    (2, [[(10, 0), (0, 1)]], DIRECTION_BOTH, 1.0),
+    (3, [[(10, 0), (20, 0)]], DIRECTION_BOTH, 1.0)
+]
+
+
+def hairpin_search(rules):
+    network = Network(build_graph(HAIRPIN, keep_features=rules.features(), max_bend=rules.max_bend()))
+    source = network.tie((5, 0))
+    target = network.tie((5, 0.5))
+    ahead = network.tie((15, 0))
+    network.finish()
+    return network, TurnSearch(network, rules), source, target, ahead
+
+
+class HeadingTest(unittest.TestCase):
+
+    def test_heading(self):
+        self.assertEqual(heading([(0, 0), (0, 0), (2, 0)]), (1.0, 0.0))
+        self.assertEqual(heading([(0, 0), (0, 2), (0, 2)], end=True), (0.0, 1.0))
+        self.assertIsNone(heading([(1, 1), (1, 1)]))
+
+    def test_turn_angle(self):
+        self.assertAlmostEqual(turn_angle((1, 0), (1, 0)), 0)
+        self.assertAlmostEqual(turn_angle((1, 0), (0, 1)), 90)
+        self.assertAlmostEqual(turn_angle((1, 0), (-1, 0)), 180)
+        self.assertEqual(turn_angle(None, (1, 0)), 0)
+
+
+class TurnSearchTest(unittest.TestCase):
+
+    def test_free_turns_match_dijkstra(self):
+        network, search, source, target, ahead = hairpin_search(TurnRules())
+        settled, _ = search.dijkstra(source)
+        expected, _ = dijkstra(network, source)
+        for node in [target, ahead]:
+            self.assertAlmostEqual(settled[node], expected[node])
+
+    def test_max_angle_forbids_hairpin(self):
+        network, search, source, target, ahead = hairpin_search(TurnRules(max_angle=90))
+        settled, previous = search.dijkstra(source, targets={target, ahead})
+        self.assertNotIn(target, settled)
+        self.assertAlmostEqual(settled[ahead], 10)
+        arcs = search.path_arcs(previous, ahead)
+        self.assertEqual(network.arc_from[arcs[0]], source)
+        self.assertEqual(network.arc_to[arcs[-1]], ahead)
+
+    def test_penalty_costs_hairpin(self):
+        network, search, source, target, ahead = hairpin_search(TurnRules(penalty=100))
+        free, _ = dijkstra(network, source)
+        settled, _ = search.dijkstra(source)
+        self.assertGreater(settled[target], free[target] + 90)
+        self.assertAlmostEqual(settled[ahead], free[ahead])
+
+    def test_restricted_turn(self):
+        network, search, source, target, ahead = hairpin_search(TurnRules(restricted=[(1, 3)]))
+        settled, _ = search.dijkstra(source)
+        self.assertIn(target, settled)
+        # Going straight on is forbidden, leaving a detour with a U-turn on
+        # the second road.
+        self.assertGreater(settled[ahead], 20)
+
+    def test_reverse_search(self):
+        network, search, source, target, ahead = hairpin_search(TurnRules(max_angle=90))
+        settled, previous = search.dijkstra(source, reverse=True)
+        self.assertAlmostEqual(settled[ahead], 10)
+        self.assertNotIn(target, settled)
+        arcs = search.path_arcs(previous, ahead, reverse=True)
+        self.assertEqual(network.arc_from[arcs[0]], ahead)
+        self.assertEqual(network.arc_to[arcs[-1]], source)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,10 +19,13 @@ __revision__ = '$Format:%H$'
 from qgis.PyQt.QtGui import QIcon
 from qgis.core import QgsProcessingProvider
 from . import resources
+from .algorithm.batch_export import BatchExportAlgorithm
 from .algorithm.cluster_dxf import ClusterDxfAlgorithm
 from .algorithm.line_dxf import LineDxfAlgorithm
+from .algorithm.multi_export import MultiExportAlgorithm
 from .algorithm.point_dxf import PointDxfAlgorithm
 from .algorithm.polygon_dxf import PolygonDxfAlgorithm
+from .algorithm.service_area import ServiceAreaAlgorithm
 from .algorithm.shortest_path import ShortestPathPointLayerAlgorithm
 from .algorithm.surpac_string import ExportPolygonToSurpacStringAlgorithm
 
@@ -46,11 +49,14 @@ class TmcAlgorithmsProvider(QgsProcessingProvider):
         """
         Loads all algorithms belonging to this provider.
         """
+        self.addAlgorithm(BatchExportAlgorithm())
         self.addAlgorithm(ClusterDxfAlgorithm())
         self.addAlgorithm(ExportPolygonToSurpacStringAlgorithm())
         self.addAlgorithm(LineDxfAlgorithm())
+        self.addAlgorithm(MultiExportAlgorithm())
         self.addAlgorithm(PointDxfAlgorithm())
         self.addAlgorithm(PolygonDxfAlgorithm())
+        self.addAlgorithm(ServiceAreaAlgorithm())
         self.addAlgorithm(ShortestPathPointLayerAlgorithm())
 
     def id(self):
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Runs TMC algorithms without the QGIS GUI. QGIS is started once and every job
+of the manifest runs in the same application and processing context, so
+layers loaded by one job are reused by the next ones, and so are the road
+graphs built by the routing algorithms.
+
+Usage (with the QGIS Python interpreter):
+
+    python tmc_batch.py manifest.json [--report report.json] [--stop-on-error]
+
+The manifest is a JSON file:
+
+    {
+        "defaults": {"DEFAULT_SPEED": 30},
+        "jobs": [
+            {
+                "algorithm": "Export cluster to DXF",
+                "parameters": {"INPUT": "clusters.gpkg", "FILENAME": "clusters.dxf"}
+            },
+            {
+                "algorithm": "native:buffer",
+                "parameters": {"INPUT": "roads.gpkg", "DISTANCE": 5, "OUTPUT": "buffer.gpkg"}
+            }
+        ]
+    }
+
+`algorithm` is either the name of a TMC algorithm or any processing
+algorithm id. `defaults` are applied to the parameters of every job that
+the algorithm accepts.
+"""
+
+__author__ = 'Basil Eric Rabi'
+__date__ = '2026-10-19'
+__copyright__ = '(C) 2026 by Basil Eric Rabi'
+__revision__ = '$Format:%H$'
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+class BatchRunner(object):
+    """
+    Owns the headless QGIS application and the processing context shared by
+    all jobs.
+    """
+
+    def __init__(self):
+        from qgis.core import (QgsApplication,
+                               QgsProcessingContext,
+                               QgsProject)
+        QgsApplication.setPrefixPath(os.environ.get('QGIS_PREFIX_PATH', sys.prefix), True)
+        self.app = QgsApplication([], False)
+        self.app.initQgis()
+        sys.path.append(os.path.join(QgsApplication.prefixPath(), 'python', 'plugins'))
+        from processing.core.Processing import Processing # pyright: reportMissingImports=false
+        Processing.initialize()
+
+        sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+        package = os.path.basename(PLUGIN_DIR)
+        module = importlib.import_module(f'{package}.tmc_algorithms_provider')
+        self.provider = module.TmcAlgorithmsProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
+        # Road graphs built by a job are reused by the following jobs with
+        # the same network and settings.
+        importlib.import_module(f'{package}.algorithm.routing').enable_graph_cache()
+
+        self.context = QgsProcessingContext()
+        self.context.setProject(QgsProject.instance())
+
+    def algorithm_id(self, algorithm):
+        from qgis.core import QgsApplication
+        if QgsApplication.processingRegistry().algorithmById(algorithm):
+            return algorithm
+        for alg in self.provider.algorithms():
+            if alg.name() == algorithm:
+                return alg.id()
+        raise Exception(f'Unknown algorithm `{algorithm}`.')
+
+    def run(self, algorithm, parameters, defaults=None):
+        import processing # pyright: reportMissingImports=false
+        from qgis.core import QgsApplication, QgsProcessingFeedback
+
+        algorithm_id = self.algorithm_id(algorithm)
+        if defaults:
+            accepted = [
+                definition.name() for definition in
+                QgsApplication.processingRegistry().algorithmById(algorithm_id).parameterDefinitions()
+            ]
+            parameters = dict(
+                {key: value for key, value in defaults.items() if key in accepted},
+                **parameters
+            )
+        return processing.run(
+            algorithm_id,
+            parameters,
+            feedback=QgsProcessingFeedback(),
+            context=self.context
+        )
+
+    def exit(self):
+        self.app.exitQgis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run TMC algorithms without the QGIS GUI.')
+    parser.add_argument('manifest', help='JSON file listing the jobs')
+    parser.add_argument('--report', help='write the job results into this JSON file')
+    parser.add_argument('--stop-on-error', action='store_true', help='skip the remaining jobs after a failure')
+    args = parser.parse_args()
+
+    with open(args.manifest) as fstream:
+        manifest = json.load(fstream)
+
+    runner = BatchRunner()
+    results = []
+    failed = False
+    for number, job in enumerate(manifest['jobs'], 1):
+        print(f'[{number}/{len(manifest["jobs"])}] {job["algorithm"]}', flush=True)
+        start = time.perf_counter()
+        try:
+            outputs = runner.run(job['algorithm'], job.get('parameters', {}), manifest.get('defaults'))
+            results.append({
+                'algorithm': job['algorithm'],
+                'status': 'ok',
+                'seconds': time.perf_counter() - start,
+                'outputs': {key: str(value) for key, value in outputs.items()}
+            })
+        except Exception as error:
+            failed = True
+            print(f'    failed: {error}', file=sys.stderr, flush=True)
+            results.append({
+                'algorithm': job['algorithm'],
+                'status': 'failed',
+                'seconds': time.perf_counter() - start,
+                'error': str(error)
+            })
+            if args.stop_on_error:
+                break
+    runner.exit()
+
+    if args.report:
+        with open(args.report, 'w') as fstream:
+            json.dump(results, fstream, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()